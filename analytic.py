@@ -0,0 +1,374 @@
+import argparse
+import math
+import os
+
+import numpy as np
+
+import config
+import inputs
+import loot
+import structs
+import tables
+import utils
+import vector
+
+METRICS = ("level", "gold", "gear_score", "power_ratio", "cumulative_xp")
+
+# gear-score points per bucket the gear dependent chances are evaluated on
+GEAR_BUCKET = 10
+# Gauss-Hermite nodes for expectations over the skill difficulty noise
+QUADRATURE_NODES = 64
+# probability mass below which a level or gear bucket is skipped
+EPSILON = 1e-9
+
+curves_file = os.path.join(tables.data_dir, "analytic.csv")
+
+
+def _normal_cdf(x: float) -> float:
+    return 0.5 * (1 + math.erf(x / math.sqrt(2)))
+
+
+class AnalyticModel:
+    """
+    Expected progression without sampling, using the turn formulas of utils. The state is
+    factored (mean-field): each equipment slot holds an exact distribution over item power,
+    updated as the max of per-turn drops, while cumulative XP and gold are sums of per-turn
+    increments whose mean and variance follow from the current gear-score and level
+    distributions. Levels are read off a normal approximation of cumulative XP.
+
+    Means track the simulation closely. Variances are approximate: XP and gold increments are
+    summed as if turns were independent, while a run that gears up early keeps winning more,
+    so spreads come out too narrow (gold SD about 63 against about 91 sampled at 300 turns).
+    """
+
+    def __init__(
+        self,
+        data: tables.Tables | None = None,
+        cfg: config.Config | None = None,
+        nodes: int = QUADRATURE_NODES,
+    ):
+        self.tables = data or tables.default()
+        self.cfg = cfg or config.default()
+
+        x, w = np.polynomial.hermite_e.hermegauss(nodes)
+        self._nodes = list(zip(x.tolist(), (w / w.sum()).tolist()))
+        self._tiers: dict[int, tuple] = {}
+        self._attempts: dict[tuple, np.ndarray] = {}
+
+        self._compile_drops()
+        start = np.zeros(self._powers)
+        start[15] = 1.0  # Equipment starts every slot at 15
+        self.slots = [start.copy() for _ in vector.GEAR_SLOTS]
+        self.xp_mean = 0.0
+        self.xp_var = 0.0
+        self.gold_mean = 0.0
+        self.gold_var = 0.0
+        self.turn = 0
+
+    def _compile_drops(self):
+        """Per tier and slot, the chance one rolled drop is an item of each power"""
+        index = self.tables.loot_index
+        self._powers = max([16] + [item.BaseItemPower + 1 for item in self.tables.loot])
+
+        self._drops: dict[int, np.ndarray] = {}
+        for tier, sampler in index.samplers.items():
+            weights = [
+                loot.PieceWeights[piece] * loot.QualityWeights[f"T{tier}"][quality]
+                for _, piece, quality in sampler.keys
+            ]
+            total = sum(weights)
+
+            drops = np.zeros((len(vector.GEAR_SLOTS), self._powers))
+            for key, weight in zip(sampler.keys, weights):
+                items = index.groups[key]
+                for item in items:
+                    slot = structs._SLOT_ATTRS.get(item.Slot, "accessory")
+                    drops[vector.GEAR_SLOTS.index(slot), item.BaseItemPower] += weight / total / len(items)
+            self._drops[tier] = drops
+
+    def _world(self, turns_done: int) -> structs.World:
+        """Beat in play after `turns_done` turns, see story.progress_story"""
+        schedule = self.tables.beat_schedule
+        if turns_done == 0:
+            return self.tables.story_beats[0]
+        if turns_done <= len(schedule):
+            return self.tables.story_beats[schedule[turns_done - 1]]
+        return self.tables.story_beats[-1]
+
+    def _xp_moments(self, zone_tier: int, base_xp: float) -> tuple[float, float]:
+        """First two moments of floor(skill difficulty * base_xp)"""
+        cfg = self.cfg
+        sd = abs(zone_tier)
+        center = utils.noise_difficulty(cfg, zone_tier, 0.0)
+        if sd == 0 or base_xp == 0:
+            value = math.floor(center * base_xp)
+            return value, value**2
+
+        lo = math.floor(min((center - 9 * sd) * base_xp, (center + 9 * sd) * base_xp))
+        hi = math.ceil(max((center - 9 * sd) * base_xp, (center + 9 * sd) * base_xp))
+        m1 = m2 = 0.0
+        for k in range(lo, hi + 1):
+            a, b = sorted((k / base_xp, (k + 1) / base_xp))
+            p = _normal_cdf((b - center) / sd) - _normal_cdf((a - center) / sd)
+            m1 += p * k
+            m2 += p * k * k
+        return m1, m2
+
+    def _tier(self, zone_tier: int) -> tuple:
+        """Per tier constants: death chance, XP moments and non-combat category odds"""
+        if zone_tier in self._tiers:
+            return self._tiers[zone_tier]
+
+        cfg = self.cfg
+        death = sum(
+            w
+            * utils.clamp(
+                (1 - utils.difficulty_chance(
+                    cfg, utils.noise_difficulty(cfg, zone_tier, x), zone_tier
+                ))
+                * cfg.DEATH_SEVERITY,
+                floor=0,
+                ceil=1,
+            )
+            for x, w in self._nodes
+        )
+
+        # first scenario whose threshold covers the roll, else the default category
+        thresholds, categories = self.tables.nc_thresholds.get(zone_tier, ((), ()))
+        odds = []
+        covered = 0.0
+        for thresh, category in zip(thresholds, categories):
+            p = utils.clamp(thresh, floor=0, ceil=1) - covered
+            if p > 0:
+                odds.append((category, p))
+                covered += p
+        if covered < 1:
+            odds.append((self.tables.nc_default_category, 1 - covered))
+
+        self._tiers[zone_tier] = (
+            death,
+            self._xp_moments(zone_tier, cfg.BASE_XP_COMBAT),
+            self._xp_moments(zone_tier, cfg.BASE_XP_NON_COMBAT),
+            odds,
+        )
+        return self._tiers[zone_tier]
+
+    def gear_distribution(self) -> np.ndarray:
+        """P(gear score == i), assuming independent slots"""
+        dist = self.slots[0]
+        for slot in self.slots[1:]:
+            dist = np.convolve(dist, slot)
+        return dist
+
+    def gear_buckets(self) -> list[tuple[int, float, float]]:
+        """(bucket, mean gear score, probability) per GEAR_BUCKET wide bucket with mass"""
+        dist = self.gear_distribution()
+        scores = np.arange(len(dist))
+        mass = np.bincount(scores // GEAR_BUCKET, weights=dist)
+        total = np.bincount(scores // GEAR_BUCKET, weights=dist * scores)
+        return [
+            (int(b), total[b] / mass[b], mass[b]) for b in np.flatnonzero(mass > EPSILON)
+        ]
+
+    def level_distribution(self) -> list[tuple[int, float]]:
+        """(level, probability) from a normal approximation of cumulative XP"""
+        cumulative = self.tables.cumulative_xp
+        sd = math.sqrt(self.xp_var)
+
+        # P(level >= L) = P(cumulative XP >= cumulative[L - 1]), with continuity correction
+        reach = [1.0]
+        for threshold in cumulative[1:]:
+            if sd == 0:
+                reach.append(float(self.xp_mean >= threshold))
+            else:
+                reach.append(1 - _normal_cdf((threshold - 0.5 - self.xp_mean) / sd))
+        reach.append(0.0)
+
+        levels = []
+        for level in range(1, len(cumulative) + 1):
+            p = reach[level - 1] - reach[level]
+            if p > EPSILON:
+                levels.append((level, p))
+        return levels
+
+    def _attempt_table(
+        self, category: structs.NCCategory, beat_dc: int, levels: list[int], buckets: list[int]
+    ) -> np.ndarray:
+        """Stat check chances over (level, gear bucket midpoint), each evaluated once"""
+        key = (category.OutcomeCategory, beat_dc)
+        if key not in self._attempts:
+            max_score = len(vector.GEAR_SLOTS) * (self._powers - 1)
+            shape = (len(self.tables.cumulative_xp) + 1, max_score // GEAR_BUCKET + 1)
+            self._attempts[key] = np.full(shape, np.nan)
+        table = self._attempts[key]
+
+        chances = table[np.ix_(levels, buckets)]
+        if np.isnan(chances).any():
+            stat = self.tables.stat_by_key.get(category.StatKey, self.tables.stats[0])
+            for i, j in zip(*np.nonzero(np.isnan(chances))):
+                score = buckets[j] * GEAR_BUCKET + (GEAR_BUCKET - 1) / 2
+                stat_score = utils.stat_value(self.cfg, stat, levels[i], score)
+                table[levels[i], buckets[j]] = chances[i, j] = utils.category_chance(
+                    self.cfg, category, beat_dc, stat_score
+                )
+        return chances
+
+    def step(self):
+        """Advance the state distribution by one turn"""
+        cfg = self.cfg
+        world = self._world(self.turn)
+        death, combat_xp, non_combat_xp, odds = self._tier(world.ZoneTier)
+
+        buckets = self.gear_buckets()
+        levels = self.level_distribution()
+        p_combat = utils.clamp(cfg.COMBAT_CHANCE, floor=0, ceil=1)
+
+        # combat: skill check on the power ratio, then survive the fight
+        gear = utils.recommended_gear(cfg, world.ZoneLevel)
+        p_check = sum(
+            p * utils.logistic(score / gear - world.BeatDC / 20) for _, score, p in buckets
+        )
+        p_win = p_combat * p_check * (1 - death)
+
+        # non-combat: category roll, then a stat check on level and gear bucket midpoint
+        level_ids = [level for level, _ in levels]
+        level_p = np.asarray([p for _, p in levels])
+        bucket_ids = [bucket for bucket, _, _ in buckets]
+        bucket_p = np.asarray([p for _, _, p in buckets])
+        p_attempt = 0.0
+        for category, p_category in odds:
+            chances = self._attempt_table(category, world.BeatDC, level_ids, bucket_ids)
+            p_attempt += p_category * float(level_p @ chances @ bucket_p)
+        p_attempt *= 1 - p_combat
+
+        # XP: combat wins and every non-combat turn award floor(difficulty * base XP)
+        mean = p_win * combat_xp[0] + (1 - p_combat) * non_combat_xp[0]
+        second = p_win * combat_xp[1] + (1 - p_combat) * non_combat_xp[1]
+        self.xp_mean += mean
+        self.xp_var += second - mean**2
+
+        # gold: fixed amounts per combat win and non-combat success
+        mean = p_win * cfg.GOLD_PER_COMBAT_STEP + p_attempt * cfg.GOLD_PER_NON_COMBAT_STEP
+        second = (
+            p_win * cfg.GOLD_PER_COMBAT_STEP**2
+            + p_attempt * cfg.GOLD_PER_NON_COMBAT_STEP**2
+        )
+        self.gold_mean += mean
+        self.gold_var += second - mean**2
+
+        # gear: half of the combat wins drop an item, each slot keeps its best item
+        for i, drops in enumerate(self._drops.get(world.ZoneTier, ())):
+            r = p_win * 0.5 * drops
+            kept = 1 - r.sum() + np.cumsum(r)
+            below = np.cumsum(self.slots[i]) - self.slots[i]
+            self.slots[i] = self.slots[i] * kept + r * below
+
+        self.turn += 1
+
+    def moments(self) -> dict[str, tuple[float, float]]:
+        """{metric: (mean, variance)} of the current state"""
+        world = self._world(self.turn)
+
+        dist = self.gear_distribution()
+        scores = np.arange(len(dist))
+        gear_mean = float(dist @ scores)
+        gear_var = float(dist @ scores**2) - gear_mean**2
+        gear = utils.recommended_gear(self.cfg, world.ZoneLevel)
+
+        levels = self.level_distribution()
+        level_mean = sum(level * p for level, p in levels)
+        level_var = sum(level**2 * p for level, p in levels) - level_mean**2
+
+        return {
+            "level": (level_mean, level_var),
+            "gold": (self.gold_mean, self.gold_var),
+            "gear_score": (gear_mean, gear_var),
+            "power_ratio": (gear_mean / gear, gear_var / gear**2),
+            "cumulative_xp": (self.xp_mean, self.xp_var),
+        }
+
+    def run(self, turns: int) -> dict[str, dict[str, list[float]]]:
+        """Advance `turns` times, returns per-turn curves[metric]["mean" | "var"][turn]"""
+        curves = {m: {"mean": [], "var": []} for m in METRICS}
+        for _ in range(turns):
+            self.step()
+            for metric, (mean, var) in self.moments().items():
+                curves[metric]["mean"].append(mean)
+                curves[metric]["var"].append(max(var, 0.0))
+        return curves
+
+
+def validate(
+    runs: int = 2000, turns: int = inputs.TURNS, seed: int = inputs.SEED
+) -> dict[str, tuple[float, float, float, float]]:
+    """
+    Compare the end-of-campaign analytic moments with a Monte Carlo batch on the vector
+    engine. Only the means are expected to agree, the analytic SDs are approximate and
+    underestimate the sampled ones (see AnalyticModel).
+
+    Returns:
+        {metric: (analytic mean, analytic sd, sampled mean, sampled sd)}
+    """
+    model = AnalyticModel()
+    for _ in range(turns):
+        model.step()
+
+    engine = vector.VectorEngine(runs, seed)
+    for turn in range(turns):
+        engine.step(turn)
+    sampled = {
+        "level": engine.level,
+        "gold": engine.gold,
+        "gear_score": engine.gear_score(),
+        "power_ratio": engine.power_ratio(),
+        "cumulative_xp": engine.cumulative_exp(),
+    }
+
+    return {
+        metric: (
+            mean,
+            math.sqrt(max(var, 0.0)),
+            float(np.mean(sampled[metric])),
+            float(np.std(sampled[metric])),
+        )
+        for metric, (mean, var) in model.moments().items()
+    }
+
+
+def write_curves(curves: dict[str, dict[str, list[float]]], path: str = curves_file):
+    turns = len(curves[METRICS[0]]["mean"])
+
+    with open(path, mode="w") as file:
+        file.write(
+            "Step," + ",".join(f"{m}_mean,{m}_sd" for m in curves) + "\n"
+        )
+        for turn in range(turns):
+            values = ",".join(
+                f"{c['mean'][turn]:.4f},{math.sqrt(c['var'][turn]):.4f}"
+                for c in curves.values()
+            )
+            file.write(f"{turn + 1},{values}\n")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Expected progression curves without sampling"
+    )
+    arg_parser.add_argument("--turns", type=int, default=inputs.TURNS)
+    arg_parser.add_argument("--out", default=curves_file)
+    arg_parser.add_argument(
+        "--validate", type=int, metavar="RUNS", help="compare with a Monte Carlo batch"
+    )
+    args = arg_parser.parse_args()
+
+    if args.validate:
+        report = validate(args.validate, args.turns)
+        for metric, (mean, sd, mc_mean, mc_sd) in report.items():
+            print(
+                f"{metric:>14}: analytic {mean:10.3f} +/- {sd:8.3f}"
+                f"  sampled {mc_mean:10.3f} +/- {mc_sd:8.3f}"
+            )
+        print("analytic SDs are approximate: turns are treated as independent, so they run low")
+    else:
+        write_curves(AnalyticModel().run(args.turns), args.out)
+        print(f"Saved: {args.out} ({args.turns} turns)")
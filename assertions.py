@@ -0,0 +1,294 @@
+import argparse
+import csv
+import operator
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+import log
+import tables
+
+assertions_file = os.path.join(tables.data_dir, "Assertions.csv")
+regression_file = os.path.join(tables.data_dir, "REGRESSION.csv")
+# where a check run writes its audit; REGRESSION.csv is the checked-in reference
+audit_file = os.path.join(tables.data_dir, "regression_audit.csv")
+
+# rows per block when checking a whole trace
+CHUNK_ROWS = 1 << 20
+
+_NUMBER = r"-?\d+(?:\.\d+)?"
+_COLUMN = r"[A-Za-z_][\w?#]*"
+_CHAIN = re.compile(
+    rf"^({_NUMBER})\s*(<=|<)\s*({_COLUMN})\s*(<=|<)\s*({_NUMBER})$"
+)
+_SINGLE = re.compile(rf"^({_COLUMN})\s*(<=|<|>=|>|==|!=)\s*({_NUMBER})$")
+_STEP = re.compile(r"^Step t\+1 exists")
+
+_OPS = {
+    "<=": operator.le,
+    "<": operator.lt,
+    ">=": operator.ge,
+    ">": operator.gt,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+# float columns audited for NaN / inf, the #VALUE! errors of the sheet
+_FLOAT_COLUMNS = (
+    "PowerRatio",
+    "SuccessChanceCombat",
+    "DeathChance",
+    "StatScore",
+    "SuccessChance_NonCombat",
+)
+_AUDIT_COLUMNS = ("Success?", "XP_Earned", "Gold_Earned") + _FLOAT_COLUMNS
+
+
+class BoundRule:
+    """`lo <= column <= hi` style bounds, any side optional"""
+
+    def __init__(self, name: str, text: str, column: str, checks: list[tuple]):
+        self.name = name
+        self.text = text
+        self.columns = (column,)
+        self._column = column
+        self._checks = checks  # (op, value) applied as op(column, value)
+
+    def passed(self, columns: dict[str, np.ndarray]) -> np.ndarray:
+        values = columns[self._column]
+        mask = np.ones(len(values), dtype=bool)
+        for op, value in self._checks:
+            mask &= op(values, value)
+        return mask
+
+
+class StepRule:
+    """Every step follows the previous one, carried across blocks"""
+
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self.text = text
+        self.columns = ("Step",)
+        self._last: int | None = None
+
+    def passed(self, columns: dict[str, np.ndarray]) -> np.ndarray:
+        steps = columns["Step"]
+        if len(steps) == 0:
+            return np.ones(0, dtype=bool)
+        previous = steps[0] - 1 if self._last is None else self._last
+        self._last = int(steps[-1])
+        return np.diff(steps, prepend=previous) == 1
+
+
+def compile_rule(name: str, text: str) -> BoundRule | StepRule | str:
+    """Compiled rule, or the reason it cannot be evaluated on recorded turns"""
+    if _STEP.match(text):
+        return StepRule(name, text)
+
+    if m := _CHAIN.match(text):
+        lo, lo_op, column, hi_op, hi = m.groups()
+        checks = [(_OPS[">=" if lo_op == "<=" else ">"], float(lo)), (_OPS[hi_op], float(hi))]
+    elif m := _SINGLE.match(text):
+        column, op, value = m.groups()
+        checks = [(_OPS[op], float(value))]
+    else:
+        return "spreadsheet formula"
+
+    if column not in log.TURN_FIELDS:
+        return f"{column} is not recorded"
+    return BoundRule(name, text, column, checks)
+
+
+def _rule_text(formula: str, note: str) -> str:
+    """The checkable expression: the formula, else the note up to its remark"""
+    for text in (formula, note):
+        text = text.split(" (")[0].strip()
+        if text and (_CHAIN.match(text) or _SINGLE.match(text) or _STEP.match(text)):
+            return text
+    return formula or note
+
+
+class Checker:
+    """
+    Assertions.csv compiled once into vectorized predicates. Blocks of turn columns are
+    checked as they arrive; failures, the first failing step per rule and the
+    REGRESSION.csv audit counts accumulate across blocks.
+    """
+
+    def __init__(self, rules: list, skipped: dict[str, str] | None = None):
+        self.rules = rules
+        self.skipped = skipped or {}
+        self.columns = sorted({c for rule in rules for c in rule.columns} | {"Step"})
+        self.rows = 0
+        self.failures: Counter[str] = Counter({rule.name: 0 for rule in rules})
+        self.first_fail: dict[str, int | None] = {rule.name: None for rule in rules}
+        self.audit: Counter[str] = Counter()
+
+    @classmethod
+    def from_file(cls, path: str = assertions_file) -> "Checker":
+        rules = []
+        skipped = {}
+        with open(path, newline="") as file:
+            reader = csv.reader(file, skipinitialspace=True)
+            next(reader, None)
+            for row in reader:
+                name, formula, _, note = (c.strip() for c in (row + [""] * 4)[:4])
+                rule = compile_rule(name, _rule_text(formula, note))
+                if isinstance(rule, str):
+                    skipped[name] = rule
+                else:
+                    rules.append(rule)
+        return cls(rules, skipped)
+
+    def check(self, columns: dict[str, np.ndarray]) -> np.ndarray:
+        """Check one block of turns, returns its (rows, rules) failure matrix"""
+        steps = columns["Step"]
+        failed = np.zeros((len(steps), len(self.rules)), dtype=bool)
+
+        for j, rule in enumerate(self.rules):
+            failed[:, j] = ~rule.passed(columns)
+            count = int(failed[:, j].sum())
+            if count:
+                self.failures[rule.name] += count
+                if self.first_fail[rule.name] is None:
+                    self.first_fail[rule.name] = int(steps[np.argmax(failed[:, j])])
+
+        self.rows += len(steps)
+        return failed
+
+    def check_rows(self, rows: list[tuple]) -> dict[int, str]:
+        """Check a block of turn rows, returns a FailNote per failing row index"""
+        index = {name: i for i, name in enumerate(log.TURN_FIELDS)}
+        columns = {
+            name: np.array([row[index[name]] for row in rows]) for name in self.columns
+        }
+        failed = self.check(columns)
+
+        notes = {}
+        for i in np.flatnonzero(failed.any(axis=1)):
+            notes[int(i)] = "; ".join(
+                f"{rule.name}: {rule.text} (first failed at step {self.first_fail[rule.name]})"
+                for j, rule in enumerate(self.rules)
+                if failed[i, j]
+            ).replace(",", ";")
+        return notes
+
+    def audit_block(self, columns: dict[str, np.ndarray]):
+        """Add one block of turns to the REGRESSION.csv audit counts"""
+        combat = columns["SuccessChanceCombat"] != 0
+        non_combat = ~combat
+        success = columns["Success?"].astype(float)
+
+        self.audit["RowCount"] += len(combat)
+        self.audit["CombatRows"] += int(combat.sum())
+        self.audit["NonCombatRows"] += int(non_combat.sum())
+        self.audit["Success_Numeric"] += int(np.isfinite(success).sum())
+        self.audit["Success_Only01"] += int(((success != 0) & (success != 1)).sum())
+        self.audit["No_VALUE_Errors"] += int(
+            sum((~np.isfinite(columns[c].astype(float))).sum() for c in _FLOAT_COLUMNS)
+        )
+        self.audit["XP_Changes_NC"] += int(columns["XP_Earned"][non_combat].sum())
+        self.audit["Rep_Changes_NC"] += 0  # reputation is not simulated yet
+        self.audit["Gold_Changes_NC"] += int(columns["Gold_Earned"][non_combat].sum())
+
+    @property
+    def passed(self) -> bool:
+        return (
+            not any(self.failures.values())
+            and self.audit["Success_Only01"] == 0
+            and self.audit["No_VALUE_Errors"] == 0
+        )
+
+    def report(self) -> str:
+        lines = []
+        for rule in self.rules:
+            first = self.first_fail[rule.name]
+            status = "PASS" if first is None else f"FAIL x{self.failures[rule.name]}"
+            where = "" if first is None else f", first at step {first}"
+            lines.append(f"{rule.name:>16}: {rule.text} {status}{where}")
+        for name, reason in self.skipped.items():
+            lines.append(f"{name:>16}: skipped, {reason}")
+        return "\n".join(lines)
+
+
+def _check_blocks(checker: Checker, views: dict[str, memoryview], rows: int):
+    arrays = {name: np.asarray(view) for name, view in views.items()}
+    for start in range(0, rows, CHUNK_ROWS):
+        block = {name: array[start : start + CHUNK_ROWS] for name, array in arrays.items()}
+        checker.check(block)
+        checker.audit_block(block)
+
+
+def check_trace(path: str, checker: Checker | None = None) -> Checker:
+    """Check and audit a columnar trace in CHUNK_ROWS blocks, zero-copy from the mmap"""
+    import tracelog
+
+    checker = checker or Checker.from_file()
+    names = set(checker.columns) | set(_AUDIT_COLUMNS)
+    with tracelog.Trace(path) as trace:
+        # the arrays must be gone before the trace releases its views
+        _check_blocks(checker, {name: trace.column(name) for name in names}, trace.rows)
+    return checker
+
+
+def check_csv(path: str, checker: Checker | None = None) -> Checker:
+    """Check and audit an output.csv"""
+    checker = checker or Checker.from_file()
+    names = set(checker.columns) | set(_AUDIT_COLUMNS)
+    with open(path, newline="") as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        rows = list(reader)
+
+    block = {}
+    for name in names:
+        i = header.index(name)
+        values = [row[i] for row in rows]
+        if name == "Success?":
+            block[name] = np.array([v == "True" for v in values])
+        else:
+            block[name] = np.array(values, dtype=float)
+    checker.check(block)
+    checker.audit_block(block)
+    return checker
+
+
+def write_regression(checker: Checker, path: str):
+    """Write the audit counts and Audit_Status of `checker` in the REGRESSION.csv layout"""
+    with open(path, mode="w") as file:
+        file.write(f"Audit_Status,{'PASS' if checker.passed else 'FAIL'}\n")
+        for name in (
+            "RowCount",
+            "CombatRows",
+            "NonCombatRows",
+            "Success_Numeric",
+            "Success_Only01",
+            "No_VALUE_Errors",
+            "XP_Changes_NC",
+            "Rep_Changes_NC",
+            "Gold_Changes_NC",
+        ):
+            file.write(f"{name},{checker.audit[name]}\n")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Check Assertions.csv over a run and write the REGRESSION.csv audit"
+    )
+    arg_parser.add_argument(
+        "source", nargs="?", default=log.output_file, help="output.csv or a trace directory"
+    )
+    arg_parser.add_argument("--out", default=audit_file)
+    args = arg_parser.parse_args()
+
+    if os.path.isdir(args.source):
+        result = check_trace(args.source)
+    else:
+        result = check_csv(args.source)
+    print(result.report())
+    write_regression(result, args.out)
+    print(f"Saved: {args.out} ({'PASS' if result.passed else 'FAIL'})")
+    if not result.passed:
+        raise SystemExit(1)
@@ -0,0 +1,239 @@
+import argparse
+import math
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+import config
+import context
+import inputs
+import kpi
+import records
+import simulate
+import streams
+import tables
+import utils
+
+if TYPE_CHECKING:
+    import fastforward
+
+METRICS = ("level", "gold", "gear_score", "power_ratio")
+PERCENTILES = (5, 25, 50, 75, 95)
+
+bands_file = os.path.join(tables.data_dir, "batch.csv")
+
+
+def run_seed(
+    index: int, seed: int = inputs.SEED, run_id: int = inputs.RUN_ID
+) -> np.random.SeedSequence:
+    """Seed sequence of run `index` of batch (`seed`, `run_id`), independent of the others"""
+    return streams.child(np.random.SeedSequence((seed, run_id)), index)
+
+
+def run_campaign(
+    seed: np.random.SeedSequence, turns: int, cfg: config.Config | None = None
+) -> dict[str, array]:
+    """Run one seeded campaign without logging or plotting and return its per-turn trace"""
+    ctx = context.SimContext(seed, cfg=cfg)
+    player = ctx.player
+    scratch = records.TurnRecords(records.RING_ROWS, ring=True)
+
+    trace = {
+        "level": array("i"),
+        "gold": array("i"),
+        "gear_score": array("i"),
+        "power_ratio": array("d"),
+    }
+
+    for turn in range(turns):
+        simulate.step(ctx, turn, scratch)
+
+        trace["level"].append(player.level)
+        trace["gold"].append(player.gold)
+        trace["gear_score"].append(player.equipment.get_score())
+        trace["power_ratio"].append(utils.power_ratio(ctx))
+
+    return trace
+
+
+def summarize_campaign(
+    seed: np.random.SeedSequence,
+    turns: int,
+    cfg: config.Config | None = None,
+    fast: "fastforward.FastForward | None" = None,
+    data: tables.Tables | None = None,
+) -> tuple[dict[str, float], dict[int, int]]:
+    """
+    Run one seeded campaign keeping only its KPIs, fast-forwarded between events by `fast`
+    when given. Returns (KPI values, level -> step).
+    """
+    ctx = context.SimContext(seed, data, cfg)
+    if fast is not None:
+        kpis = fast.run(ctx, turns)
+        return kpis.values(ctx), kpis.level_steps
+
+    kpis = kpi.RunKPIs()
+    scratch = records.TurnRecords(records.RING_ROWS, ring=True)
+
+    for turn in range(turns):
+        kpis.update(turn, ctx, scratch, simulate.step(ctx, turn, scratch))
+
+    return kpis.values(ctx), kpis.level_steps
+
+
+def _run_chunk(
+    job: tuple[list[np.random.SeedSequence], int, config.Config | None]
+) -> list[dict[str, array]]:
+    seeds, turns, cfg = job
+    return [run_campaign(seed, turns, cfg) for seed in seeds]
+
+
+def _summarize_chunk(
+    job: tuple[list[np.random.SeedSequence], int, config.Config | None, bool]
+) -> list[tuple[dict[str, float], dict[int, int]]]:
+    seeds, turns, cfg, fast = job
+    engine = None
+    if fast:
+        import fastforward
+
+        engine = fastforward.FastForward(cfg=cfg)
+    return [summarize_campaign(seed, turns, cfg, engine) for seed in seeds]
+
+
+def _jobs(
+    runs: int, turns: int, workers: int, seed: int, run_id: int, cfg: config.Config | None
+) -> list[tuple[list[np.random.SeedSequence], int, config.Config | None]]:
+    seeds = [run_seed(i, seed, run_id) for i in range(runs)]
+
+    # a few chunks per worker keeps the pool busy without pickling per run
+    chunk = max(1, math.ceil(runs / (workers * 4)))
+    return [(seeds[i : i + chunk], turns, cfg) for i in range(0, runs, chunk)]
+
+
+def _map_chunks(fn, jobs: list, workers: int):
+    """Results of `fn` per job, in job order, inline when there is a single worker"""
+    if workers == 1:
+        yield from map(fn, jobs)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from pool.map(fn, jobs)
+
+
+def reduce_bands(
+    traces: list[dict[str, array]],
+    turns: int,
+    percentiles: tuple[int, ...] = PERCENTILES,
+) -> dict[str, dict[int, list[float]]]:
+    """Collapse run traces into per-turn percentile bands, bands[metric][p][turn]"""
+    bands: dict[str, dict[int, list[float]]] = {}
+
+    for metric in METRICS:
+        # [run, turn], each trace array is read through the buffer protocol, not per value
+        values = np.stack([np.asarray(trace[metric])[:turns] for trace in traces])
+        lines = np.percentile(values, percentiles, axis=0)
+        bands[metric] = {p: line.tolist() for p, line in zip(percentiles, lines)}
+
+    return bands
+
+
+def run_batch(
+    runs: int,
+    turns: int,
+    workers: int | None = None,
+    seed: int = inputs.SEED,
+    run_id: int = inputs.RUN_ID,
+    engine: str = "scalar",
+    cfg: config.Config | None = None,
+) -> dict[str, dict[int, list[float]]]:
+    """
+    Run `runs` seeded campaigns and reduce them to percentile bands. The scalar engine fans
+    campaigns out over a process pool, the vector engine advances all of them in lockstep
+    in this process.
+    """
+    if engine == "vector":
+        import vector
+
+        return vector.VectorEngine(
+            runs, np.random.SeedSequence((seed, run_id)), cfg=cfg
+        ).run(turns)
+
+    workers = workers or os.cpu_count() or 1
+    jobs = _jobs(runs, turns, workers, seed, run_id, cfg)
+
+    traces: list[dict[str, array]] = []
+    for result in _map_chunks(_run_chunk, jobs, workers):
+        traces.extend(result)
+
+    return reduce_bands(traces, turns)
+
+
+def run_summary(
+    runs: int,
+    turns: int,
+    workers: int | None = None,
+    seed: int = inputs.SEED,
+    run_id: int = inputs.RUN_ID,
+    cfg: config.Config | None = None,
+    fast: bool = False,
+) -> kpi.Summary:
+    """
+    Run `runs` seeded campaigns and fold their KPIs into a cross-run summary as chunks
+    complete, without keeping any per-turn data. With `fast`, campaigns are fast-forwarded
+    from event to event (fastforward.py).
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = [job + (fast,) for job in _jobs(runs, turns, workers, seed, run_id, cfg)]
+    summary = kpi.Summary()
+    for result in _map_chunks(_summarize_chunk, jobs, workers):
+        for values, level_steps in result:
+            summary.add(values, level_steps)
+    return summary
+
+
+def write_bands(bands: dict[str, dict[int, list[float]]], path: str = bands_file):
+    columns = [(metric, p) for metric in bands for p in bands[metric]]
+    turns = len(next(iter(bands[METRICS[0]].values())))
+
+    with open(path, mode="w") as file:
+        file.write(
+            "Step," + ",".join(f"{metric}_P{p}" for metric, p in columns) + "\n"
+        )
+        for turn in range(turns):
+            values = ",".join(f"{bands[m][p][turn]:.3f}" for m, p in columns)
+            file.write(f"{turn + 1},{values}\n")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Monte Carlo batch of campaigns")
+    arg_parser.add_argument("--runs", type=int, default=1000)
+    arg_parser.add_argument("--turns", type=int, default=inputs.TURNS)
+    arg_parser.add_argument("--workers", type=int, default=None)
+    arg_parser.add_argument("--seed", type=int, default=inputs.SEED)
+    arg_parser.add_argument("--run-id", type=int, default=inputs.RUN_ID)
+    arg_parser.add_argument("--engine", choices=("scalar", "vector"), default="scalar")
+    arg_parser.add_argument(
+        "--summary", action="store_true", help="cross-run KPI summary instead of bands"
+    )
+    arg_parser.add_argument(
+        "--fast", action="store_true", help="fast-forward between events (--summary only)"
+    )
+    arg_parser.add_argument("--out", default=None)
+    args = arg_parser.parse_args()
+    if args.fast and not args.summary:
+        arg_parser.error("--fast keeps no per-turn data, use it with --summary")
+
+    if args.summary:
+        out = args.out or kpi.summary_file
+        run_summary(
+            args.runs, args.turns, args.workers, args.seed, args.run_id, fast=args.fast
+        ).write(out)
+    else:
+        out = args.out or bands_file
+        bands = run_batch(
+            args.runs, args.turns, args.workers, args.seed, args.run_id, args.engine
+        )
+        write_bands(bands, out)
+    print(f"Saved: {out} ({args.runs} runs x {args.turns} turns)")
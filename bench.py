@@ -0,0 +1,255 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+import context
+import inputs
+import log
+import loot
+import parser
+import records
+import simulate
+import structs
+import tables
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+results_file = os.path.join(tables.data_dir, "bench.json")
+
+# a case is slower than its baseline when its rate drops by more than this fraction
+TOLERANCE = 0.10
+
+
+def _simulate(turns: int) -> tuple[Callable, int, str]:
+    def run():
+        writer = log.RunWriter(log.NullSink())
+        simulate.simulate(
+            turns, seed=inputs.SEED, writer=writer, plot=False, dashboard=None
+        )
+
+    return run, turns, "turns"
+
+
+def _fast_forward(turns: int) -> tuple[Callable, int, str]:
+    import fastforward
+
+    engine = fastforward.FastForward()
+
+    def run():
+        engine.run(context.SimContext(inputs.SEED), turns)
+
+    return run, turns, "turns"
+
+
+def _get_drop(n: int) -> tuple[Callable, int, str]:
+    ctx = context.SimContext(inputs.SEED)
+
+    def run():
+        for _ in range(n):
+            loot.get_drop(ctx)
+
+    return run, n, "calls"
+
+
+def _award_exp(n: int) -> tuple[Callable, int, str]:
+    data = tables.default()
+
+    def run():
+        player = structs.Player(data)
+        for i in range(n):
+            if player.level >= len(data.cumulative_xp):
+                player = structs.Player(data)
+            player.award_exp(37 + i % 64)
+
+    return run, n, "calls"
+
+
+def _record(n: int) -> tuple[Callable, int, str]:
+    ctx = context.SimContext(inputs.SEED)
+    turn_records = records.TurnRecords(1)
+    i = simulate.step(ctx, 0, turn_records)
+
+    def run():
+        with log.RunWriter(log.NullSink()) as writer:
+            for turn in range(n):
+                writer.record(turn, ctx, turn_records, i)
+
+    return run, n, "rows"
+
+
+def _read_csv(rows: int, root: str) -> tuple[Callable, int, str]:
+    # the real loot table repeated with fresh item IDs
+    path = os.path.join(root, f"loot_{rows}.csv")
+    source = tables.default().loot
+    with open(path, mode="w") as file:
+        file.write("ItemID,Slot,Quality,BaseItemPower,SellValue\n")
+        for i in range(rows):
+            item = source[i % len(source)]
+            file.write(
+                f"{i + 1},{item.Slot},{item.Quality},{item.BaseItemPower},{item.SellValue}\n"
+            )
+
+    def run():
+        parser.read_csv(path, structs.Loot)
+
+    return run, rows, "rows"
+
+
+def _load_simulation_data(turns: int, root: str) -> tuple[Callable, int, str]:
+    import curve
+
+    writer = log.RunWriter(log.CSVSink(os.path.join(root, "output.csv")))
+    simulate.simulate(turns, seed=inputs.SEED, writer=writer, plot=False, dashboard=None)
+
+    def run():
+        data_dir = tables.data_dir
+        tables.data_dir = root
+        try:
+            curve.load_simulation_data()
+        finally:
+            tables.data_dir = data_dir
+
+    return run, turns, "rows"
+
+
+# name -> (factory, size, needs a scratch directory)
+CASES = {
+    "simulate_300": (_simulate, 300, False),
+    "simulate_10k": (_simulate, 10_000, False),
+    "simulate_100k": (_simulate, 100_000, False),
+    "fast_forward_1m": (_fast_forward, 1_000_000, False),
+    "get_drop": (_get_drop, 100_000, False),
+    "award_exp": (_award_exp, 100_000, False),
+    "record": (_record, 100_000, False),
+    "read_csv": (_read_csv, 200_000, True),
+    "load_simulation_data": (_load_simulation_data, 10_000, True),
+}
+
+
+def measure(name: str, repeat: int = 3) -> dict:
+    """Best wall time of `repeat` runs of a case, plus its traced allocation peak"""
+    factory, size, scratch = CASES[name]
+
+    with tempfile.TemporaryDirectory() as root:
+        run, units, unit = factory(size, root) if scratch else factory(size)
+
+        seconds = min(_timed(run) for _ in range(repeat))
+
+        tracemalloc.start()
+        run()
+        _, alloc_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    result = {
+        "units": units,
+        "unit": unit,
+        "seconds": seconds,
+        "rate": units / seconds,
+        "alloc_peak_kb": alloc_peak / 1024,
+    }
+    if resource is not None:
+        # kilobytes on Linux, bytes on macOS
+        scale = 1024 if sys.platform == "darwin" else 1
+        result["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    return result
+
+
+def _timed(run: Callable) -> float:
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+def run_bench(names: list[str], repeat: int = 3, isolate: bool = True) -> dict:
+    """
+    Run benchmark cases, each in a fresh worker process by default so peak RSS belongs to
+    that case alone.
+    """
+    cases = {}
+    for name in names:
+        if isolate:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                cases[name] = pool.submit(measure, name, repeat).result()
+        else:
+            cases[name] = measure(name, repeat)
+
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "cases": cases,
+    }
+
+
+def compare(
+    results: dict, baseline: dict, tolerance: float = TOLERANCE
+) -> dict[str, tuple[float, bool]]:
+    """
+    Rate of each case relative to the baseline, cases missing from either side are skipped.
+
+    Returns:
+        {case: (speedup, passed)}
+    """
+    report = {}
+    for name, case in results["cases"].items():
+        if name in baseline["cases"]:
+            speedup = case["rate"] / baseline["cases"][name]["rate"]
+            report[name] = (speedup, speedup >= 1 - tolerance)
+    return report
+
+
+def print_results(results: dict):
+    print(f"{'case':>22} {'rate':>16} {'seconds':>9} {'alloc peak':>12} {'peak RSS':>12}")
+    for name, case in results["cases"].items():
+        rss = case.get("peak_rss_kb")
+        print(
+            f"{name:>22} {case['rate']:>9.0f} {case['unit'] + '/s':>6}"
+            f" {case['seconds']:>9.3f} {case['alloc_peak_kb']:>9.0f} KB"
+            f" {'-' if rss is None else f'{rss / 1024:.0f} MB':>12}"
+        )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the simulation hot path")
+    arg_parser.add_argument("cases", nargs="*", help=f"any of {', '.join(CASES)}")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--out", default=results_file)
+    arg_parser.add_argument("--compare", metavar="BASELINE", help="baseline JSON to gate on")
+    arg_parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    arg_parser.add_argument(
+        "--inline", action="store_true", help="run every case in this process"
+    )
+    args = arg_parser.parse_args()
+    for name in args.cases:
+        if name not in CASES:
+            arg_parser.error(f"unknown case {name}")
+
+    results = run_bench(args.cases or list(CASES), args.repeat, not args.inline)
+    print_results(results)
+    with open(args.out, mode="w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Saved: {args.out}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            report = compare(results, json.load(file), args.tolerance)
+        for name, (speedup, passed) in report.items():
+            print(f"{name:>22}: {speedup:6.2f}x {'PASS' if passed else 'SLOW'}")
+        status = "PASS" if all(passed for _, passed in report.values()) else "FAIL"
+        print(f"Audit_Status,{status}")
+        if status == "FAIL":
+            raise SystemExit(1)
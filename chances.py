@@ -0,0 +1,205 @@
+import argparse
+import csv
+import functools
+import os
+
+import numpy as np
+
+import config
+import structs
+import tables
+import utils
+
+chances_file = os.path.join(tables.data_dir, "chances.csv")
+
+
+class ChanceTables:
+    """
+    Success chances of the turn formulas of utils, evaluated once per story beat, non-combat
+    category, level and gear score bucket of CHANCE_BUCKET points. A lookup reads the two
+    edges around a gear score and interpolates linearly between them with
+    INTERPOLATE_CHANCES, else it takes the nearest edge; scores on an edge are exact.
+    """
+
+    def __init__(self, data: tables.Tables | None = None, cfg: config.Config | None = None):
+        import vector
+
+        self.tables = data or tables.default()
+        self.cfg = cfg or config.default()
+        self.bucket = max(1, self.cfg.CHANCE_BUCKET)
+        self.interpolate = bool(self.cfg.INTERPOLATE_CHANCES)
+
+        beats = self.tables.story_beats
+        categories = self.tables.nc_categories
+        stats = [
+            self.tables.stat_by_key.get(c.StatKey, self.tables.stats[0]) for c in categories
+        ]
+
+        # every slot starts at 15 and only ever holds an item of the loot table
+        top = max([15] + [item.BaseItemPower for item in self.tables.loot])
+        self.max_score = len(vector.GEAR_SLOTS) * top
+        self.edges = self.bucket * np.arange(self.max_score // self.bucket + 2)
+
+        beat_dc = np.asarray([w.BeatDC for w in beats], dtype=float)[:, None]
+        zone_gear = np.asarray([utils.recommended_gear(self.cfg, w.ZoneLevel) for w in beats])
+        # [beat, edge], see utils.skill_chance
+        self.combat = 1 / (1 + np.exp(-(self.edges / zone_gear[:, None] - beat_dc / 20)))
+
+        # [beat, category, level, edge], see utils.stat_value and utils.category_chance
+        levels = np.arange(len(self.tables.cumulative_xp) + 1)[:, None]
+        stat = (
+            np.asarray([s.Base for s in stats], dtype=float)[:, None, None]
+            + levels * np.asarray([s.PerLevel for s in stats])[:, None, None]
+            + self.edges / max(1, self.cfg.GEAR_STAT_SCALING)
+        )
+        dc = np.asarray([c.CategoryDC for c in categories])[:, None, None]
+        tn = dc + beat_dc[:, :, None, None]
+        uni = np.clip((21 - (tn - stat)) / 20, 0, 1)
+        self.non_combat = np.clip(
+            1 / (1 + np.exp(-self.cfg.ATTEMPT_SLOPE * (tn - uni))),
+            self.cfg.FLOOR_SUCCESS,
+            self.cfg.CEIL_SUCCESS,
+        )
+
+        self._beats = {id(world): i for i, world in enumerate(beats)}
+        self._categories = {
+            key: categories.index(category)
+            for key, category in self.tables.nc_category_by_key.items()
+        }
+        # nested lists, indexing them is cheaper than indexing arrays one value at a time
+        self._combat = self.combat.tolist()
+        self._non_combat = self.non_combat.tolist()
+
+    def _lookup(self, row: list[float], score: int) -> float:
+        w = self.bucket
+        if not self.interpolate:
+            return row[(2 * score + w) // (2 * w)]
+        i, rest = divmod(score, w)
+        lo = row[i]
+        return lo + (row[i + 1] - lo) * rest / w if rest else lo
+
+    def combat_chance(self, world: structs.World, score: int) -> float:
+        """Chance to pass the combat skill check of `world` at gear `score`"""
+        return self._lookup(self._combat[self._beats[id(world)]], score)
+
+    def non_combat_chance(
+        self, world: structs.World, category_key: str, level: int, score: int
+    ) -> float:
+        """Success chance of a non-combat attempt of `category_key` in `world`"""
+        category = self._categories.get(category_key, 0)
+        return self._lookup(self._non_combat[self._beats[id(world)]][category][level], score)
+
+    def _gather(self, table: np.ndarray, index: tuple, scores: np.ndarray) -> np.ndarray:
+        w = self.bucket
+        if not self.interpolate:
+            return table[index + ((2 * scores + w) // (2 * w),)]
+        i, rest = np.divmod(scores, w)
+        lo = table[index + (i,)]
+        return lo + (table[index + (i + 1,)] - lo) * rest / w
+
+    def combat_chances(self, world: structs.World, scores: np.ndarray) -> np.ndarray:
+        """combat_chance of many gear scores"""
+        return self._gather(self.combat[self._beats[id(world)]], (), scores)
+
+    def non_combat_chances(
+        self,
+        world: structs.World,
+        categories: np.ndarray,
+        levels: np.ndarray,
+        scores: np.ndarray,
+    ) -> np.ndarray:
+        """non_combat_chance of many attempts, by row of Tables.nc_categories"""
+        table = self.non_combat[self._beats[id(world)]]
+        return self._gather(table, (categories, levels), scores)
+
+    def write(self, path: str = chances_file):
+        """Every table entry, one row per beat, category, level and gear score edge"""
+        beats = self.tables.story_beats
+        categories = self.tables.nc_categories
+        with open(path, mode="w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["BeatNum", "Category", "Level", "GearScore", "Chance"])
+            for b, world in enumerate(beats):
+                for e, edge in enumerate(self.edges.tolist()):
+                    writer.writerow([world.BeatNum, "Combat", "", edge, self._combat[b][e]])
+                for c, category in enumerate(categories):
+                    for level in range(1, len(self.tables.cumulative_xp) + 1):
+                        row = self._non_combat[b][c][level]
+                        for e, edge in enumerate(self.edges.tolist()):
+                            writer.writerow(
+                                [world.BeatNum, category.OutcomeCategory, level, edge, row[e]]
+                            )
+
+
+@functools.lru_cache(maxsize=32)
+def _compile(data: tables.Tables, values: tuple) -> ChanceTables:
+    return ChanceTables(data, config.Config(**dict(values)))
+
+
+def compiled(
+    data: tables.Tables | None = None, cfg: config.Config | None = None
+) -> ChanceTables:
+    """ChanceTables of `data` and `cfg`, compiled once per table set and parameter values"""
+    cfg = cfg or config.default()
+    return _compile(data or tables.default(), tuple(sorted(cfg.as_dict().items())))
+
+
+def check(
+    data: tables.Tables | None = None, cfg: config.Config | None = None
+) -> dict[str, float]:
+    """
+    Largest deviation of the compiled tables from the live formulas of utils, over every beat,
+    non-combat category, level and whole gear score up to the table's top score.
+
+    Returns:
+        {"Combat": max abs error, "NonCombat": max abs error}
+    """
+    data = data or tables.default()
+    cfg = cfg or config.default()
+    compiled_tables = compiled(data, cfg)
+    scores = np.arange(compiled_tables.max_score + 1)
+    levels = range(1, len(data.cumulative_xp) + 1)
+
+    combat = non_combat = 0.0
+    for world in data.story_beats:
+        zone_gear = utils.recommended_gear(cfg, world.ZoneLevel)
+        table = compiled_tables.combat_chances(world, scores).tolist()
+        for score, chance in zip(scores.tolist(), table):
+            live = utils.logistic(score / zone_gear - world.BeatDC / 20)
+            combat = max(combat, abs(chance - live))
+
+        for c, category in enumerate(data.nc_categories):
+            stat = data.stat_by_key.get(category.StatKey, data.stats[0])
+            for level in levels:
+                table = compiled_tables.non_combat_chances(
+                    world, np.full_like(scores, c), np.full_like(scores, level), scores
+                ).tolist()
+                for score, chance in zip(scores.tolist(), table):
+                    live = utils.category_chance(
+                        cfg, category, world.BeatDC, utils.stat_value(cfg, stat, level, score)
+                    )
+                    non_combat = max(non_combat, abs(chance - live))
+    return {"Combat": combat, "NonCombat": non_combat}
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Write the compiled success chance tables"
+    )
+    arg_parser.add_argument("--bucket", type=int, default=None)
+    arg_parser.add_argument("--out", default=chances_file)
+    arg_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="print the largest deviation from the live formulas",
+    )
+    args = arg_parser.parse_args()
+
+    cfg = config.default()
+    if args.bucket is not None:
+        cfg = cfg.replace(CHANCE_BUCKET=args.bucket)
+    if args.check:
+        for kind, error in check(cfg=cfg).items():
+            print(f"{kind}: max abs error {error:.2e}")
+    compiled(cfg=cfg).write(args.out)
+    print(f"Saved: {args.out}")
@@ -0,0 +1,183 @@
+import argparse
+import dataclasses
+import math
+import os
+import pickle
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+
+import numpy as np
+
+import config
+import context
+import inputs
+import kpi
+import log
+import records
+import simulate
+import streams
+import tables
+
+checkpoint_file = os.path.join(tables.data_dir, "checkpoint.bin")
+
+MAGIC = b"RPGCKPT"
+VERSION = 2
+
+# Player attributes that change during a run; the rest are shared tables or derived caches
+_PLAYER_FIELDS = ("_exp", "level", "gold", "_loot", "equipment")
+
+
+@dataclasses.dataclass(slots=True)
+class Run:
+    """A run restored from a snapshot, to continue from `turn`"""
+
+    turn: int
+    ctx: context.SimContext
+    kpis: kpi.RunKPIs
+    writer: tuple | None  # log.RunWriter.checkpoint() state, None when no writer was saved
+
+
+def snapshot(
+    turn: int,
+    ctx: context.SimContext,
+    kpis: kpi.RunKPIs | None = None,
+    writer: log.RunWriter | None = None,
+) -> bytes:
+    """
+    Full state of a run after `turn` turns: config, RNG streams with their buffered draws,
+    player, story beat, KPI accumulators and the writer's sink offsets (the writer is
+    flushed). The shared tables are not stored, a snapshot is restored against the tables
+    the run started with.
+    """
+    beat = next(i for i, world in enumerate(ctx.tables.story_beats) if world is ctx.world)
+    state = {
+        "turn": turn,
+        "cfg": ctx.cfg,
+        "rng": ctx.rng,
+        "player": {name: getattr(ctx.player, name) for name in _PLAYER_FIELDS},
+        "beat": beat,
+        "kpis": kpis,
+        "writer": writer.checkpoint() if writer is not None else None,
+    }
+    return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def restore(data: bytes, tables_data: tables.Tables | None = None) -> Run:
+    """Independent copy of the run a snapshot was taken from"""
+    state = pickle.loads(data)
+    ctx = context.SimContext(data=tables_data, cfg=state["cfg"])
+    ctx.rng = state["rng"]
+    for name, value in state["player"].items():
+        setattr(ctx.player, name, value)
+    ctx.world = ctx.tables.story_beats[state["beat"]]
+    return Run(state["turn"], ctx, state["kpis"] or kpi.RunKPIs(), state["writer"])
+
+
+def save(data: bytes, path: str = checkpoint_file):
+    """Write a compressed checkpoint, replacing `path` only once it is complete"""
+    tmp = f"{path}.tmp"
+    with open(tmp, mode="wb") as file:
+        file.write(MAGIC + bytes([VERSION]) + zlib.compress(data))
+    os.replace(tmp, path)
+
+
+def load(path: str = checkpoint_file) -> bytes:
+    with open(path, mode="rb") as file:
+        blob = file.read()
+    if blob[: len(MAGIC)] != MAGIC or blob[len(MAGIC)] != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} checkpoint")
+    return zlib.decompress(blob[len(MAGIC) + 1 :])
+
+
+def fork(
+    data: bytes,
+    branches: range | int,
+    seed: int = inputs.SEED,
+    cfg: config.Config | None = None,
+) -> Iterator[Run]:
+    """
+    What-if continuations of a snapshot, without re-simulating the shared prefix. Branch `i`
+    gets its own RNG streams from child `i` of (`seed`, snapshot turn), and `cfg`, when given,
+    replaces the snapshot's parameters. Branches have no writer.
+    """
+    if isinstance(branches, int):
+        branches = range(branches)
+    root = None
+    for i in branches:
+        run = restore(data)
+        if root is None:
+            root = np.random.SeedSequence((seed, run.turn))
+        run.ctx.rng = streams.Streams(streams.child(root, i))
+        if cfg is not None:
+            run.ctx.cfg = cfg
+        run.writer = None
+        yield run
+
+
+def _run_branches(
+    job: tuple[bytes, range, int, int, config.Config | None]
+) -> list[tuple[dict[str, float], dict[int, int]]]:
+    data, branches, turns, seed, cfg = job
+    results = []
+    for run in fork(data, branches, seed, cfg):
+        scratch = records.TurnRecords(records.RING_ROWS, ring=True)
+        for turn in range(run.turn, turns):
+            run.kpis.update(turn, run.ctx, scratch, simulate.step(run.ctx, turn, scratch))
+        results.append((run.kpis.values(run.ctx), run.kpis.level_steps))
+    return results
+
+
+def fork_summary(
+    data: bytes,
+    branches: int,
+    turns: int,
+    workers: int | None = None,
+    seed: int = inputs.SEED,
+    cfg: config.Config | None = None,
+) -> kpi.Summary:
+    """Run `branches` continuations of a snapshot up to `turns` and summarize their KPIs"""
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, math.ceil(branches / (workers * 4)))
+    jobs = [
+        (data, range(i, min(i + chunk, branches)), turns, seed, cfg)
+        for i in range(0, branches, chunk)
+    ]
+
+    summary = kpi.Summary()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for result in (pool.map if pool else map)(_run_branches, jobs):
+            for values, level_steps in result:
+                summary.add(values, level_steps)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return summary
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Fork what-if continuations of a checkpoint and summarize their KPIs"
+    )
+    arg_parser.add_argument("checkpoint", nargs="?", default=checkpoint_file)
+    arg_parser.add_argument("--branches", type=int, default=1000)
+    arg_parser.add_argument("--turns", type=int, default=inputs.TURNS)
+    arg_parser.add_argument("--workers", type=int, default=None)
+    arg_parser.add_argument("--seed", type=int, default=inputs.SEED)
+    arg_parser.add_argument(
+        "--set", action="append", default=[], help="NAME=VALUE override (repeatable)"
+    )
+    arg_parser.add_argument("--out", default=kpi.summary_file)
+    args = arg_parser.parse_args()
+
+    data = load(args.checkpoint)
+    cfg = None
+    if args.set:
+        overrides = dict(spec.split("=", 1) for spec in args.set)
+        cfg = restore(data).ctx.cfg.replace(**overrides)
+
+    fork_summary(data, args.branches, args.turns, args.workers, args.seed, cfg).write(
+        args.out
+    )
+    print(f"Saved: {args.out} ({args.branches} branches to turn {args.turns})")
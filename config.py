@@ -0,0 +1,91 @@
+import math
+
+import inputs
+import params
+
+# parameters that no turn rule reads (design sheet values), overriding them changes nothing
+UNREAD = frozenset(
+    {
+        "XP_EXPONENT",
+        "USE_LIVE_ROLLS",
+        "DEATH_CHANCE",
+        "REPAIR_COST_PCT",
+        "REPAIR_COST_PER_ZONE",
+        "RESPEC_CHANCE_COMBAT",
+        "RESPEC_BASE_COST",
+        "RESPEC_LEVEL_MULT",
+        "VENDOR_TAX_PCT",
+        "ZONE_TIER",
+        "TIME_PER_STEP_MIN",
+        "STEP_COUNT",
+        "FAIL_STEP",
+        "SUCCESS_STEP",
+        "NC_SLOPE",
+        "COMBAT_SLOPE",
+        "COMBAT_SHIFT",
+    }
+)
+
+
+def _constants(module) -> dict:
+    return {k: v for k, v in vars(module).items() if k.isupper()}
+
+
+def _number(name: str, value, default: int | float) -> int | float:
+    """
+    Override `value` of parameter `name` as a number: an int when it is integral and the
+    default is an int, else a float, so an int parameter never truncates 1.7 to 1
+    """
+    if isinstance(value, str):
+        try:
+            value = int(value)
+        except ValueError:
+            pass
+    if isinstance(value, int):
+        return value if isinstance(default, int) else float(value)
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"parameter {name} must be a number, got {value!r}") from None
+    if not math.isfinite(value):
+        raise ValueError(f"parameter {name} must be a finite number, got {value!r}")
+    return int(value) if isinstance(default, int) and value.is_integer() else value
+
+
+class Config:
+    """
+    Every tunable of a run: the inputs.py and params.py constants with optional per-run
+    overrides, read as attributes (cfg.COMBAT_CHANCE) instead of module globals.
+    """
+
+    def __init__(self, **overrides):
+        values = {**_constants(inputs), **_constants(params)}
+        for key, value in overrides.items():
+            name = key.split(".")[-1]  # accept "params.COMBAT_SLOPE" as well
+            if name not in values:
+                raise KeyError(f"unknown parameter {key}")
+            values[name] = _number(name, value, values[name])
+        self.__dict__.update(values)
+
+    def as_dict(self) -> dict:
+        return dict(self.__dict__)
+
+    def replace(self, **overrides) -> "Config":
+        return Config(**{**self.as_dict(), **overrides})
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Config) and self.__dict__ == other.__dict__
+
+    def __repr__(self) -> str:
+        return f"Config({', '.join(f'{k}={v!r}' for k, v in self.__dict__.items())})"
+
+
+_default: Config | None = None
+
+
+def default() -> Config:
+    """Config of the inputs.py/params.py values as they were on first use"""
+    global _default
+    if _default is None:
+        _default = Config()
+    return _default
@@ -0,0 +1,67 @@
+import config
+import numpy as np
+import story
+import streams
+import structs
+import tables
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import chances
+
+
+class SimContext:
+    """
+    State owned by a single campaign: its parameters, RNG streams, player and active story
+    beat. Without a seed the run is seeded from the SEED and RUN_ID inputs.
+    """
+
+    def __init__(
+        self,
+        seed: int | np.random.SeedSequence | None = None,
+        data: tables.Tables | None = None,
+        cfg: config.Config | None = None,
+    ):
+        self.tables = data or tables.default()
+        self.cfg = cfg or config.default()
+        self.rng = streams.Streams(
+            (self.cfg.SEED, self.cfg.RUN_ID) if seed is None else seed
+        )
+        self.player = structs.Player(self.tables, self.cfg.LOOT_HISTORY)
+        self.world = story.create_world(self.tables)
+
+        # derived values, recomputed only once the beat or the gear score changes
+        self._zone_world: structs.World | None = None
+        self._zone_gear = 0.0
+        self._ratio_world: structs.World | None = None
+        self._ratio_score = 0
+        self._ratio = 0.0
+        self._chances_cfg: config.Config | None = None
+        self._chances = None
+
+    def zone_gear(self) -> float:
+        """Recommended gear score of the active beat"""
+        if self._zone_world is not self.world:
+            import utils
+
+            self._zone_world = self.world
+            self._zone_gear = utils.recommended_gear(self.cfg, self.world.ZoneLevel)
+        return self._zone_gear
+
+    def power_ratio(self) -> float:
+        """Gear score over the recommended gear score of the active beat"""
+        score = self.player.equipment.get_score()
+        if self._ratio_world is not self.world or self._ratio_score != score:
+            self._ratio_world = self.world
+            self._ratio_score = score
+            self._ratio = score / self.zone_gear()
+        return self._ratio
+
+    def chances(self) -> "chances.ChanceTables":
+        """Compiled chance tables of the run's tables and parameters"""
+        if self._chances_cfg is not self.cfg:
+            import chances
+
+            self._chances_cfg = self.cfg
+            self._chances = chances.compiled(self.tables, self.cfg)
+        return self._chances
@@ -1,76 +1,141 @@
-import matplotlib.pyplot as plt
+import argparse
 import csv
+import operator
+import numpy as np
+import tables
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+# most points drawn per series, longer traces are downsampled
+MAX_POINTS = 1000
+DPI = 300
+
+
+def _pyplot():
+    """matplotlib with the headless Agg backend, imported on first plot"""
+    import matplotlib
+
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def lttb(x, y, threshold=MAX_POINTS):
+    """Indices kept by Largest-Triangle-Three-Buckets downsampling of (x, y)"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        next_hi = min(int((i + 2) * every) + 1, n)
+        avg_x = x[hi:next_hi].mean() if next_hi > hi else x[-1]
+        avg_y = y[hi:next_hi].mean() if next_hi > hi else y[-1]
+
+        # point of the bucket spanning the largest triangle with the last kept point
+        area = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+
+    return keep
+
+
+def minmax(y, buckets=MAX_POINTS // 2):
+    """Indices of the min and max of each bucket, keeps every spike of a noisy series"""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= 2 * buckets:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    keep = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        keep.append(lo + int(y[lo:hi].argmin()))
+        keep.append(lo + int(y[lo:hi].argmax()))
+    return np.unique(keep)
+
+
+def load_trace_data(trace_dir):
+    """Load simulation output data from a columnar trace without any text parsing"""
+    import tracelog
+
+    names = ('Step', 'PlayerLevel', 'ZoneLevel', 'GearScore', 'CumulativeGold', 'CumulativeXP',
+             'PowerRatio', 'XP_Earned', 'SuccessChanceCombat', 'SuccessChance_NonCombat')
+    # copied out of the maps, so the trace can be closed before plotting
+    with tracelog.Trace(trace_dir) as trace:
+        columns = {name: np.array(trace.column(name)) for name in names}
+    combat_chances = columns['SuccessChanceCombat']
+    nc_chances = columns['SuccessChance_NonCombat']
+
+    return {
+        'steps': columns['Step'],
+        'player_levels': columns['PlayerLevel'],
+        'zone_levels': columns['ZoneLevel'],
+        'gear_scores': columns['GearScore'],
+        'cumulative_gold': columns['CumulativeGold'],
+        'cumulative_xp': columns['CumulativeXP'],
+        'power_ratios': columns['PowerRatio'],
+        'success_chances': np.where(combat_chances != 0, combat_chances, nc_chances),
+        'xp_earned': columns['XP_Earned'],
+        'combat_chances': combat_chances
+    }
+
 
 def load_simulation_data():
-    """Load simulation output data from output.csv"""
-    output_file = Path("data") / "output.csv"
-    
-    steps = []
-    player_levels = []
-    zone_levels = []
-    gear_scores = []
-    cumulative_gold = []
-    cumulative_xp = []
-    power_ratios = []
-    success_chances = []
-    xp_earned = []
-    combat_chances = []
+    """Load simulation output data from output.trace, falling back to output.csv"""
+    output_file = Path(tables.data_dir) / "output.csv"
+    trace_dir = Path(tables.data_dir) / "output.trace"
+
+    # prefer the trace when it is the most recent output
+    trace_meta = trace_dir / "meta.json"
+    if trace_meta.exists() and (
+        not output_file.exists() or trace_meta.stat().st_mtime >= output_file.stat().st_mtime
+    ):
+        return load_trace_data(trace_dir)
     
+    names = ('Step', 'PlayerLevel', 'ZoneLevel', 'GearScore', 'CumulativeGold', 'CumulativeXP',
+             'PowerRatio', 'XP_Earned', 'SuccessChanceCombat', 'SuccessChance_NonCombat')
     with open(output_file, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                # Parse all values first before appending
-                step = int(row['Step'])
-                player_level = int(row['PlayerLevel'])
-                zone_level = int(row['ZoneLevel'])
-                gear_score = int(row['GearScore'])
-                cumulative_gold_val = int(row['CumulativeGold'])
-                cumulative_xp_val = int(row['CumulativeXP'])
-                power_ratio = float(row['PowerRatio'])
-                xp_earned_val = int(row['XP_Earned'])
-                
-                # Track combat chances specifically for filtering
-                combat_chance = float(row.get('SuccessChanceCombat', 0))
-                
-                # Get success chance (prioritize combat, fallback to non-combat)
-                success = float(row.get('SuccessChanceCombat', 0))
-                if success == 0:
-                    success = float(row.get('SuccessChance_NonCombat', 0))
-                
-                # Only append if all parsing succeeded
-                steps.append(step)
-                player_levels.append(player_level)
-                zone_levels.append(zone_level)
-                gear_scores.append(gear_score)
-                cumulative_gold.append(cumulative_gold_val)
-                cumulative_xp.append(cumulative_xp_val)
-                power_ratios.append(power_ratio)
-                xp_earned.append(xp_earned_val)
-                combat_chances.append(combat_chance)
-                success_chances.append(success)
-            except (ValueError, KeyError) as e:
-                continue
+        reader = csv.reader(f)
+        header = next(reader)
+        pick = operator.itemgetter(*(header.index(name) for name in names))
+        # skip truncated rows, e.g. of a run that is still writing
+        rows = [pick(row) for row in reader if len(row) == len(header)]
+    values = np.array(rows, dtype=float).reshape(-1, len(names))
+    columns = dict(zip(names, values.T))
+
+    combat_chances = columns['SuccessChanceCombat']
+    nc_chances = columns['SuccessChance_NonCombat']
     
     return {
-        'steps': steps,
-        'player_levels': player_levels,
-        'zone_levels': zone_levels,
-        'gear_scores': gear_scores,
-        'cumulative_gold': cumulative_gold,
-        'cumulative_xp': cumulative_xp,
-        'power_ratios': power_ratios,
-        'success_chances': success_chances,
-        'xp_earned': xp_earned,
+        'steps': columns['Step'].astype(np.int64),
+        'player_levels': columns['PlayerLevel'].astype(np.int64),
+        'zone_levels': columns['ZoneLevel'].astype(np.int64),
+        'gear_scores': columns['GearScore'].astype(np.int64),
+        'cumulative_gold': columns['CumulativeGold'].astype(np.int64),
+        'cumulative_xp': columns['CumulativeXP'].astype(np.int64),
+        'power_ratios': columns['PowerRatio'],
+        # prioritize combat, fallback to non-combat
+        'success_chances': np.where(combat_chances != 0, combat_chances, nc_chances),
+        'xp_earned': columns['XP_Earned'].astype(np.int64),
         'combat_chances': combat_chances
     }
 
 
 def load_curve_data():
     """Load success chance curves from Curve.csv"""
-    curve_file = Path("data") / "Curve.csv"
+    curve_file = Path(tables.data_dir) / "Curve.csv"
     
     deltas = []
     nc_chances = []
@@ -95,7 +160,7 @@ def load_curve_data():
 
 def load_progression_data():
     """Load XP progression from Progression.csv"""
-    progression_file = Path("data") / "Progression.csv"
+    progression_file = Path(tables.data_dir) / "Progression.csv"
     
     levels = []
     xp_to_next = []
@@ -122,30 +187,36 @@ def load_progression_data():
     return levels, xp_to_next, cumulative_xp, gold_combat, gold_noncombat
 
 
-def plot_simulation_results():
-    """Plot simulation results from output.csv"""
+def plot_simulation_results(path='simulation_results.png', dpi=DPI):
+    """Plot simulation results from output.trace or output.csv"""
     data = load_simulation_data()
     
     if data is None:
-        return
+        return None
+    plt = _pyplot()
     
     # Load curve data for Plot 3
     deltas, nc_chances, combat_chances_curve = load_curve_data()
     
     # Filter out non-combat steps (keep only where combat_chances > 0)
-    filtered_data = {key: [] for key in data.keys()}
-    for i in range(len(data['steps'])):
-        if data['combat_chances'][i] > 0:  # Keep only combat steps
-            for key in data.keys():
-                filtered_data[key].append(data[key][i])
-    data = filtered_data
+    combat = np.asarray(data['combat_chances']) > 0
+    data = {key: np.asarray(values)[combat] for key, values in data.items()}
+
+    # Downsample long traces: LTTB for the trends, min/max to keep the chance spikes
+    trend = lttb(data['steps'], data['power_ratios'])
+    steps = data['steps'][trend]
+    player_levels = data['player_levels'][trend]
+    zone_levels = data['zone_levels'][trend]
+    gear_scores = data['gear_scores'][trend]
+    power_ratios = data['power_ratios'][trend]
+    spikes = minmax(data['combat_chances'])
     
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
     
     # Plot 1: Player Level vs Steps
-    ax1.plot(data['steps'], data['player_levels'], 'o-', color='darkblue', 
+    ax1.plot(steps, player_levels, 'o-', color='darkblue', 
              linewidth=2, markersize=4, label='Player Level')
-    ax1.fill_between(data['steps'], 0, data['player_levels'], alpha=0.3, color='skyblue')
+    ax1.fill_between(steps, 0, player_levels, alpha=0.3, color='skyblue')
     ax1.set_xlabel('Step', fontsize=11, fontweight='bold')
     ax1.set_ylabel('Player Level', fontsize=11, fontweight='bold')
     ax1.set_title('Player Level Progression Over Time', fontsize=13, fontweight='bold')
@@ -153,23 +224,21 @@ def plot_simulation_results():
     ax1.legend(loc='best', fontsize=9)
     
     # Add level milestones
-    unique_levels = sorted(set(data['player_levels']))
+    unique_levels = np.unique(player_levels)
     if len(unique_levels) > 1:
         for level in unique_levels[1::2]:  # Every other level
-            level_step = next((s for s, l in zip(data['steps'], data['player_levels']) if l == level), None)
-            if level_step:
-                ax1.axhline(y=level, color='gray', linestyle=':', alpha=0.3, linewidth=0.8)
+            ax1.axhline(y=level, color='gray', linestyle=':', alpha=0.3, linewidth=0.8)
     
     # Plot 2: Player Ability (Gear Score) vs Challenge Difficulty (Zone Level)
-    ax2.plot(data['steps'], data['gear_scores'], 's-', color='green', 
+    ax2.plot(steps, gear_scores, 's-', color='green', 
              linewidth=2, markersize=3, label='Player Gear Score', alpha=0.8)
-    ax2.plot(data['steps'], data['zone_levels'], '^-', color='red', 
+    ax2.plot(steps, zone_levels, '^-', color='red', 
              linewidth=2, markersize=3, label='Zone Difficulty', alpha=0.8)
-    ax2.fill_between(data['steps'], data['gear_scores'], data['zone_levels'], 
-                     where=[gs >= zl for gs, zl in zip(data['gear_scores'], data['zone_levels'])],
+    ax2.fill_between(steps, gear_scores, zone_levels, 
+                     where=gear_scores >= zone_levels,
                      alpha=0.2, color='green', label='Player Ahead')
-    ax2.fill_between(data['steps'], data['gear_scores'], data['zone_levels'],
-                     where=[gs < zl for gs, zl in zip(data['gear_scores'], data['zone_levels'])],
+    ax2.fill_between(steps, gear_scores, zone_levels,
+                     where=gear_scores < zone_levels,
                      alpha=0.2, color='red', label='Behind Zone')
     ax2.set_xlabel('Step', fontsize=11, fontweight='bold')
     ax2.set_ylabel('Power Level', fontsize=11, fontweight='bold')
@@ -178,38 +247,22 @@ def plot_simulation_results():
     ax2.legend(loc='best', fontsize=9)
     
     # Plot 3: Success Chance vs Power Delta
-    ax3.plot(deltas, combat_chances_curve, 'r-', linewidth=2, label='Combat Success', marker='o', markersize=3)
-    ax3.plot(deltas, nc_chances, 'b-', linewidth=2, label='Non-Combat Success', marker='s', markersize=3)
-    ax3.axhline(y=0.5, color='gray', linestyle='--', linewidth=1, alpha=0.5, label='50% Success')
-    ax3.axvline(x=0, color='gray', linestyle='--', linewidth=1, alpha=0.5, label='Even Power')
-    ax3.axhline(y=0.05, color='orange', linestyle=':', linewidth=1, alpha=0.5, label='Floor (5%)')
-    ax3.axhline(y=0.95, color='green', linestyle=':', linewidth=1, alpha=0.5, label='Cap (95%)')
-    
-    ax3.set_xlabel('Power Delta (Player - Zone)', fontsize=11, fontweight='bold')
-    ax3.set_ylabel('Success Chance', fontsize=11, fontweight='bold')
-    ax3.set_title('Success Chance vs Power Delta', fontsize=13, fontweight='bold')
-    ax3.grid(True, alpha=0.3, linestyle='--')
-    ax3.legend(loc='best', fontsize=9)
-    ax3.set_ylim(-0.05, 1.05)
-    
-    # Add annotations
-    ax3.annotate('Player Weaker', xy=(-5, 0.1), fontsize=9, ha='center', style='italic', color='red')
-    ax3.annotate('Player Stronger', xy=(5, 0.9), fontsize=9, ha='center', style='italic', color='green')
+    _plot_success_curves(ax3, deltas, nc_chances, combat_chances_curve)
     
     # Plot 4: Power Ratio and Combat Success Chance
     ax4_twin = ax4.twinx()
     
-    line1 = ax4.plot(data['steps'], data['power_ratios'], 'o-', color='purple', 
+    line1 = ax4.plot(steps, power_ratios, 'o-', color='purple', 
                      linewidth=2, markersize=3, label='Power Ratio', alpha=0.7)
     ax4.axhline(y=0, color='black', linestyle='-', linewidth=1.5, alpha=0.5)
-    ax4.fill_between(data['steps'], 0, data['power_ratios'],
-                     where=[pr > 0 for pr in data['power_ratios']],
+    ax4.fill_between(steps, 0, power_ratios,
+                     where=power_ratios > 0,
                      alpha=0.2, color='green', label='Advantage')
-    ax4.fill_between(data['steps'], 0, data['power_ratios'],
-                     where=[pr < 0 for pr in data['power_ratios']],
+    ax4.fill_between(steps, 0, power_ratios,
+                     where=power_ratios < 0,
                      alpha=0.2, color='red', label='Disadvantage')
     
-    line2 = ax4_twin.plot(data['steps'], [s * 100 for s in data['combat_chances']], 
+    line2 = ax4_twin.plot(data['steps'][spikes], data['combat_chances'][spikes] * 100, 
                           'd-', color='orange', linewidth=2, markersize=3, 
                           label='Combat Success Chance', alpha=0.7)
     
@@ -226,23 +279,163 @@ def plot_simulation_results():
     labels = [l.get_label() for l in lines]
     ax4.legend(lines, labels, loc='upper left', fontsize=9)
     
-    plt.tight_layout()
-    plt.savefig('simulation_results.png', dpi=300, bbox_inches='tight')
-    print("Saved: simulation_results.png")
-    print("Plotting simulation results...")
-    plt.show()
+    return _save(plt, fig, path, dpi)
 
 
-def plot_all():
-    """Generate all progression curve visualizations"""
+def _plot_success_curves(ax, deltas, nc_chances, combat_chances):
+    ax.plot(deltas, combat_chances, 'r-', linewidth=2, label='Combat Success', marker='o', markersize=3)
+    ax.plot(deltas, nc_chances, 'b-', linewidth=2, label='Non-Combat Success', marker='s', markersize=3)
+    ax.axhline(y=0.5, color='gray', linestyle='--', linewidth=1, alpha=0.5, label='50% Success')
+    ax.axvline(x=0, color='gray', linestyle='--', linewidth=1, alpha=0.5, label='Even Power')
+    ax.axhline(y=0.05, color='orange', linestyle=':', linewidth=1, alpha=0.5, label='Floor (5%)')
+    ax.axhline(y=0.95, color='green', linestyle=':', linewidth=1, alpha=0.5, label='Cap (95%)')
+    
+    ax.set_xlabel('Power Delta (Player - Zone)', fontsize=11, fontweight='bold')
+    ax.set_ylabel('Success Chance', fontsize=11, fontweight='bold')
+    ax.set_title('Success Chance vs Power Delta', fontsize=13, fontweight='bold')
+    ax.grid(True, alpha=0.3, linestyle='--')
+    ax.legend(loc='best', fontsize=9)
+    ax.set_ylim(-0.05, 1.05)
+    
+    # Add annotations
+    ax.annotate('Player Weaker', xy=(-5, 0.1), fontsize=9, ha='center', style='italic', color='red')
+    ax.annotate('Player Stronger', xy=(5, 0.9), fontsize=9, ha='center', style='italic', color='green')
+
+
+def _save(plt, fig, path, dpi):
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi)  # tight_layout already fits it, a tight bbox would draw twice
+    plt.close(fig)
+    return path
+
+
+def plot_success_curves(path='success_curves.png', dpi=DPI):
+    """Plot the Curve.csv success chances vs power delta"""
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    _plot_success_curves(ax, *load_curve_data())
+    return _save(plt, fig, path, dpi)
+
+
+def plot_xp_progression(path='xp_progression.png', dpi=DPI):
+    """Plot XP requirements, cumulative XP, growth and gold rewards from Progression.csv"""
+    levels, xp_to_next, cumulative_xp, gold_combat, gold_noncombat = load_progression_data()
+    plt = _pyplot()
+
+    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
+
+    ax1.bar(levels, xp_to_next, color='steelblue', alpha=0.8)
+    ax1.set_title('XP to Next Level', fontsize=13, fontweight='bold')
+    ax1.set_xlabel('Level', fontsize=11, fontweight='bold')
+    ax1.set_ylabel('XP', fontsize=11, fontweight='bold')
+
+    ax2.plot(range(1, len(cumulative_xp) + 1), cumulative_xp, 'o-', color='darkblue', linewidth=2, markersize=4)
+    ax2.set_title('Cumulative XP', fontsize=13, fontweight='bold')
+    ax2.set_xlabel('Level', fontsize=11, fontweight='bold')
+    ax2.set_ylabel('Total XP', fontsize=11, fontweight='bold')
+
+    growth = [100 * (b / a - 1) for a, b in zip(xp_to_next, xp_to_next[1:])]
+    ax3.plot(levels[1:], growth, 's-', color='purple', linewidth=2, markersize=4)
+    ax3.set_title('XP Growth Rate', fontsize=13, fontweight='bold')
+    ax3.set_xlabel('Level', fontsize=11, fontweight='bold')
+    ax3.set_ylabel('Growth (%)', fontsize=11, fontweight='bold')
+
+    ax4.plot(levels, gold_combat, 'o-', color='red', linewidth=2, markersize=4, label='Combat')
+    ax4.plot(levels, gold_noncombat, 's-', color='blue', linewidth=2, markersize=4, label='Non-Combat')
+    ax4.set_title('Gold Rewards by Level', fontsize=13, fontweight='bold')
+    ax4.set_xlabel('Level', fontsize=11, fontweight='bold')
+    ax4.set_ylabel('Gold', fontsize=11, fontweight='bold')
+    ax4.legend(loc='best', fontsize=9)
+
+    for ax in (ax1, ax2, ax3, ax4):
+        ax.grid(True, alpha=0.3, linestyle='--')
+
+    return _save(plt, fig, path, dpi)
+
+
+def load_bands(bands_file):
+    """Load batch.csv percentile bands as {metric: {percentile: array}} plus the steps"""
+    with open(bands_file, 'r') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        values = np.array(list(reader), dtype=float)
+
+    bands = {}
+    for i, name in enumerate(header[1:], start=1):
+        metric, p = name.rsplit('_P', 1)
+        bands.setdefault(metric, {})[int(p)] = values[:, i]
+    return values[:, 0], bands
+
+
+def plot_fan_chart(path='batch_fan.png', dpi=DPI, bands_file=None):
+    """Percentile fan chart per metric from a batch.py bands file"""
+    bands_file = bands_file or Path(tables.data_dir) / "batch.csv"
+    if not Path(bands_file).exists():
+        return None
+    steps, bands = load_bands(bands_file)
+    plt = _pyplot()
+
+    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+    for ax, (metric, percentiles) in zip(axes.flat, bands.items()):
+        ps = sorted(percentiles)
+        keep = lttb(steps, percentiles[ps[len(ps) // 2]])
+        # outermost pair shaded lightest, the median drawn on top
+        for k in range(len(ps) // 2):
+            lo, hi = percentiles[ps[k]][keep], percentiles[ps[-1 - k]][keep]
+            ax.fill_between(steps[keep], lo, hi, alpha=0.15 + 0.2 * k, color='steelblue',
+                            linewidth=0, label=f'P{ps[k]}-P{ps[-1 - k]}')
+        if len(ps) % 2:
+            median = ps[len(ps) // 2]
+            ax.plot(steps[keep], percentiles[median][keep], color='darkblue', linewidth=2, label=f'P{median}')
+        ax.set_title(metric.replace('_', ' ').title(), fontsize=13, fontweight='bold')
+        ax.set_xlabel('Step', fontsize=11, fontweight='bold')
+        ax.grid(True, alpha=0.3, linestyle='--')
+        ax.legend(loc='best', fontsize=9)
+
+    return _save(plt, fig, path, dpi)
+
+
+FIGURES = {
+    'simulation_results': plot_simulation_results,
+    'success_curves': plot_success_curves,
+    'xp_progression': plot_xp_progression,
+    'batch_fan': plot_fan_chart,
+}
+
+
+def _render(name):
+    return FIGURES[name]()
+
+
+def plot_all(names=None, parallel=True):
+    """Generate all progression curve visualizations, one worker process per figure"""
     print("\n" + "="*50)
     print("  RPG PROGRESSION SYSTEM - CURVE VISUALIZATION")
     print("="*50 + "\n")
-    
-    # Plot simulation results from output.csv
-    print("Generating simulation result graphs...")
-    plot_simulation_results()
+
+    names = list(names or FIGURES)
+    if parallel and len(names) > 1:
+        with ProcessPoolExecutor(max_workers=len(names)) as pool:
+            paths = list(pool.map(_render, names))
+    else:
+        paths = [_render(name) for name in names]
+
+    for path in paths:
+        if path is not None:
+            print(f"Saved: {path}")
     
     print("\n" + "="*50)
     print("  All visualizations complete!")
     print("="*50 + "\n")
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Render the progression figures')
+    arg_parser.add_argument('figures', nargs='*', help=f"any of {', '.join(FIGURES)}")
+    arg_parser.add_argument('--serial', action='store_true', help='render in this process')
+    args = arg_parser.parse_args()
+    for name in args.figures:
+        if name not in FIGURES:
+            arg_parser.error(f'unknown figure {name}')
+
+    plot_all(args.figures, parallel=not args.serial)
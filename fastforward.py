@@ -0,0 +1,321 @@
+import argparse
+import bisect
+import math
+
+import numpy as np
+
+import analytic
+import config
+import context
+import inputs
+import kpi
+import loot
+import story
+import streams
+import structs
+import tables
+import utils
+import vector
+
+# XP of up to this many turns is drawn turn by turn, above it as one normal sum
+EXACT_XP = 256
+# turns drawn one by one at a time while looking for the turn of a level-up
+LEVEL_CHUNK = 4096
+# standard deviations of its XP by which a span is kept short of the next level
+LEVEL_MARGIN = 6
+
+# quiet turn outcomes: combat win, combat loss or death, non-combat success, non-combat fail
+WIN, LOSS, SUCCESS, FAIL = range(4)
+
+
+class FastForward:
+    """
+    Advances a campaign from event to event instead of turn by turn. Between a level-up, a
+    gear upgrade and a beat change every turn has the same odds, so the wait for the next
+    upgrade is one geometric draw, the next beat is read off the schedule and the turns in
+    between are drawn in aggregate: multinomial outcome counts and sums of their XP. Only the
+    turns that may reach the next level are drawn one by one, to find the turn it is reached
+    at. No per-turn trace is kept, and the loot history only keeps the upgrades.
+    """
+
+    def __init__(self, data: tables.Tables | None = None, cfg: config.Config | None = None):
+        self.tables = data or tables.default()
+        self.cfg = cfg or config.default()
+        # per tier death chance, XP moments and non-combat category odds
+        self._model = analytic.AnalyticModel(self.tables, self.cfg)
+
+        # last turn played in each beat but the final one, see story.progress_story
+        schedule = self.tables.beat_schedule
+        self._beat_ends = [
+            turn
+            for turn, beat in enumerate(schedule)
+            if beat != (schedule[turn - 1] if turn else 0)
+        ]
+        self._compile_loot()
+
+    def _compile_loot(self):
+        """Per tier, every item with its chance to be one rolled drop, slot and power"""
+        index = self.tables.loot_index
+
+        self._loot: dict[int, tuple] = {}
+        for tier, sampler in index.samplers.items():
+            weights = [
+                loot.PieceWeights[piece] * loot.QualityWeights[f"T{tier}"][quality]
+                for _, piece, quality in sampler.keys
+            ]
+            total = sum(weights)
+
+            items, probs, slots, powers = [], [], [], []
+            for key, weight in zip(sampler.keys, weights):
+                group = index.groups[key]
+                for item in group:
+                    items.append(item)
+                    probs.append(weight / total / len(group))
+                    slots.append(
+                        vector.GEAR_SLOTS.index(structs._SLOT_ATTRS.get(item.Slot, "accessory"))
+                    )
+                    powers.append(item.BaseItemPower)
+            self._loot[tier] = (items, np.asarray(probs), np.asarray(slots), np.asarray(powers))
+
+    def _xp(self, rng: np.random.Generator, zone_tier: int, base_xp: float, n: int) -> np.ndarray:
+        """XP of `n` awards, see utils.skill_difficulty"""
+        noise = zone_tier * rng.standard_normal(n)
+        return np.floor((self.cfg.SKILL_DIFF_TIER_MULT + noise) * base_xp).astype(np.int64)
+
+    def _xp_sum(
+        self,
+        rng: np.random.Generator,
+        zone_tier: int,
+        base_xp: float,
+        moments: tuple[float, float],
+        n: int,
+    ) -> int:
+        if n <= EXACT_XP:
+            return int(self._xp(rng, zone_tier, base_xp, n).sum())
+        mean, second = moments
+        return round(rng.normal(n * mean, math.sqrt(n * max(second - mean**2, 0.0))))
+
+    def run(
+        self,
+        ctx: context.SimContext,
+        turns: int,
+        start: int = 0,
+        kpis: kpi.RunKPIs | None = None,
+    ) -> kpi.RunKPIs:
+        """Advance `ctx` from turn `start` to `turns`, returns its KPIs (`kpis` when given)"""
+        kpis = kpis or kpi.RunKPIs()
+        turn = start
+        while turn < turns:
+            turn = self._advance(ctx, kpis, turn, turns)
+        return kpis
+
+    def _advance(self, ctx: context.SimContext, kpis: kpi.RunKPIs, turn: int, turns: int) -> int:
+        """Play the turns up to the next event, returns the turn after them"""
+        cfg = self.cfg
+        player = ctx.player
+        world = ctx.world
+        tier = world.ZoneTier
+        death, combat_xp, non_combat_xp, odds = self._model._tier(tier)
+
+        # per-turn odds, constant until the level, the gear or the beat changes
+        p_combat = utils.clamp(cfg.COMBAT_CHANCE, floor=0, ceil=1)
+        p_win = p_combat * utils.skill_chance(ctx) * (1 - death)
+        p_success = (1 - p_combat) * sum(
+            p * utils.non_combat_chance(ctx, category.OutcomeCategory)
+            for category, p in odds
+        )
+
+        # half of the combat wins drop an item, an upgrade when it beats the one in its slot
+        items, probs, slots, powers = self._loot[tier]
+        gear = np.asarray([getattr(player.equipment, slot) for slot in vector.GEAR_SLOTS])
+        better = np.flatnonzero(powers > gear[slots])
+        p_upgrade = p_win * 0.5 * float(probs[better].sum())
+
+        # the span ends at the beat's last turn or the next upgrade, whichever comes first
+        end = turns
+        i = bisect.bisect_left(self._beat_ends, turn)
+        if i < len(self._beat_ends):
+            end = min(end, self._beat_ends[i] + 1)
+        upgrade = False
+        if p_upgrade > 0:
+            wait = int(ctx.rng.loot.generator.geometric(p_upgrade))
+            if turn + wait <= end:
+                end, upgrade = turn + wait, True
+        quiet = end - turn - upgrade
+
+        # outcome odds of the turns before the upgrade, given that none of them is one
+        outcome = np.maximum(
+            [p_win - p_upgrade, p_combat - p_win, p_success, 1 - p_combat - p_success], 0.0
+        )
+        outcome /= outcome.sum()
+
+        # levels only change non-combat odds, so XP is drawn alike before and after one
+        safe = math.inf
+        cumulative = ctx.tables.cumulative_xp
+        if player.level < len(cumulative):
+            remaining = cumulative[player.level] - cumulative[player.level - 1] - player._exp
+            p_xp = outcome[SUCCESS] + outcome[FAIL]
+            mean = outcome[WIN] * combat_xp[0] + p_xp * non_combat_xp[0]
+            second = outcome[WIN] * combat_xp[1] + p_xp * non_combat_xp[1]
+            margin = LEVEL_MARGIN * math.sqrt(max(second - mean**2, 0.0))
+            if remaining <= 0:
+                safe = 0
+            elif mean > 0:
+                # most turns with mean * n + margin * sqrt(n) short of the next level
+                root = (-margin + math.sqrt(margin**2 + 4 * mean * remaining)) / (2 * mean)
+                safe = math.floor(root**2)
+
+        # the upgrade wait is drawn again after a cut, which keeps it memoryless as long as a
+        # cut after n quiet turns is made whenever the wait leaves room for them (n <= quiet)
+        if safe > quiet:
+            played, xp, gold, combat_turns = self._aggregate(ctx, outcome, quiet)
+            cut = False
+        elif safe >= EXACT_XP:
+            played, xp, gold, combat_turns = self._aggregate(ctx, outcome, safe)
+            cut = True
+        else:
+            n = min(quiet, LEVEL_CHUNK)
+            played, xp, gold, combat_turns, reached = self._turn_by_turn(
+                ctx, outcome, n, remaining
+            )
+            cut = reached or n == LEVEL_CHUNK
+
+        if played:
+            player.award_exp(xp)
+            player.award_gold(gold)
+            kpis.update_span(turn + played - 1, ctx, played, combat_turns)
+
+        if cut:
+            end = turn + played
+        elif upgrade:
+            player.award_exp(
+                int(self._xp(ctx.rng.combat.generator, tier, cfg.BASE_XP_COMBAT, 1)[0])
+            )
+            player.award_gold(cfg.GOLD_PER_COMBAT_STEP)
+            pick = ctx.rng.loot.generator.choice(better, p=probs[better] / probs[better].sum())
+            player.award_loot(items[pick])
+            kpis.update_span(end - 1, ctx, 1, 1)
+
+        ctx.world = story.progress_story(ctx, end - 1)
+        return end
+
+    def _aggregate(
+        self, ctx: context.SimContext, outcome: np.ndarray, n: int
+    ) -> tuple[int, int, int, int]:
+        """(turns, XP, gold, combat turns) of `n` quiet turns drawn in aggregate"""
+        cfg = self.cfg
+        tier = ctx.world.ZoneTier
+        _, combat_xp, non_combat_xp, _ = self._model._tier(tier)
+
+        wins, losses, successes, fails = ctx.rng.encounter.generator.multinomial(n, outcome)
+        xp = self._xp_sum(
+            ctx.rng.combat.generator, tier, cfg.BASE_XP_COMBAT, combat_xp, wins
+        ) + self._xp_sum(
+            ctx.rng.non_combat.generator,
+            tier,
+            cfg.BASE_XP_NON_COMBAT,
+            non_combat_xp,
+            successes + fails,
+        )
+        gold = wins * cfg.GOLD_PER_COMBAT_STEP + successes * cfg.GOLD_PER_NON_COMBAT_STEP
+        return n, xp, int(gold), int(wins + losses)
+
+    def _turn_by_turn(
+        self, ctx: context.SimContext, outcome: np.ndarray, n: int, remaining: int
+    ) -> tuple[int, int, int, int, bool]:
+        """
+        (turns, XP, gold, combat turns, level reached) of up to `n` quiet turns, stopping at
+        the turn that reaches the next level
+        """
+        cfg = self.cfg
+        tier = ctx.world.ZoneTier
+
+        drawn = ctx.rng.encounter.generator.choice(4, size=n, p=outcome)
+        xp = np.zeros(n, dtype=np.int64)
+        wins = drawn == WIN
+        xp[wins] = self._xp(
+            ctx.rng.combat.generator, tier, cfg.BASE_XP_COMBAT, int(wins.sum())
+        )
+        attempts = drawn >= SUCCESS
+        xp[attempts] = self._xp(
+            ctx.rng.non_combat.generator, tier, cfg.BASE_XP_NON_COMBAT, int(attempts.sum())
+        )
+
+        reached = np.flatnonzero(np.cumsum(xp) >= remaining)
+        played = int(reached[0]) + 1 if len(reached) else n
+        counts = np.bincount(drawn[:played], minlength=4)
+        gold = (
+            counts[WIN] * cfg.GOLD_PER_COMBAT_STEP
+            + counts[SUCCESS] * cfg.GOLD_PER_NON_COMBAT_STEP
+        )
+        return (
+            played,
+            int(xp[:played].sum()),
+            int(gold),
+            int(counts[WIN] + counts[LOSS]),
+            len(reached) > 0,
+        )
+
+
+def compare_modes(
+    runs: int = 2000, turns: int = inputs.TURNS, seed: int = inputs.SEED, alpha: float = 0.001
+) -> dict[str, tuple[float, float, bool]]:
+    """
+    Statistical equivalence check of fast-forwarded and turn by turn campaigns: `runs` of
+    each, end states and KPIs compared with a two-sample KS test.
+
+    Returns:
+        {metric: (statistic, critical value, passed)}
+    """
+    import batch
+    import records
+    import simulate
+
+    metrics = ("level", "gold", "gear_score", "cumulative_xp", "combat_gear")
+
+    def end_state(ctx: context.SimContext, kpis: kpi.RunKPIs) -> tuple:
+        player = ctx.player
+        return (
+            player.level,
+            player.gold,
+            player.equipment.get_score(),
+            player.culumative_exp(),
+            kpis.values(ctx)["Avg GearScore (Combat)"],
+        )
+
+    stepped = []
+    for i in range(runs):
+        ctx = context.SimContext(batch.run_seed(i, seed))
+        kpis = kpi.RunKPIs()
+        scratch = records.TurnRecords(records.RING_ROWS, ring=True)
+        for turn in range(turns):
+            kpis.update(turn, ctx, scratch, simulate.step(ctx, turn, scratch))
+        stepped.append(end_state(ctx, kpis))
+
+    engine = FastForward()
+    fast = []
+    for i in range(runs):
+        ctx = context.SimContext(streams.child(np.random.SeedSequence(seed), i))
+        fast.append(end_state(ctx, engine.run(ctx, turns)))
+
+    critical = math.sqrt(-math.log(alpha / 2) / 2) * math.sqrt(2 / runs)
+    report = {}
+    for k, metric in enumerate(metrics):
+        d = vector.ks_statistic([s[k] for s in stepped], [s[k] for s in fast])
+        report[metric] = (d, critical, d <= critical)
+    return report
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Check fast-forwarded campaigns against turn by turn ones"
+    )
+    arg_parser.add_argument("--runs", type=int, default=2000)
+    arg_parser.add_argument("--turns", type=int, default=inputs.TURNS)
+    args = arg_parser.parse_args()
+
+    report = compare_modes(args.runs, args.turns)
+    for metric, (d, critical, passed) in report.items():
+        print(f"{metric:>14}: KS={d:.4f} critical={critical:.4f} {'PASS' if passed else 'FAIL'}")
+    if not all(passed for _, _, passed in report.values()):
+        raise SystemExit(1)
@@ -23,4 +23,5 @@ ZONE_SCALE = 5
 GEAR_STAT_SCALING = 15
 GOLD_PER_COMBAT_STEP = 10
 GOLD_PER_NON_COMBAT_STEP = 5
-TURNS = 300
\ No newline at end of file
+TURNS = 300
+LOOT_HISTORY = 0  # drops kept in the player inventory: 0 keeps none, -1 keeps all
\ No newline at end of file
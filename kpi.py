@@ -0,0 +1,318 @@
+import math
+import os
+
+import context
+import records
+import tables
+
+dashboard_file = os.path.join(tables.data_dir, "Dashboard.csv")
+# filled copies of the sheet go here, Dashboard.csv itself stays the template
+dashboard_output_file = os.path.join(tables.data_dir, "dashboard_out.csv")
+summary_file = os.path.join(tables.data_dir, "summary.csv")
+
+# Dashboard.csv KPI names, in sheet order
+KPIS = (
+    "Final Level",
+    "Total XP",
+    "Total Gold",
+    "Total Reputation",
+    "Avg GearScore (Combat)",
+    "% Non-Combat Beats",
+)
+QUANTILES = (5, 50, 95)
+# turns per bin of the time-to-level histograms
+LEVEL_BIN = 10
+
+
+class Welford:
+    """Running count, mean, variance, min and max in O(1) memory"""
+
+    __slots__ = ("n", "mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, x: float):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    def update_repeated(self, x: float, count: int):
+        """`count` updates with the same `x`"""
+        other = Welford()
+        other.n = count
+        other.mean = other.min = other.max = x
+        self.merge(other)
+
+    def merge(self, other: "Welford"):
+        """Fold in another accumulator (Chan et al. parallel update)"""
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self._m2 += other._m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class P2Quantile:
+    """
+    Streaming estimate of the p-th percentile with the P-square algorithm (Jain & Chlamtac),
+    five markers regardless of the number of observations.
+    """
+
+    __slots__ = ("p", "_heights", "_positions", "_desired", "_increments")
+
+    def __init__(self, p: float):
+        self.p = p / 100
+        self._heights: list[float] = []
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0, 2 * self.p, 4 * self.p, 2 + 2 * self.p, 4]
+        self._increments = [0, self.p / 2, self.p, (1 + self.p) / 2, 1]
+
+    def update(self, x: float):
+        q = self._heights
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        n = self._positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if x < q[i + 1])
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # move the middle markers toward their desired positions
+        for i in (1, 2, 3):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def value(self) -> float:
+        q = self._heights
+        if not q:
+            return math.nan
+        if len(q) < 5 or self._positions[4] == 4:
+            # exact, linearly interpolated percentile of the few values seen: up to the fifth
+            # observation the markers are the sorted values and none has moved yet
+            pos = (len(q) - 1) * self.p
+            lo = math.floor(pos)
+            hi = min(lo + 1, len(q) - 1)
+            return q[lo] + (q[hi] - q[lo]) * (pos - lo)
+        return q[2]
+
+
+class Histogram:
+    """Counts per fixed-width bin, keyed by the bin's lower edge"""
+
+    __slots__ = ("width", "counts")
+
+    def __init__(self, width: float):
+        self.width = width
+        self.counts: dict[float, int] = {}
+
+    def update(self, x: float):
+        edge = math.floor(x / self.width) * self.width
+        self.counts[edge] = self.counts.get(edge, 0) + 1
+
+    def merge(self, other: "Histogram"):
+        for edge, count in other.counts.items():
+            self.counts[edge] = self.counts.get(edge, 0) + count
+
+
+class RunKPIs:
+    """Dashboard KPIs of one run, updated once per turn from the simulation loop"""
+
+    __slots__ = ("turns", "combat_turns", "level_steps", "_gear", "_level")
+
+    def __init__(self):
+        self.turns = 0
+        self.combat_turns = 0
+        # level -> step it was first reached at
+        self.level_steps: dict[int, int] = {}
+        self._gear = Welford()
+        self._level = 1
+
+    def update(
+        self,
+        turn: int,
+        ctx: context.SimContext,
+        turn_records: records.TurnRecords,
+        i: int,
+    ):
+        self.turns += 1
+        if turn_records.Combat[i]:
+            self.combat_turns += 1
+            self._gear.update(ctx.player.equipment.get_score())
+        if ctx.player.level > self._level:
+            for level in range(self._level + 1, ctx.player.level + 1):
+                self.level_steps[level] = turn + 1
+            self._level = ctx.player.level
+
+    def update_span(self, turn: int, ctx: context.SimContext, turns: int, combat_turns: int):
+        """
+        Fold in `turns` turns ending at `turn` in one go, `combat_turns` of them combat turns
+        at the current gear score
+        """
+        self.turns += turns
+        if combat_turns:
+            self.combat_turns += combat_turns
+            self._gear.update_repeated(ctx.player.equipment.get_score(), combat_turns)
+        if ctx.player.level > self._level:
+            for level in range(self._level + 1, ctx.player.level + 1):
+                self.level_steps[level] = turn + 1
+            self._level = ctx.player.level
+
+    def values(self, ctx: context.SimContext) -> dict[str, float]:
+        player = ctx.player
+        return {
+            "Final Level": player.level,
+            "Total XP": player.culumative_exp(),
+            "Total Gold": player.gold,
+            "Total Reputation": 0,  # reputation is not simulated yet
+            "Avg GearScore (Combat)": self._gear.mean,
+            "% Non-Combat Beats": (
+                100 * (self.turns - self.combat_turns) / self.turns if self.turns else 0
+            ),
+        }
+
+
+def _format(value: float) -> str:
+    return str(value) if isinstance(value, int) else f"{value:.3f}"
+
+
+def write_dashboard(values: dict[str, float], path: str = dashboard_output_file):
+    """Write Dashboard.csv to `path` with its Value column filled, keeping KPI order and notes"""
+    with open(dashboard_file, newline="") as file:
+        lines = file.read().splitlines()
+
+    rows = [lines[0]]
+    for line in lines[1:]:
+        name, value, note = line.split(",", 2)
+        if name in values:
+            value = _format(values[name])
+        rows.append(f"{name},{value},{note}")
+
+    with open(path, mode="w", newline="") as file:
+        file.write("\n".join(rows) + "\n")
+
+
+class Summary:
+    """
+    Cross-run KPI summary built from one run at a time: mean, spread and P-square quantiles
+    per KPI, plus the distribution of the step each level is first reached at.
+    """
+
+    def __init__(self, quantiles: tuple[int, ...] = QUANTILES):
+        self.runs = 0
+        self.quantiles = quantiles
+        self.kpis = {name: Welford() for name in KPIS}
+        self.kpi_quantiles = {name: [P2Quantile(q) for q in quantiles] for name in KPIS}
+        self.level_steps: dict[int, Welford] = {}
+        self.level_quantiles: dict[int, list[P2Quantile]] = {}
+        self.level_histograms: dict[int, Histogram] = {}
+
+    def add(self, values: dict[str, float], level_steps: dict[int, int]):
+        self.runs += 1
+        for name in KPIS:
+            self.kpis[name].update(values[name])
+            for estimate in self.kpi_quantiles[name]:
+                estimate.update(values[name])
+
+        for level, step in level_steps.items():
+            if level not in self.level_steps:
+                self.level_steps[level] = Welford()
+                self.level_quantiles[level] = [P2Quantile(q) for q in self.quantiles]
+                self.level_histograms[level] = Histogram(LEVEL_BIN)
+            self.level_steps[level].update(step)
+            self.level_histograms[level].update(step)
+            for estimate in self.level_quantiles[level]:
+                estimate.update(step)
+
+    def rows(self) -> list[tuple]:
+        """(metric, runs, mean, sd, min, max, *quantiles) per KPI and per level reached"""
+        rows = []
+        for name in KPIS:
+            stat = self.kpis[name]
+            rows.append(
+                (name, stat.n, stat.mean, stat.std, stat.min, stat.max)
+                + tuple(e.value() for e in self.kpi_quantiles[name])
+            )
+        for level in sorted(self.level_steps):
+            stat = self.level_steps[level]
+            rows.append(
+                (f"Steps to Level {level}", stat.n, stat.mean, stat.std, stat.min, stat.max)
+                + tuple(e.value() for e in self.level_quantiles[level])
+            )
+        return rows
+
+    def histogram_rows(self) -> list[tuple[int, int, int]]:
+        """(level, first step of the bin, runs) per non-empty LEVEL_BIN bin of steps to level"""
+        return [
+            (level, edge, count)
+            for level in sorted(self.level_histograms)
+            for edge, count in sorted(self.level_histograms[level].counts.items())
+        ]
+
+    def as_dict(self) -> dict[str, dict]:
+        """
+        {metric: {"Runs", "Mean", "SD", "Min", "Max", "P5", ...}} plus "Level Histograms":
+        {level: {first step of the bin: runs}}, JSON serializable
+        """
+        keys = ["Runs", "Mean", "SD", "Min", "Max"] + [f"P{q}" for q in self.quantiles]
+        result = {name: dict(zip(keys, values)) for name, *values in self.rows()}
+        histograms: dict[int, dict[int, int]] = {}
+        for level, edge, count in self.histogram_rows():
+            histograms.setdefault(level, {})[edge] = count
+        result["Level Histograms"] = histograms
+        return result
+
+    def write(self, path: str = summary_file):
+        with open(path, mode="w") as file:
+            file.write(
+                "Metric,Runs,Mean,SD,Min,Max,"
+                + ",".join(f"P{q}" for q in self.quantiles)
+                + "\n"
+            )
+            for name, runs, *values in self.rows():
+                file.write(f"{name},{runs}," + ",".join(f"{v:.3f}" for v in values) + "\n")
+
+            # time-to-level histograms, after a blank line
+            file.write("\nLevel,BinStart,Runs\n")
+            for level, edge, count in self.histogram_rows():
+                file.write(f"{level},{edge},{count}\n")
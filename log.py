@@ -1,38 +1,311 @@
-import structs
+import context
+import records
 import datetime
+import os
+import tables
 import utils
 
-output_file = "data/output.csv"
-debug_file = "data/debug.csv"
+output_file = os.path.join(tables.data_dir, "output.csv")
+debug_file = os.path.join(tables.data_dir, "debug.csv")
 
+OUTPUT_HEADER = "Step,PlayerLevel,ActiveBeat#,ActiveBeatName,ZoneLevel,PowerRatio,BeatType,RandCat,OutcomeCategory,SkillDifficulty,Success?,RepDelta,XP_Earned,Gold_Earned,DropID,SuccessChanceCombat,DeathChance,Death?,RepairCost,Respec?,RespecCost,VendorTaxPct,Gold_Spent,NetGoldChange,CumulativeGold,CumulativeXP,CumulativeRep,Eq_Weapon,Eq_Chest,Eq_Helm,Eq_Legs,Eq_Accessory,GearScore,CatStatKey,CategoryDC,BeatDC_lookup,BaseStat,PerLevel,StatScore,SuccessChance_NonCombat\n"
+DEBUG_HEADER = "Timestamp,Step,PlayerLevel,ActiveBeat#,ActiveBeatName,ZoneLevel,PowerRatio,GearScore,LootRoll,Outcome,AssertFail,FailNote\n"
 
-def record_turn(
-    turn: int,
-    player: structs.Player,
-    world: structs.World,
-    stats: structs.Statistics,
-):
-    # TODO make some of these columns debug, this is an excessive amount of information
+# columns of a turn row, i.e. the output columns that carry real values
+TURN_FIELDS = (
+    "Step",
+    "PlayerLevel",
+    "ActiveBeat#",
+    "ActiveBeatName",
+    "ZoneLevel",
+    "PowerRatio",
+    "OutcomeCategory",
+    "SkillDifficulty",
+    "Success?",
+    "XP_Earned",
+    "Gold_Earned",
+    "DropID",
+    "SuccessChanceCombat",
+    "DeathChance",
+    "Death?",
+    "Gold_Spent",
+    "NetGoldChange",
+    "CumulativeGold",
+    "CumulativeXP",
+    "Eq_Weapon",
+    "Eq_Chest",
+    "Eq_Helm",
+    "Eq_Legs",
+    "Eq_Accessory",
+    "GearScore",
+    "CatStatKey",
+    "CategoryDC",
+    "BeatDC_lookup",
+    "BaseStat",
+    "PerLevel",
+    "StatScore",
+    "SuccessChance_NonCombat",
+)
 
-    # write csv headers
-    if turn == 0:
-        with open(output_file, mode="w") as file:
-            file.write(
-                "Step,PlayerLevel,ActiveBeat#,ActiveBeatName,ZoneLevel,PowerRatio,BeatType,RandCat,OutcomeCategory,SkillDifficulty,Success?,RepDelta,XP_Earned,Gold_Earned,DropID,SuccessChanceCombat,DeathChance,Death?,RepairCost,Respec?,RespecCost,VendorTaxPct,Gold_Spent,NetGoldChange,CumulativeGold,CumulativeXP,CumulativeRep,Eq_Weapon,Eq_Chest,Eq_Helm,Eq_Legs,Eq_Accessory,GearScore,CatStatKey,CategoryDC,BeatDC_lookup,BaseStat,PerLevel,StatScore,SuccessChance_NonCombat\n"
+# TODO make some of these columns debug, this is an excessive amount of information
+_OUTPUT_ROW = "{},{},{},{},{},{:.3f},BeatType,RandCat,{},{},{},RepDelta,{},{},{},{:.2f},{:.2f},{},RepairCost,Respec?,RespecCost,VendorTaxPct,{},{},{},{},CumulativeRep,{},{},{},{},{},{},{},{},{},{},{},{:.3f},{:.2f}\n"
+_DEBUG_ROW = "{},{},{},{},{},{},{:.3f},{},LootRoll,Outcome,{},{}\n"
+
+
+def turn_row(
+    turn: int, ctx: context.SimContext, turn_records: records.TurnRecords, i: int
+) -> tuple:
+    """Values of one turn in TURN_FIELDS order, its outcome read from row `i`"""
+    player = ctx.player
+    world = ctx.world
+    equipment = player.equipment
+    gold_earned = turn_records.Gold_Earned[i]
+    gold_spent = turn_records.Gold_Spent[i]
+
+    return (
+        turn + 1,
+        player.level,
+        world.BeatNum,
+        world.BeatName,
+        world.ZoneLevel,
+        utils.power_ratio(ctx),
+        turn_records.OutcomeCategory[i],
+        turn_records.SkillDifficulty[i],
+        turn_records.Success[i] == 1,
+        turn_records.XP_Earned[i],
+        gold_earned,
+        turn_records.DropID[i],
+        turn_records.SuccessChanceCombat[i],
+        turn_records.DeathChance[i],
+        turn_records.Death[i] == 1,
+        gold_spent,
+        gold_earned - gold_spent,
+        player.gold,
+        player.culumative_exp(),
+        equipment.weapon,
+        equipment.chest,
+        equipment.helm,
+        equipment.legs,
+        equipment.accessory,
+        equipment.get_score(),
+        turn_records.CatStatKey[i],
+        turn_records.CategoryDC[i],
+        world.BeatDC,
+        turn_records.BaseStat[i],
+        turn_records.PerLevel[i],
+        turn_records.StatScore[i],
+        turn_records.SuccessChance_NonCombat[i],
+    )
+
+
+def _open(path: str, offset: int | None, header: str):
+    """Fresh file with `header`, or an existing one cut back to a checkpointed `offset`"""
+    if offset is None:
+        file = open(path, mode="w")
+        file.write(header)
+    else:
+        file = open(path, mode="r+")
+        file.seek(offset)
+        file.truncate()
+    return file
+
+
+def reopen(state: tuple):
+    """Sink continuing where the sink a `checkpoint()` state was taken from left off"""
+    factory, args = state
+    return factory(*args)
+
+
+class CSVSink:
+    """Writes output.csv through a handle kept open for the run"""
+
+    def __init__(self, output_path: str = output_file, offset: int | None = None):
+        self.path = output_path
+        self._output = _open(output_path, offset, OUTPUT_HEADER)
+
+    def write(self, rows: list[tuple]):
+        self._output.write("".join(_OUTPUT_ROW.format(*row) for row in rows))
+
+    def checkpoint(self) -> tuple:
+        self._output.flush()
+        return CSVSink, (self.path, self._output.tell())
+
+    def close(self):
+        self._output.close()
+
+
+class DebugSink:
+    """
+    Writes debug.csv, keeping at most `max_rows` rows. With an assertions.Checker, every
+    block is checked before it is trimmed and failing rows get AssertFail=1 and a FailNote.
+    """
+
+    def __init__(
+        self,
+        debug_path: str = debug_file,
+        max_rows: int | None = None,
+        checker=None,
+        offset: int | None = None,
+    ):
+        self.path = debug_path
+        self._debug = _open(debug_path, offset, DEBUG_HEADER)
+        self._rows_left = max_rows
+        self.checker = checker
+
+    def write(self, rows: list[tuple]):
+        notes = self.checker.check_rows(rows) if self.checker is not None else {}
+
+        if self._rows_left is not None:
+            rows = rows[: self._rows_left]
+            self._rows_left -= len(rows)
+            if not rows:
+                return
+
+        # one timestamp per flushed block rather than one per row
+        timestamp = datetime.datetime.now().isoformat()
+        self._debug.write(
+            "".join(
+                _DEBUG_ROW.format(
+                    timestamp,
+                    row[0],
+                    row[1],
+                    row[2],
+                    row[3],
+                    row[4],
+                    row[5],
+                    row[24],
+                    int(i in notes),
+                    notes.get(i, ""),
+                )
+                for i, row in enumerate(rows)
             )
+        )
+
+    def checkpoint(self) -> tuple:
+        self._debug.flush()
+        return DebugSink, (self.path, self._rows_left, self.checker, self._debug.tell())
+
+    def close(self):
+        self._debug.close()
+
+
+class TeeSink:
+    """Forwards every block of rows to several sinks"""
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def write(self, rows: list[tuple]):
+        for sink in self.sinks:
+            sink.write(rows)
+
+    @classmethod
+    def reopen(cls, states: list[tuple]) -> "TeeSink":
+        return cls(*(reopen(state) for state in states))
 
-        with open(debug_file, mode="w") as file:
-            file.write(
-                "Timestamp,PlayerLevel,ActiveBeat#,ActiveBeatName,ZoneLevel,PowerRatio,GearScore,LootRoll,Outcome,AssertFail,FailNote\n"
+    def checkpoint(self) -> tuple:
+        return TeeSink.reopen, ([sink.checkpoint() for sink in self.sinks],)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+class MemorySink:
+    """Keeps every turn row in memory, e.g. for batch runs that post-process in-process"""
+
+    def __init__(self, rows: list[tuple] | None = None):
+        self.rows: list[tuple] = rows or []
+
+    def write(self, rows: list[tuple]):
+        self.rows.extend(rows)
+
+    def checkpoint(self) -> tuple:
+        return MemorySink, (list(self.rows),)
+
+    def close(self):
+        pass
+
+
+class NullSink:
+    """Drops every row"""
+
+    def write(self, rows: list[tuple]):
+        pass
+
+    def checkpoint(self) -> tuple:
+        return NullSink, ()
+
+    def close(self):
+        pass
+
+
+class RunWriter:
+    """Buffers turn rows and hands them to a sink in bulk"""
+
+    def __init__(self, sink, buffer_rows: int = 1024):
+        self.sink = sink
+        self.buffer_rows = buffer_rows
+        self._rows: list[tuple] = []
+
+    @classmethod
+    def from_config(cls, debug_config: dict[str, str]) -> "RunWriter":
+        """Writer set up from the DebugConfig.csv key/value pairs"""
+        if debug_config.get("OutputFormat", "csv") == "trace":
+            import tracelog
+
+            sinks = [tracelog.TraceSink()]
+        else:
+            sinks = [CSVSink()]
+
+        if debug_config.get("DebugLog", "1") != "0":
+            max_rows = debug_config.get("MaxRows")
+            checker = None
+            if debug_config.get("Assertions", "1") != "0":
+                import assertions
+
+                checker = assertions.Checker.from_file()
+            sinks.append(
+                DebugSink(max_rows=int(max_rows) if max_rows else None, checker=checker)
             )
 
-    # write data
-    with open(output_file, mode="a") as file:
-        file.write(
-            f"{turn + 1},{player.level},{world.BeatNum},{world.BeatName},{world.ZoneLevel},{utils.power_ratio(player, world):.3f},BeatType,RandCat,{stats.OutcomeCategory},{stats.SkillDifficulty},{stats.Success},RepDelta,{stats.XP_Earned},{stats.Gold_Earned},{stats.DropID},{stats.SuccessChanceCombat:.2f},{stats.DeathChance:.2f},{stats.Death},RepairCost,Respec?,RespecCost,VendorTaxPct,{stats.Gold_Spent},{stats.Gold_Earned - stats.Gold_Spent},{player.gold},{player.culumative_exp()},CumulativeRep,{player.equipment.weapon},{player.equipment.chest},{player.equipment.helm},{player.equipment.legs},{player.equipment.accessory},{player.equipment.get_score()},{stats.CatStatKey},{stats.CategoryDC},{world.BeatDC},{stats.BaseStat},{stats.PerLevel},{stats.StatScore:.3f},{stats.SuccessChance_NonCombat:.2f}\n"
+        return cls(
+            sinks[0] if len(sinks) == 1 else TeeSink(*sinks),
+            buffer_rows=int(debug_config.get("FlushRows", 1024)),
         )
 
-    with open(debug_file, mode="a") as file:
-        file.write(
-            f"{datetime.datetime.now().isoformat()},{turn},{player.level},{world.BeatNum},{world.BeatName},{world.ZoneLevel},PowerRatio,GearScore,LootRoll,Outcome,AssertFail,FailNote\n"
-        )
+    def record(
+        self,
+        turn: int,
+        ctx: context.SimContext,
+        turn_records: records.TurnRecords,
+        i: int,
+    ):
+        self._rows.append(turn_row(turn, ctx, turn_records, i))
+        if len(self._rows) >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        if self._rows:
+            self.sink.write(self._rows)
+            self._rows = []
+
+    def checkpoint(self) -> tuple:
+        """Flush, then the state `reopen` resumes the sink from, see checkpoint.py"""
+        self.flush()
+        return self.sink.checkpoint(), self.buffer_rows
+
+    @classmethod
+    def resume(cls, state: tuple) -> "RunWriter":
+        sink, buffer_rows = state
+        return cls(reopen(sink), buffer_rows)
+
+    def close(self):
+        self.flush()
+        self.sink.close()
+
+    def __enter__(self) -> "RunWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
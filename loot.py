@@ -1,9 +1,9 @@
+import numpy as np
+
+import context
 import structs
-import parser
+import streams
 import utils
-import random
-
-_loot_table = parser.read_csv("data/LootTable.csv", structs.Loot)
 
 QualityWeights = {
     "T1": {
@@ -40,27 +40,110 @@ PieceWeights = {
     "Accessory": 0.2,
 }
 
+# equipment piece -> LootTable.csv slots that fill it
+PieceSlots = {
+    "Weapon": ("Weapon",),
+    "Chest": ("Chest",),
+    "Helm": ("Helm",),
+    "Legs": ("Boots",),
+    "Accessory": ("Amulet", "Gloves", "Ring"),
+}
 
-def weighted_choice(weight_dict: dict[str, float]) -> str:
-    r = random.random() * sum(weight_dict.values())
 
-    for key, weight in weight_dict.items():
-        r -= weight
-        if r <= 0:
-            return key
+class AliasTable:
+    """Walker/Vose alias table, O(1) weighted sampling of `keys` from one uniform draw"""
 
-    return list(weight_dict.keys())[-1]  # Fallback
+    def __init__(self, keys: list, weights: list[float]):
+        n = len(keys)
+        total = sum(weights)
+        scaled = [w * n / total for w in weights]
 
+        self.keys = keys
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
 
-def get_drop(world: structs.World) -> structs.Loot | None:
-    if utils.chance(.50):
-        return None  # no drop
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] += scaled[s] - 1
+            (small if scaled[l] < 1 else large).append(l)
+
+    def sample_index(self, rng: streams.Stream) -> int:
+        u = rng.random() * len(self.prob)
+        i = int(u)
+        return i if u - i < self.prob[i] else self.alias[i]
+
+    def sample(self, rng: streams.Stream):
+        return self.keys[self.sample_index(rng)]
+
+
+class LootIndex:
+    """
+    Loot table grouped by (tier, piece, quality) once at load time, with one alias table per
+    tier over the joint piece x quality weights, so a drop costs two uniform draws.
+    """
 
-    slot = weighted_choice(PieceWeights)
-    quality = weighted_choice(QualityWeights[f"T{world.ZoneTier}"])
+    def __init__(self, loot_table: list[structs.Loot]):
+        self.groups: dict[tuple[int, str, str], tuple[structs.Loot, ...]] = {}
+        self.samplers: dict[int, AliasTable] = {}
 
-    possible_drops = [x for x in _loot_table if x.Slot == slot and x.Quality == quality]
-    if not possible_drops:
-        return None
+        for tier_key, quality_weights in QualityWeights.items():
+            tier = int(tier_key[1:])
+            keys = []
+            weights = []
+            for piece, piece_weight in PieceWeights.items():
+                slots = PieceSlots[piece]
+                for quality, quality_weight in quality_weights.items():
+                    key = (tier, piece, quality)
+                    self.groups[key] = tuple(
+                        x for x in loot_table if x.Slot in slots and x.Quality == quality
+                    )
+                    keys.append(key)
+                    weights.append(piece_weight * quality_weight)
+            self.samplers[tier] = AliasTable(keys, weights)
+
+        # per tier alias arrays and the (start, length) of each key's items in items(tier)
+        self._arrays: dict[int, tuple[np.ndarray, ...]] = {}
+        for tier, sampler in self.samplers.items():
+            lengths = np.asarray([len(self.groups[key]) for key in sampler.keys])
+            starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            self._arrays[tier] = (
+                np.asarray(sampler.prob),
+                np.asarray(sampler.alias),
+                starts,
+                lengths,
+            )
+
+    def sample(self, tier: int, rng: streams.Stream) -> structs.Loot | None:
+        """Item for one drop in `tier`, or None when the rolled piece/quality has no items"""
+        items = self.groups[self.samplers[tier].sample(rng)]
+        if not items:
+            return None
+        return items[int(rng.random() * len(items))]
+
+    def items(self, tier: int) -> list[structs.Loot]:
+        """Items of `tier` in the order draw() indexes them"""
+        return [item for key in self.samplers[tier].keys for item in self.groups[key]]
+
+    def draw(self, tier: int, n: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        `n` drops in `tier` at once, as indices into items(tier) (-1 where the rolled
+        piece/quality has no items): the alias draw of sample, vectorized.
+        """
+        prob, alias, starts, lengths = self._arrays[tier]
+        u = rng.random(n) * len(prob)
+        i = u.astype(np.int64)
+        group = np.where(u - i < prob[i], i, alias[i])
+        pick = starts[group] + (rng.random(n) * lengths[group]).astype(np.int64)
+        return np.where(lengths[group] > 0, pick, -1)
+
+
+def get_drop(ctx: context.SimContext) -> structs.Loot | None:
+    if utils.chance(.50, ctx.rng.loot):
+        return None  # no drop
 
-    return random.choice(possible_drops)
+    return ctx.tables.loot_index.sample(ctx.world.ZoneTier, ctx.rng.loot)
@@ -1,5 +1,37 @@
-import simulate
+import argparse
+
 import inputs
+import kpi
+import simulate
 
 if __name__ == "__main__":
-    simulate.simulate(inputs.TURNS)
+    arg_parser = argparse.ArgumentParser(description="Run one simulation")
+    arg_parser.add_argument("--plot", action="store_true", help="render the figures afterwards")
+    arg_parser.add_argument(
+        "--checkpoint-every", type=int, default=0, metavar="N", help="checkpoint every N turns"
+    )
+    arg_parser.add_argument("--resume", metavar="CHECKPOINT", help="continue a checkpointed run")
+    arg_parser.add_argument(
+        "--fast", action="store_true", help="fast-forward between events, KPIs only"
+    )
+    arg_parser.add_argument("--turns", type=int, default=inputs.TURNS)
+    arg_parser.add_argument(
+        "--dashboard",
+        nargs="?",
+        const=kpi.dashboard_output_file,
+        default=None,
+        metavar="PATH",
+        help="write the filled Dashboard.csv sheet (default data/dashboard_out.csv)",
+    )
+    args = arg_parser.parse_args()
+    if args.fast and not args.dashboard:
+        arg_parser.error("--fast keeps only the KPIs, use it with --dashboard")
+
+    simulate.simulate(
+        args.turns,
+        plot=args.plot,
+        checkpoint_every=args.checkpoint_every,
+        resume=args.resume,
+        fast=args.fast,
+        dashboard=args.dashboard,
+    )
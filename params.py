@@ -4,6 +4,9 @@ ATTEMPT_SLOPE = 1
 FAIL_STEP = 2.0
 SUCCESS_STEP = 0.0
 USE_LIVE_ROLLS = 1.0
+USE_CHANCE_TABLES = 1.0
+CHANCE_BUCKET = 10
+INTERPOLATE_CHANCES = 1.0
 NC_SLOPE = 1.3
 COMBAT_SLOPE = 0.55
 COMBAT_SHIFT = 1.5
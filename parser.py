@@ -1,32 +1,79 @@
 import csv
-from typing import Type, Any, get_type_hints, TypeVar
+import dataclasses
+import itertools
+from array import array
+from operator import itemgetter
+from typing import Type, Any, Callable, Iterator, get_type_hints, TypeVar
 
 _T = TypeVar("_T", bound="CSVRow")
 
 
 class CSVRow:
-    def __init__(self, **kwargs: dict[Any, Any]):
-        self.__dict__ = kwargs
+    """
+    Base of the CSV row types in structs. Subclasses are slotted dataclasses whose annotations
+    name the columns they read and the type each column is converted to.
+    """
+
+    __slots__ = ()
+
+
+def _to_bool(value: str) -> bool:
+    return value.lower() in ("true", "1", "yes")
+
+
+_CONVERTERS: dict[type, Callable[[str], Any]] = {
+    int: int,
+    float: float,
+    bool: _to_bool,
+    str: str,
+}
+
+# typecode of each column type in column-store mode, other types stay lists
+_ARRAY_TYPES = {int: "q", float: "d", bool: "B"}
+
+
+def _read_rows(file_path: str) -> tuple[list[str], list[list[str]]]:
+    with open(file_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        # blank lines of hand-edited sheets, including rows of empty cells, hold no record
+        return header, [row for row in reader if any(row)]
+
+
+def _column(rows: list[list[str]], index: int, typ: type) -> Iterator:
+    """Lazily converted column, resolved to a converter once per file"""
+    return map(_CONVERTERS.get(typ, str), map(itemgetter(index), rows))
 
 
 def read_csv(file_path: str, cls: Type[_T]) -> list[_T]:
     hints = get_type_hints(cls)
+    header, rows = _read_rows(file_path)
 
-    def cast(value: str, typ: type):
-        if typ == int:
-            return int(value)
-        elif typ == float:
-            return float(value)
-        elif typ == bool:
-            return value.lower() in ("true", "1", "yes")
-        return value
+    # one iterator per field in declaration order, missing columns fall back to defaults
+    columns = []
+    for field in dataclasses.fields(cls):
+        if field.name in header:
+            columns.append(_column(rows, header.index(field.name), hints[field.name]))
+        elif field.default is not dataclasses.MISSING:
+            columns.append(itertools.repeat(field.default, len(rows)))
+        else:
+            raise ValueError(f"{file_path}: missing column {field.name}")
 
-    instances: list[_T] = []
+    return list(map(cls, *columns))
 
-    with open(file_path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            kwargs = {k: cast(v, hints.get(k, str)) for k, v in row.items()}
-            instances.append(cls(**kwargs))  # type: ignore
 
-    return instances
+def read_columns(file_path: str, cls: type) -> dict[str, array | list]:
+    """
+    Column-store mode: one typed array per numeric or bool column (a list for str columns)
+    instead of one row object per line.
+    """
+    hints = get_type_hints(cls)
+    header, rows = _read_rows(file_path)
+
+    columns: dict[str, array | list] = {}
+    for name, typ in hints.items():
+        if name not in header:
+            continue
+        values = _column(rows, header.index(name), typ)
+        columns[name] = array(_ARRAY_TYPES[typ], values) if typ in _ARRAY_TYPES else list(values)
+    return columns
@@ -0,0 +1,131 @@
+import contextlib
+import cProfile
+import time
+from collections import Counter, defaultdict
+from typing import Callable
+
+import simulate
+
+EVENTS = ("drops", "deaths", "level-ups", "beats crossed")
+
+
+class Profiler:
+    """
+    Per-phase timers and event counters of one run. Only the turns played with `phases` are
+    timed: the wrappers are handed to the run, not patched into the modules, so other runs
+    in the process (service threads included) keep the plain functions.
+    """
+
+    def __init__(self, pstats_path: str | None = None):
+        self.pstats_path = pstats_path
+        self.calls: Counter[str] = Counter()
+        self.total: defaultdict[str, float] = defaultdict(float)
+        self.own: defaultdict[str, float] = defaultdict(float)
+        self.counts: Counter[str] = Counter({event: 0 for event in EVENTS})
+        self.elapsed = 0.0
+        self._nested = 0.0
+
+    @classmethod
+    def from_config(cls, debug_config: dict[str, str]) -> "Profiler | None":
+        """Profiler set up from the DebugConfig.csv Profile keys, None when disabled"""
+        if debug_config.get("Profile", "0") == "0":
+            return None
+        return cls(debug_config.get("ProfileStats") or None)
+
+    def timed(self, phase: str, fn: Callable) -> Callable:
+        """`fn` timed as `phase`; nested timed calls count toward its total, not its self time"""
+
+        def timed(*args, **kwargs):
+            outer, self._nested = self._nested, 0.0
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.calls[phase] += 1
+                self.total[phase] += elapsed
+                self.own[phase] += elapsed - self._nested  # without nested phases
+                self._nested = outer + elapsed
+
+        return timed
+
+    def _turn_phase(self, phase: str, fn: Callable) -> Callable:
+        timed = self.timed(phase, fn)
+
+        def counted(ctx, turn_records, i, *args):
+            level = ctx.player.level
+            timed(ctx, turn_records, i, *args)
+            self.counts["level-ups"] += ctx.player.level - level
+            self.counts["deaths"] += turn_records.Death[i]
+
+        return counted
+
+    def _get_drop(self, fn: Callable) -> Callable:
+        timed = self.timed("get_drop", fn)
+
+        def counted(ctx):
+            drop = timed(ctx)
+            self.counts["drops"] += drop is not None
+            return drop
+
+        return counted
+
+    def _progress_story(self, fn: Callable) -> Callable:
+        timed = self.timed("progress_story", fn)
+
+        def counted(ctx, turn):
+            world = timed(ctx, turn)
+            self.counts["beats crossed"] += world is not ctx.world
+            return world
+
+        return counted
+
+    def phases(self, phases: simulate.Phases = simulate.PHASES) -> simulate.Phases:
+        """`phases` wrapped in this profiler's timers and event counters, for simulate.step"""
+        return simulate.Phases(
+            combat=self._turn_phase("combat", phases.combat),
+            non_combat=self._turn_phase("non_combat", phases.non_combat),
+            progress_story=self._progress_story(phases.progress_story),
+            get_drop=self._get_drop(phases.get_drop),
+        )
+
+    @contextlib.contextmanager
+    def instrument(self):
+        """Time the run (and run cProfile when a stats path is set)"""
+        profile = cProfile.Profile() if self.pstats_path else None
+        start = time.perf_counter()
+        try:
+            if profile is not None:
+                profile.enable()
+            yield self
+        finally:
+            if profile is not None:
+                profile.disable()
+            self.elapsed += time.perf_counter() - start
+            if profile is not None:
+                profile.dump_stats(self.pstats_path)
+
+    def report(self) -> str:
+        """Summary table: calls, inclusive and self time per phase, then the event counts"""
+        lines = [
+            f"{'phase':>16} {'calls':>9} {'total s':>9} {'self s':>9} {'us/call':>9} {'share':>7}"
+        ]
+        accounted = 0.0
+        for phase in self.calls:
+            calls = self.calls[phase]
+            accounted += self.own[phase]
+            lines.append(
+                f"{phase:>16} {calls:>9} {self.total[phase]:>9.3f} {self.own[phase]:>9.3f}"
+                f" {1e6 * self.total[phase] / calls:>9.2f}"
+                f" {self.own[phase] / max(self.elapsed, 1e-12):>7.1%}"
+            )
+        other = self.elapsed - accounted
+        lines.append(
+            f"{'other':>16} {'':>9} {other:>9.3f} {other:>9.3f} {'':>9}"
+            f" {other / max(self.elapsed, 1e-12):>7.1%}"
+        )
+        lines.append(f"{'run':>16} {'':>9} {self.elapsed:>9.3f}")
+        lines.append(", ".join(f"{event}: {n}" for event, n in self.counts.items()))
+        if self.pstats_path:
+            lines.append(f"Saved: {self.pstats_path}")
+        return "\n".join(lines)
@@ -0,0 +1,69 @@
+import math
+from array import array
+
+# outcome fields of a turn: array typecode of the column, None for string columns
+FIELDS = {
+    "Combat": "B",
+    "Success": "B",
+    "Death": "B",
+    "XP_Earned": "q",
+    "Gold_Earned": "q",
+    "DropID": "q",
+    "Gold_Spent": "q",
+    "SuccessChanceCombat": "d",
+    "DeathChance": "d",
+    "StatScore": "d",
+    "SuccessChance_NonCombat": "d",
+    "OutcomeCategory": None,
+    "SkillDifficulty": "q",
+    "CatStatKey": None,
+    "CategoryDC": "q",
+    "BaseStat": "q",
+    "PerLevel": "d",
+}
+# rows simulate keeps for a run that does not ask for its records
+RING_ROWS = 1024
+# a wrapped ring clears rows this many at a time (or the largest divisor of its capacity)
+CLEAR_ROWS = 64
+
+
+class TurnRecords:
+    """
+    Per-turn outcomes of a run in columns preallocated for `capacity` turns, one per FIELDS
+    entry, written in place by row index. With `ring`, rows are reused modulo `capacity`, so
+    memory does not grow with the run; a wrapped ring clears CLEAR_ROWS rows at once and
+    keeps the last `capacity - CLEAR_ROWS` turns or more.
+    """
+
+    __slots__ = tuple(FIELDS) + ("capacity", "ring", "turns", "_block", "_zeros")
+
+    def __init__(self, capacity: int, ring: bool = False):
+        self.capacity = capacity
+        self.ring = ring
+        self.turns = 0
+        self._block = math.gcd(capacity, CLEAR_ROWS)
+        self._zeros = []
+        for name, typecode in FIELDS.items():
+            if typecode is None:
+                column, zeros = [""] * capacity, [""] * self._block
+            else:
+                size = array(typecode).itemsize
+                column = array(typecode, bytes(size * capacity))
+                zeros = array(typecode, bytes(size * self._block))
+            setattr(self, name, column)
+            self._zeros.append((column, zeros))
+
+    def row(self, turn: int) -> int:
+        """Row index of `turn`; a wrapped ring clears the block of rows it enters"""
+        if turn < self.capacity:
+            i = turn
+        elif self.ring:
+            i = turn % self.capacity
+            if i % self._block == 0:
+                for column, zeros in self._zeros:
+                    column[i : i + self._block] = zeros
+        else:
+            raise IndexError(f"turn {turn} is past the {self.capacity} preallocated rows")
+        if turn >= self.turns:
+            self.turns = turn + 1
+        return i
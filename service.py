@@ -0,0 +1,363 @@
+import argparse
+import asyncio
+import functools
+import json
+import multiprocessing
+import os
+import stat
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import AsyncIterator
+
+import batch
+import checkpoint
+import config
+import context
+import inputs
+import kpi
+import records
+import simulate
+import tables
+import utils
+
+# seconds a summary request waits for concurrent ones to share its batch
+BATCH_WINDOW = 0.005
+# campaigns per worker job of a coalesced batch
+BATCH_CHUNK = 16
+# turns per worker job of a streamed campaign
+RUN_SEGMENT = 1000
+# largest batch one request may ask for
+MAX_RUNS = 100_000
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+class RequestError(ValueError):
+    """A request the service refuses, answered with `status`"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+@functools.lru_cache(maxsize=8)
+def _tables(root: str) -> tables.Tables:
+    """Tables of the data directory `root`, parsed once per process"""
+    data = tables.default() if root == tables.data_dir else tables.Tables(root)
+    return data.warm()
+
+
+def _warm(root: str):
+    # worker initializer, every job after the first finds the tables parsed
+    _tables(root)
+
+
+@functools.lru_cache(maxsize=256)
+def _config(overrides: tuple) -> config.Config:
+    return config.Config(**dict(overrides))
+
+
+def _summarize_chunk(
+    job: tuple[list, int, config.Config, bool, str]
+) -> list[tuple[dict[str, float], dict[int, int]]]:
+    """batch._summarize_chunk on the tables of the service's data directory"""
+    seeds, turns, cfg, fast, root = job
+    data = _tables(root)
+    engine = None
+    if fast:
+        import fastforward
+
+        engine = fastforward.FastForward(data, cfg)
+    return [batch.summarize_campaign(seed, turns, cfg, engine, data) for seed in seeds]
+
+
+def _run_segment(job: tuple[bytes, int, str]) -> tuple[bytes, list[tuple]]:
+    """Continue a snapshotted campaign up to turn `turns`, returns its snapshot and trace"""
+    data, turns, root = job
+    run = checkpoint.restore(data, _tables(root))
+    ctx, kpis = run.ctx, run.kpis
+    player = ctx.player
+    scratch = records.TurnRecords(records.RING_ROWS, ring=True)
+
+    trace = []
+    for turn in range(run.turn, turns):
+        kpis.update(turn, ctx, scratch, simulate.step(ctx, turn, scratch))
+        trace.append(
+            (
+                turn + 1,
+                player.level,
+                player.gold,
+                player.equipment.get_score(),
+                utils.power_ratio(ctx),
+            )
+        )
+    return checkpoint.snapshot(turns, ctx, kpis), trace
+
+
+class Coalescer:
+    """
+    Collects the campaigns of concurrent summary requests for `window` seconds, then runs
+    them as shared chunk jobs on `pool`, on the tables of the data directory `root`.
+    Requests with the same turns, parameters and mode share jobs, and a campaign asked for
+    by several of them is run once.
+    """
+
+    def __init__(
+        self,
+        pool: Executor,
+        root: str = tables.data_dir,
+        window: float = BATCH_WINDOW,
+        chunk: int = BATCH_CHUNK,
+    ):
+        self.pool = pool
+        self.root = root
+        self.window = window
+        self.chunk = chunk
+        # (turns, parameters, fast) -> campaign (seed, run_id, index) -> waiting queues
+        self._pending: dict[tuple, dict[tuple, list[asyncio.Queue]]] = {}
+        self._timer: asyncio.TimerHandle | None = None
+
+    def submit(
+        self, turns: int, cfg: tuple, fast: bool, campaigns: list[tuple[int, int, int]]
+    ) -> asyncio.Queue:
+        """Queue receiving the (values, level_steps) of each campaign as its job completes"""
+        queue = asyncio.Queue()
+        group = self._pending.setdefault((turns, cfg, fast), {})
+        for campaign in campaigns:
+            group.setdefault(campaign, []).append(queue)
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._dispatch)
+        return queue
+
+    def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        pending, self._pending, self._timer = self._pending, {}, None
+        for (turns, cfg, fast), group in pending.items():
+            campaigns = list(group)
+            for i in range(0, len(campaigns), self.chunk):
+                part = campaigns[i : i + self.chunk]
+                seeds = [batch.run_seed(index, seed, run_id) for seed, run_id, index in part]
+                job = (seeds, turns, _config(cfg), fast, self.root)
+                try:
+                    future = loop.run_in_executor(self.pool, _summarize_chunk, job)
+                except RuntimeError as e:  # a broken or shut down pool
+                    future = loop.create_future()
+                    future.set_exception(e)
+                future.add_done_callback(functools.partial(self._deliver, part, group))
+
+    @staticmethod
+    def _deliver(part: list[tuple], group: dict[tuple, list[asyncio.Queue]], future):
+        if future.cancelled():
+            return  # the service is shutting down
+        error = future.exception()
+        results = [error] * len(part) if error else future.result()
+        for campaign, result in zip(part, results):
+            for queue in group[campaign]:
+                queue.put_nowait(result)
+
+
+class Service:
+    """
+    Long-running simulation service: the tables are parsed once, configs are built once per
+    set of overrides and the worker pool stays up between requests. Each request streams
+    JSON objects as they are produced, over HTTP as NDJSON (`serve`) or in-process
+    (`stream`).
+
+        GET  /health   {"status": "ok", "workers": n}
+        POST /summary  {"runs", "turns", "seed", "run_id", "set", "fast"} -> progress lines
+                       {"runs": done}, then {"summary": kpi.Summary.as_dict()}
+        POST /run      {"turns", "seed", "run_id", "index", "set", "every"} -> one line per
+                       `every` turns {"turn", "level", "gold", "gear_score", "power_ratio"},
+                       then {"kpis": RunKPIs.values()}
+    """
+
+    def __init__(self, workers: int | None = None, data: tables.Tables | None = None):
+        self.tables = (data or tables.default()).warm()
+        self.workers = workers or os.cpu_count() or 1
+        if self.workers > 1:
+            # spawned, not forked: a forked worker would hold open the client sockets of the
+            # moment it started, and their responses would never end
+            self.pool: Executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm,
+                initargs=(self.tables.root,),
+            )
+        else:
+            self.pool = ThreadPoolExecutor(max_workers=1)
+        self.coalescer = Coalescer(self.pool, self.tables.root)
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    def stream(self, method: str, path: str, body: dict) -> AsyncIterator[dict]:
+        """Response objects of one request; raises RequestError before any is produced"""
+        routes = {
+            "/health": ("GET", self._health),
+            "/summary": ("POST", self._summary),
+            "/run": ("POST", self._run),
+        }
+        if path not in routes:
+            raise RequestError(f"no route {path}", 404)
+        expected, handler = routes[path]
+        if method != expected:
+            raise RequestError(f"{path} takes {expected}", 405)
+        return handler(body)
+
+    def _cfg(self, body: dict) -> tuple:
+        overrides = body.get("set") or {}
+        if not isinstance(overrides, dict):
+            raise RequestError('"set" must be an object of NAME: VALUE overrides')
+        try:
+            cfg = _config(tuple(sorted(overrides.items())))
+        except (KeyError, TypeError, ValueError) as e:
+            raise RequestError(f"bad override: {e}") from None
+        return tuple(sorted(cfg.as_dict().items()))
+
+    @staticmethod
+    def _int(body: dict, name: str, default: int, low: int = 0, high: int | None = None) -> int:
+        value = body.get(name, default)
+        # JSON true/false arrive as bools, which are ints to isinstance
+        if (
+            not isinstance(value, int)
+            or isinstance(value, bool)
+            or value < low
+            or (high is not None and value > high)
+        ):
+            raise RequestError(f'"{name}" must be an integer in [{low}, {high or "inf"}]')
+        return value
+
+    async def _health(self, body: dict) -> AsyncIterator[dict]:
+        yield {"status": "ok", "workers": self.workers}
+
+    def _summary(self, body: dict) -> AsyncIterator[dict]:
+        runs = self._int(body, "runs", 100, 1, MAX_RUNS)
+        turns = self._int(body, "turns", inputs.TURNS, 1)
+        seed = self._int(body, "seed", inputs.SEED)
+        run_id = self._int(body, "run_id", inputs.RUN_ID)
+        cfg = self._cfg(body)
+        campaigns = [(seed, run_id, i) for i in range(runs)]
+        return self._fold(
+            self.coalescer.submit(turns, cfg, bool(body.get("fast")), campaigns), runs
+        )
+
+    async def _fold(self, queue: asyncio.Queue, runs: int) -> AsyncIterator[dict]:
+        summary = kpi.Summary()
+        while summary.runs < runs:
+            result = await queue.get()
+            if isinstance(result, BaseException):
+                raise result
+            summary.add(*result)
+            if queue.empty() and summary.runs < runs:
+                yield {"runs": summary.runs}
+        yield {"summary": summary.as_dict()}
+
+    def _run(self, body: dict) -> AsyncIterator[dict]:
+        turns = self._int(body, "turns", inputs.TURNS, 1)
+        seed = self._int(body, "seed", inputs.SEED)
+        run_id = self._int(body, "run_id", inputs.RUN_ID)
+        index = self._int(body, "index", 0)
+        every = self._int(body, "every", 1, 1)
+        cfg = _config(self._cfg(body))
+        ctx = context.SimContext(batch.run_seed(index, seed, run_id), self.tables, cfg)
+        return self._segments(checkpoint.snapshot(0, ctx), turns, every)
+
+    async def _segments(self, data: bytes, turns: int, every: int) -> AsyncIterator[dict]:
+        loop = asyncio.get_running_loop()
+        for end in range(RUN_SEGMENT, turns + RUN_SEGMENT, RUN_SEGMENT):
+            data, trace = await loop.run_in_executor(
+                self.pool, _run_segment, (data, min(end, turns), self.tables.root)
+            )
+            for turn, level, gold, gear_score, power_ratio in trace:
+                if turn % every == 0 or turn == turns:
+                    yield {
+                        "turn": turn,
+                        "level": level,
+                        "gold": gold,
+                        "gear_score": gear_score,
+                        "power_ratio": power_ratio,
+                    }
+        run = checkpoint.restore(data, self.tables)
+        yield {"kpis": run.kpis.values(run.ctx)}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # one request per connection, the response body ends when the connection closes
+        status, lines = 200, None
+        try:
+            method, path, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            raw = await reader.readexactly(int(headers.get("content-length", 0)))
+            body = json.loads(raw) if raw.strip() else {}
+            if not isinstance(body, dict):
+                raise RequestError("the request body must be a JSON object")
+            lines = self.stream(method, path.split("?", 1)[0], body)
+        except RequestError as e:
+            status, error = e.status, str(e)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            status, error = 400, f"malformed request: {e}"
+
+        content_type = "application/x-ndjson" if status == 200 else "application/json"
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: {content_type}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1")
+        )
+        try:
+            if lines is None:
+                writer.write(json.dumps({"error": error}).encode() + b"\n")
+            else:
+                try:
+                    async for item in lines:
+                        writer.write(json.dumps(item).encode() + b"\n")
+                        await writer.drain()
+                except (ConnectionError, asyncio.CancelledError):
+                    raise
+                except Exception as e:
+                    # the status line is already out, the failure is the last line
+                    error = f"{type(e).__name__}: {e}"
+                    writer.write(json.dumps({"error": error}).encode() + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            pass  # the client went away
+        finally:
+            writer.close()
+
+    async def serve(
+        self, host: str = "127.0.0.1", port: int = 0, path: str | None = None
+    ) -> asyncio.AbstractServer:
+        """Start accepting requests on `host`:`port`, or on the Unix socket `path`"""
+        if path is not None:
+            # a socket left behind by a stopped service would refuse the bind
+            if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+                os.unlink(path)
+            return await asyncio.start_unix_server(self._handle, path)
+        return await asyncio.start_server(self._handle, host, port)
+
+
+async def _main(args: argparse.Namespace):
+    service = Service(args.workers)
+    try:
+        server = await service.serve(args.host, args.port, args.unix)
+        address = args.unix or "{}:{}".format(*server.sockets[0].getsockname()[:2])
+        print(f"Serving: {address} ({service.workers} workers)")
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Serve simulation requests over HTTP/JSON with warm tables and workers"
+    )
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead")
+    arg_parser.add_argument("--workers", type=int, default=None)
+    args = arg_parser.parse_args()
+
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
@@ -1,93 +1,203 @@
-import structs
+import config
+import contextlib
+import dataclasses
+import context
+import records
 import story
+import kpi
 import loot
 import log
 import utils
-import inputs
 import math
-from curve import plot_all
+from typing import Callable
 
 
 def combat(
-    player: structs.Player,
-    world: structs.World,
-    stats: structs.Statistics,
+    ctx: context.SimContext,
+    turn_records: records.TurnRecords,
+    i: int,
+    get_drop: Callable = loot.get_drop,
 ):
-    success, chance = utils.skill_check(utils.power_ratio(player, world), world.BeatDC / 20)
-    stats.SuccessChanceCombat = chance
-    stats.Success = success
+    player = ctx.player
+
+    chance = utils.skill_chance(ctx)
+    success = ctx.rng.combat.random() < chance
+    turn_records.SuccessChanceCombat[i] = chance
+    turn_records.Success[i] = success
 
     if success:
-        chance = utils.death_chance(player, world)
-        death = utils.chance(chance)
-        stats.DeathChance = chance
-        stats.Death = death
+        chance = utils.death_chance(ctx)
+        death = utils.chance(chance, ctx.rng.death)
+        turn_records.DeathChance[i] = chance
+        turn_records.Death[i] = death
 
         if not death:
             exp = math.floor(
-                utils.skill_difficulty(player, world) * inputs.BASE_XP_COMBAT
+                utils.skill_difficulty(ctx, ctx.rng.combat) * ctx.cfg.BASE_XP_COMBAT
             )
             player.award_exp(exp)
-            stats.XP_Earned = exp
+            turn_records.XP_Earned[i] = exp
 
-            gold = inputs.GOLD_PER_COMBAT_STEP
+            gold = ctx.cfg.GOLD_PER_COMBAT_STEP
             player.award_gold(gold)
-            stats.Gold_Earned = gold
+            turn_records.Gold_Earned[i] = gold
 
-            drop = loot.get_drop(world)
+            drop = get_drop(ctx)
             if drop is not None:
                 player.award_loot(drop)
-                stats.DropID = drop.ItemID
-
+                turn_records.DropID[i] = drop.ItemID
 
-def non_combat(
-    player: structs.Player,
-    world: structs.World,
-    stats: structs.Statistics,
-):
-    category = utils.non_combat_category(world)
-    stats.OutcomeCategory = category.OutcomeCategory
-    stats.SkillDifficulty = category.CategoryDC
 
-    stat = player.get_stat(category.StatKey)
-    stats.BaseStat = stat.Base
-    stats.PerLevel = stat.PerLevel
+def non_combat(ctx: context.SimContext, turn_records: records.TurnRecords, i: int):
+    player = ctx.player
 
-    chance = utils.non_combat_chance(player, world, category.OutcomeCategory)
-    success = utils.chance(chance)
-    stats.StatScore = utils.stat_score(player, category.StatKey)
-    stats.SuccessChance_NonCombat = chance
-    stats.Success = success
+    category = utils.non_combat_category(ctx)
+    turn_records.OutcomeCategory[i] = category.OutcomeCategory
+    turn_records.SkillDifficulty[i] = category.CategoryDC
 
-    exp = math.floor(utils.skill_difficulty(player, world) * inputs.BASE_XP_NON_COMBAT)
+    stat = player.get_stat(category.StatKey)
+    turn_records.BaseStat[i] = stat.Base
+    turn_records.PerLevel[i] = stat.PerLevel
+
+    chance = utils.non_combat_chance(ctx, category.OutcomeCategory)
+    success = utils.chance(chance, ctx.rng.non_combat)
+    turn_records.StatScore[i] = utils.stat_score(ctx, category.StatKey)
+    turn_records.SuccessChance_NonCombat[i] = chance
+    turn_records.Success[i] = success
+
+    exp = math.floor(
+        utils.skill_difficulty(ctx, ctx.rng.non_combat) * ctx.cfg.BASE_XP_NON_COMBAT
+    )
     player.award_exp(exp)
-    stats.XP_Earned = exp
+    turn_records.XP_Earned[i] = exp
 
     if success:
         # maybe use nc_rules.csv
-        gold = inputs.GOLD_PER_NON_COMBAT_STEP
+        gold = ctx.cfg.GOLD_PER_NON_COMBAT_STEP
         player.award_gold(gold)
-        stats.Gold_Earned = gold
+        turn_records.Gold_Earned[i] = gold
+
 
+@dataclasses.dataclass(frozen=True, slots=True)
+class Phases:
+    """Functions a turn is played with, e.g. profiling.Profiler.phases wraps them in timers"""
 
-def simulate(turns: int):
-    player = structs.Player()
-    world = story.create_world()
+    combat: Callable = combat
+    non_combat: Callable = non_combat
+    progress_story: Callable = story.progress_story
+    get_drop: Callable = loot.get_drop
 
-    for turn in range(turns):
-        stats = structs.Statistics()
 
-        # decide action
-        if utils.chance(inputs.COMBAT_CHANCE):
-            combat(player, world, stats)
-        else:
-            non_combat(player, world, stats)
+PHASES = Phases()
 
-        # change stage
-        world = story.progress_story(turn, world)
 
-        # record results
-        log.record_turn(turn, player, world, stats)
-    
-    # plot all results
-    plot_all()
+def step(
+    ctx: context.SimContext,
+    turn: int,
+    turn_records: records.TurnRecords,
+    phases: Phases = PHASES,
+) -> int:
+    """Play `turn`, recording its outcome into `turn_records`, returns its row there"""
+    i = turn_records.row(turn)
+
+    # decide action
+    is_combat = utils.chance(ctx.cfg.COMBAT_CHANCE, ctx.rng.encounter)
+    turn_records.Combat[i] = is_combat
+    if is_combat:
+        phases.combat(ctx, turn_records, i, phases.get_drop)
+    else:
+        phases.non_combat(ctx, turn_records, i)
+
+    # change stage
+    ctx.world = phases.progress_story(ctx, turn)
+
+    return i
+
+
+def simulate(
+    turns: int,
+    seed: int | None = None,
+    writer: log.RunWriter | None = None,
+    cfg: config.Config | None = None,
+    plot: bool = False,
+    dashboard: str | None = None,
+    checkpoint_every: int = 0,
+    checkpoint_path: str | None = None,
+    resume: str | None = None,
+    turn_records: records.TurnRecords | None = None,
+    fast: bool = False,
+):
+    """
+    Run `turns` turns. With `checkpoint_every`, a checkpoint of the run is written to
+    `checkpoint_path` every that many turns; `resume` continues the run saved in a checkpoint
+    file up to `turns`, truncating its outputs back to the checkpointed turn. Turn outcomes
+    go to `turn_records`, by default a ring of the last RING_ROWS turns. The KPIs fill a
+    copy of the Dashboard.csv sheet at `dashboard` when given. With `fast`, the run is
+    fast-forwarded from event to event (fastforward.py) and only the dashboard KPIs are
+    written.
+    """
+    if fast and checkpoint_every:
+        raise ValueError("a fast-forwarded run has no turn by turn state to checkpoint")
+
+    start = 0
+    if resume:
+        import checkpoint
+
+        run = checkpoint.restore(checkpoint.load(resume))
+        start, ctx, kpis = run.turn, run.ctx, run.kpis
+        if writer is None and run.writer is not None and not fast:
+            writer = log.RunWriter.resume(run.writer)
+    else:
+        ctx = context.SimContext(seed, cfg=cfg)
+        kpis = kpi.RunKPIs()
+
+    if fast:
+        import fastforward
+
+        fastforward.FastForward(ctx.tables, ctx.cfg).run(ctx, turns, start, kpis)
+        if dashboard:
+            kpi.write_dashboard(kpis.values(ctx), dashboard)
+        return
+
+    writer = writer or log.RunWriter.from_config(ctx.tables.debug_config)
+    turn_records = turn_records or records.TurnRecords(records.RING_ROWS, ring=True)
+
+    if checkpoint_every:
+        import checkpoint
+
+        checkpoint_path = checkpoint_path or checkpoint.checkpoint_file
+
+    # per-phase timers and counters, only wrapped in when DebugConfig.csv enables Profile;
+    # the wrappers are passed to this run's turns, never installed in the modules
+    profiler = None
+    phases, record = PHASES, writer.record
+    if ctx.tables.debug_config.get("Profile", "0") != "0":
+        import profiling
+
+        profiler = profiling.Profiler.from_config(ctx.tables.debug_config)
+        phases, record = profiler.phases(), profiler.timed("record", writer.record)
+
+    with writer, profiler.instrument() if profiler else contextlib.nullcontext():
+        for turn in range(start, turns):
+            i = step(ctx, turn, turn_records, phases)
+
+            # record results
+            record(turn, ctx, turn_records, i)
+            kpis.update(turn, ctx, turn_records, i)
+
+            if checkpoint_every and (turn + 1) % checkpoint_every == 0:
+                checkpoint.save(
+                    checkpoint.snapshot(turn + 1, ctx, kpis, writer), checkpoint_path
+                )
+
+    if dashboard:
+        kpi.write_dashboard(kpis.values(ctx), dashboard)
+
+    if profiler:
+        print(profiler.report())
+
+    if plot:
+        # opt-in, matplotlib is only imported when plotting
+        from curve import plot_all
+
+        plot_all()
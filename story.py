@@ -1,16 +1,17 @@
 import structs
-import parser
+import tables
+from typing import TYPE_CHECKING
 
-_story_beats = parser.read_csv("data/StoryBeats.csv", structs.World)
+if TYPE_CHECKING:
+    import context
 
 
-def create_world() -> structs.World:
-    return _story_beats[0]
+def create_world(data: tables.Tables) -> structs.World:
+    return data.story_beats[0]
 
 
-def progress_story(turn: int, world: structs.World) -> structs.World:
-    for i in range(len(_story_beats) - 1):
-        if _story_beats[i].BeatNum == world.BeatNum:
-            if turn >= _story_beats[i + 1].BeatStartStep:
-                return _story_beats[i + 1]  # progress stages
-    return world  # stay on current stage
+def progress_story(ctx: "context.SimContext", turn: int) -> structs.World:
+    schedule = ctx.tables.beat_schedule
+    if turn < len(schedule):
+        return ctx.tables.story_beats[schedule[turn]]
+    return ctx.tables.story_beats[-1]  # final stage
@@ -0,0 +1,106 @@
+import numpy as np
+
+# independent substreams of a run, one per subsystem that draws random numbers
+SUBSYSTEMS = ("encounter", "combat", "death", "loot", "non_combat")
+# draws generated per refill of a stream buffer
+BUFFER = 4096
+
+
+def seed_sequence(seed: int | tuple | np.random.SeedSequence | None) -> np.random.SeedSequence:
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def child(seed: np.random.SeedSequence, index: int) -> np.random.SeedSequence:
+    """
+    Child `index` of a seed sequence. Same as the index-th `seed.spawn()`, but stateless, so
+    the same seed always yields the same children.
+    """
+    return np.random.SeedSequence(
+        seed.entropy, spawn_key=seed.spawn_key + (index,), pool_size=seed.pool_size
+    )
+
+
+class Stream:
+    """
+    A subsystem's generator drawn in blocks: uniforms and standard normals are generated
+    BUFFER at a time and handed out one by one. `random()` matches random.Random.random.
+    """
+
+    __slots__ = (
+        "generator",
+        "size",
+        "_uniforms",
+        "_normals",
+        "_uniforms_from",
+        "_normals_from",
+    )
+
+    def __init__(self, seed: np.random.SeedSequence, size: int = BUFFER):
+        self.generator = np.random.default_rng(seed)
+        self.size = size
+        self._uniforms: list[float] = []
+        self._normals: list[float] = []
+        # generator state each buffer was drawn from, so pickling needs no buffer contents
+        self._uniforms_from: dict | None = None
+        self._normals_from: dict | None = None
+
+    def random(self) -> float:
+        """Uniform in [0, 1)"""
+        if not self._uniforms:
+            self._uniforms_from = self.generator.bit_generator.state
+            self._uniforms = self.generator.random(self.size).tolist()
+        return self._uniforms.pop()
+
+    def normal(self) -> float:
+        """Standard normal"""
+        if not self._normals:
+            self._normals_from = self.generator.bit_generator.state
+            self._normals = self.generator.standard_normal(self.size).tolist()
+        return self._normals.pop()
+
+    def __getstate__(self) -> tuple:
+        return (
+            self.generator.bit_generator.state,
+            self.size,
+            (self._uniforms_from, len(self._uniforms)),
+            (self._normals_from, len(self._normals)),
+        )
+
+    def __setstate__(self, state: tuple):
+        current, self.size, uniforms, normals = state
+        self._uniforms_from, uniforms = uniforms
+        self._normals_from, normals = normals
+        self.generator = np.random.default_rng()
+        bits = self.generator.bit_generator
+
+        # redraw the buffers, draws are popped from the end so the first ones are left
+        self._uniforms = []
+        if uniforms:
+            bits.state = self._uniforms_from
+            self._uniforms = self.generator.random(self.size).tolist()[:uniforms]
+        self._normals = []
+        if normals:
+            bits.state = self._normals_from
+            self._normals = self.generator.standard_normal(self.size).tolist()[:normals]
+        bits.state = current
+
+
+class Streams:
+    """
+    The random streams of one run, an attribute per SUBSYSTEMS entry. Each is seeded from its
+    own child of the run's seed sequence, so a subsystem drawing more or less never shifts
+    the others, and runs seeded with distinct children are independent in any process.
+    """
+
+    encounter: Stream
+    combat: Stream
+    death: Stream
+    loot: Stream
+    non_combat: Stream
+
+    def __init__(self, seed: int | tuple | np.random.SeedSequence | None, stream=Stream):
+        seed = seed_sequence(seed)
+        for i, name in enumerate(SUBSYSTEMS):
+            setattr(self, name, stream(child(seed, i)))
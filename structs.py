@@ -1,6 +1,14 @@
+import bisect
+import dataclasses
 import parser
+from collections import deque
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:
+    import tables
 
+
+@dataclasses.dataclass(slots=True)
 class World(parser.CSVRow):
     BeatNum: int = 0
     Stage: str = ""
@@ -11,6 +19,7 @@ class World(parser.CSVRow):
     ZoneTier: int = 1
 
 
+@dataclasses.dataclass(slots=True)
 class NonCombat(parser.CSVRow):
     Category: str = ""
     T1: float = 0.0
@@ -29,12 +38,14 @@ class NonCombat(parser.CSVRow):
     FailRisk: float = 0.0
 
 
+@dataclasses.dataclass(slots=True)
 class Stats(parser.CSVRow):
     StatKey: str = ""
     Base: int = 0
-    PerLevel: float = 0
+    PerLevel: float = 0.0
 
 
+@dataclasses.dataclass(slots=True)
 class Loot(parser.CSVRow):
     ItemID: int
     Slot: str
@@ -44,30 +55,53 @@ class Loot(parser.CSVRow):
 
 
 class Equipment:
-    weapon: int = 15
-    helm: int = 15
-    chest: int = 15
-    legs: int = 15
-    accessory: int = 15
+    weapon: int
+    helm: int
+    chest: int
+    legs: int
+    accessory: int
+
+    _score: int | None
+
+    def __init__(self):
+        self.weapon = 15
+        self.helm = 15
+        self.chest = 15
+        self.legs = 15
+        self.accessory = 15
+        self._score = None
 
     def get_score(self) -> int:
-        return self.weapon + self.helm + self.chest + self.legs + self.accessory
+        # summed once per change of equipment, not per read
+        if self._score is None:
+            self._score = self.weapon + self.helm + self.chest + self.legs + self.accessory
+        return self._score
+
+    def equip(self, loot: Loot) -> bool:
+        """Equip `loot` if it beats the item in its slot, returns whether it was equipped"""
+        slot = _SLOT_ATTRS.get(loot.Slot, "accessory")
+        if loot.BaseItemPower > getattr(self, slot):
+            setattr(self, slot, loot.BaseItemPower)
+            self._score = None
+            return True
+        return False
 
     def equip_best(self, loot: list[Loot]):
         for l in loot:
-            match l.Slot:
-                case "Weapon":
-                    self.weapon = max(self.weapon, l.BaseItemPower)
-                case "Helm":
-                    self.helm = max(self.helm, l.BaseItemPower)
-                case "Chest":
-                    self.chest = max(self.chest, l.BaseItemPower)
-                case "Boots":
-                    self.legs = max(self.legs, l.BaseItemPower)
-                case _:
-                    self.accessory = max(self.accessory, l.BaseItemPower)
+            self.equip(l)
 
 
+# LootTable.csv slot name -> Equipment attribute, anything else is an accessory
+_SLOT_ATTRS = {
+    "Weapon": "weapon",
+    "Helm": "helm",
+    "Chest": "chest",
+    "Legs": "legs",
+    "Boots": "legs",
+}
+
+
+@dataclasses.dataclass(slots=True)
 class Progression(parser.CSVRow):
     Level: int
     XP_to_Next: int
@@ -76,75 +110,80 @@ class Progression(parser.CSVRow):
 
 
 class Player:
-    _exp: int = 0
-    level: int = 1
+    _exp: int
+    level: int
 
-    _loot: list[Loot] = []
-    equipment = Equipment()
+    _loot: deque[Loot] | None
+    equipment: Equipment
 
-    gold: int = 0
+    gold: int
 
-    _progression: list[Progression]
+    _cumulative_xp: list[int]
     _stats: list[Stats]
+    _stat_by_key: dict[str, Stats]
 
-    def __init__(self):
-        self._progression = parser.read_csv("data/Progression.csv", Progression)
-        self._stats = parser.read_csv("data/Stats.csv", Stats)
+    # utils.stat_score per stat key, cleared whenever level or equipment changes
+    stat_scores: dict[str, float]
+
+    def __init__(self, tables: "tables.Tables", loot_history: int = 0):
+        self._exp = 0
+        self.level = 1
+
+        # equipment is updated per drop, so the inventory is only kept as optional history
+        if loot_history == 0:
+            self._loot = None
+        else:
+            self._loot = deque(maxlen=loot_history if loot_history > 0 else None)
+        self.equipment = Equipment()
+
+        self.gold = 0
+
+        # shared, read-only tables; never re-parsed per player
+        self._cumulative_xp = tables.cumulative_xp
+        self._stats = tables.stats
+        self._stat_by_key = tables.stat_by_key
+
+        self.stat_scores = {}
 
     def award_exp(self, amount: int):
         self._exp += amount
 
-        for p in self._progression:
-            if p.Level == self.level:
-                if self._exp >= p.XP_to_Next:
-                    self.level += 1
-                    self._exp -= p.XP_to_Next
+        cumulative = self._cumulative_xp
+        if self.level >= len(cumulative):
+            return  # max level, XP keeps accumulating
+
+        if self._exp >= cumulative[self.level] - cumulative[self.level - 1]:
+            # a large award can cross several levels at once
+            total = cumulative[self.level - 1] + self._exp
+            self.level = bisect.bisect_right(cumulative, total)
+            self._exp = total - cumulative[self.level - 1]
+            self.stat_scores.clear()
 
     def award_gold(self, amount: int):
         self.gold += amount
 
     def award_loot(self, loot: Loot):
-        self._loot.append(loot)
-        self.equipment.equip_best(self._loot)
+        if self._loot is not None:
+            self._loot.append(loot)
+        if self.equipment.equip(loot):
+            self.stat_scores.clear()
 
     def culumative_exp(self) -> int:
-        total = self._exp
-
-        for p in self._progression:
-            if p.Level < self.level:
-                total += p.XP_to_Next
-
-        return total
+        return self._cumulative_xp[self.level - 1] + self._exp
 
     def get_stat(self, stat_key: str) -> Stats:
-        for stat in self._stats:
-            if stat.StatKey == stat_key:
-                return stat
-        return self._stats[0]
+        return self._stat_by_key.get(stat_key, self._stats[0])
 
 
+@dataclasses.dataclass(slots=True)
 class NCCategory(parser.CSVRow):
     OutcomeCategory: str
     StatKey: str
     CategoryDC: int
 
 
-class Statistics:
-    Success: bool = False
-    Death: bool = False
-    XP_Earned: int = 0
-    Gold_Earned: int = 0
-    DropID: int = 0
-    Gold_Spent: int = 0
-
-    Power_Ratio: float = 0
-    SuccessChanceCombat: float = 0
-    DeathChance: float = 0
-    StatScore: float = 0
-    SuccessChance_NonCombat: float = 0
-    OutcomeCategory: str = ""
-    SkillDifficulty: int = 0
-    CatStatKey: str = ""
-    CategoryDC: int = 0
-    BaseStat: int = 0
-    PerLevel: float = 0
+@dataclasses.dataclass(slots=True)
+class DebugSetting(parser.CSVRow):
+    Key: str
+    Value: str
+    Notes: str
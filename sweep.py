@@ -0,0 +1,221 @@
+import argparse
+import batch
+import config
+import hashlib
+import inputs
+import itertools
+import json
+import kpi
+import os
+import random
+import streams
+import tables
+from concurrent.futures import ProcessPoolExecutor
+
+cache_dir = os.path.join(tables.data_dir, "sweep_cache")
+sweep_file = os.path.join(tables.data_dir, "sweep.csv")
+
+
+def grid(ranges: dict[str, list]) -> list[dict]:
+    """Full factorial design over the listed values of each parameter"""
+    names = list(ranges)
+    return [dict(zip(names, values)) for values in itertools.product(*ranges.values())]
+
+
+def latin_hypercube(
+    bounds: dict[str, tuple[float, float]], samples: int, seed: int = inputs.SEED
+) -> list[dict]:
+    """`samples` points with exactly one point in each of `samples` strata per parameter"""
+    rng = random.Random(seed)
+    columns = {}
+    for name, (lo, hi) in bounds.items():
+        strata = list(range(samples))
+        rng.shuffle(strata)
+        columns[name] = [lo + (hi - lo) * (s + rng.random()) / samples for s in strata]
+    return [{name: columns[name][i] for name in bounds} for i in range(samples)]
+
+
+def random_search(
+    bounds: dict[str, tuple[float, float]], samples: int, seed: int = inputs.SEED
+) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {name: rng.uniform(lo, hi) for name, (lo, hi) in bounds.items()}
+        for _ in range(samples)
+    ]
+
+
+def data_digest(root: str | None = None) -> str:
+    """Hash of the contents of every CSV the simulation reads"""
+    root = root or tables.data_dir
+    digest = hashlib.sha256()
+    for name in tables.FILES:
+        with open(os.path.join(root, name), mode="rb") as file:
+            digest.update(name.encode())
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def point_key(
+    cfg: config.Config, runs: int, turns: int, engine: str, data: str, summary: bool = False
+) -> str:
+    """Cache key of one sweep point: parameters, CSV contents, seed, RNG streams, run shape"""
+    fields = {
+        "cfg": cfg.as_dict(),
+        "runs": runs,
+        "turns": turns,
+        "engine": engine,
+        "data": data,
+        "streams": streams.SUBSYSTEMS,
+    }
+    if summary:
+        fields["summary"] = True
+    payload = json.dumps(fields, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _run_point(job: tuple[config.Config, int, int, str, bool]) -> dict:
+    cfg, runs, turns, engine, summary = job
+    if summary:
+        return batch.run_summary(
+            runs, turns, workers=1, seed=cfg.SEED, run_id=cfg.RUN_ID, cfg=cfg
+        ).as_dict()
+    return batch.run_batch(
+        runs, turns, workers=1, seed=cfg.SEED, run_id=cfg.RUN_ID, engine=engine, cfg=cfg
+    )
+
+
+def run_sweep(
+    points: list[dict],
+    runs: int,
+    turns: int = inputs.TURNS,
+    workers: int | None = None,
+    engine: str = "scalar",
+    cache: str = cache_dir,
+    summary: bool = False,
+) -> list[tuple[dict, dict]]:
+    """
+    Run a batch per point in parallel, reusing cached results for points whose parameters,
+    CSV tables and seed are unchanged. With `summary`, each point keeps only the cross-run
+    KPI summary of kpi.Summary instead of per-turn bands (scalar engine).
+
+    Returns:
+        [(point, bands or summary)] in the order of `points`
+    """
+    unread = sorted({name.split(".")[-1] for point in points for name in point} & config.UNREAD)
+    if unread:
+        raise ValueError(
+            f"no turn rule reads {', '.join(unread)}: every point would run the same simulation"
+        )
+
+    kind = "summary" if summary else "bands"
+    os.makedirs(cache, exist_ok=True)
+    data = data_digest()
+    base = config.default()
+
+    cfgs = [base.replace(**point) for point in points]
+    paths = [
+        os.path.join(cache, f"{point_key(c, runs, turns, engine, data, summary)}.json")
+        for c in cfgs
+    ]
+
+    results: dict[int, dict] = {}
+    missing = []
+    for i, path in enumerate(paths):
+        if os.path.exists(path):
+            with open(path) as file:
+                results[i] = json.load(file)[kind]
+        else:
+            missing.append(i)
+
+    if missing:
+        jobs = [(cfgs[i], runs, turns, engine, summary) for i in missing]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for i, bands in zip(missing, pool.map(_run_point, jobs)):
+                with open(paths[i], mode="w") as file:
+                    json.dump({"point": points[i], kind: bands}, file)
+                # same shape as a cache hit: percentile and level keys become strings in JSON
+                results[i] = json.loads(json.dumps(bands))
+
+    return [(points[i], results[i]) for i in range(len(points))]
+
+
+def write_sweep(results: list[tuple[dict, dict]], path: str = sweep_file):
+    """One row per point: its parameters and the final-turn percentiles of every metric"""
+    names = list(results[0][0])
+    columns = [(m, p) for m in batch.METRICS for p in results[0][1][m]]
+
+    with open(path, mode="w") as file:
+        file.write(",".join(names + [f"{m}_P{p}" for m, p in columns]) + "\n")
+        for point, bands in results:
+            values = [str(point[n]) for n in names]
+            values += [f"{bands[m][p][-1]:.3f}" for m, p in columns]
+            file.write(",".join(values) + "\n")
+
+
+def write_sweep_summary(results: list[tuple[dict, dict]], path: str = sweep_file):
+    """One row per point: its parameters and the mean, SD and quantiles of every KPI"""
+    names = list(results[0][0])
+    columns = [(m, k) for m in kpi.KPIS for k in results[0][1][m] if k != "Runs"]
+
+    with open(path, mode="w") as file:
+        file.write(",".join(names + [f"{m}_{k}" for m, k in columns]) + "\n")
+        for point, summary in results:
+            values = [str(point[n]) for n in names]
+            values += [f"{summary[m][k]:.3f}" for m, k in columns]
+            file.write(",".join(values) + "\n")
+
+
+def _parse_values(spec: str) -> tuple[str, list[str]]:
+    name, values = spec.split("=", 1)
+    return name, values.split(",")
+
+
+def _parse_bounds(spec: str) -> tuple[str, tuple[float, float]]:
+    name, values = spec.split("=", 1)
+    lo, hi = values.split(":")
+    return name, (float(lo), float(hi))
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Parameter sweep with cached results")
+    arg_parser.add_argument(
+        "--grid", action="append", default=[], help="NAME=v1,v2,... (repeatable)"
+    )
+    arg_parser.add_argument(
+        "--lhs", action="append", default=[], help="NAME=lo:hi, Latin hypercube"
+    )
+    arg_parser.add_argument(
+        "--random", action="append", default=[], help="NAME=lo:hi, random search"
+    )
+    arg_parser.add_argument("--samples", type=int, default=10)
+    arg_parser.add_argument("--runs", type=int, default=200)
+    arg_parser.add_argument("--turns", type=int, default=inputs.TURNS)
+    arg_parser.add_argument("--workers", type=int, default=None)
+    arg_parser.add_argument("--engine", choices=("scalar", "vector"), default="scalar")
+    arg_parser.add_argument(
+        "--summary", action="store_true", help="KPI summaries only, no per-turn data"
+    )
+    arg_parser.add_argument("--out", default=sweep_file)
+    args = arg_parser.parse_args()
+
+    if args.grid:
+        points = grid(dict(_parse_values(spec) for spec in args.grid))
+    elif args.lhs:
+        points = latin_hypercube(dict(_parse_bounds(s) for s in args.lhs), args.samples)
+    elif args.random:
+        points = random_search(dict(_parse_bounds(s) for s in args.random), args.samples)
+    else:
+        arg_parser.error("one of --grid, --lhs or --random is required")
+
+    if args.summary and args.engine != "scalar":
+        arg_parser.error("--summary runs the scalar engine")
+
+    try:
+        results = run_sweep(
+            points, args.runs, args.turns, args.workers, args.engine, summary=args.summary
+        )
+    except (KeyError, ValueError) as e:
+        arg_parser.error(str(e))
+    (write_sweep_summary if args.summary else write_sweep)(results, args.out)
+    print(f"Saved: {args.out} ({len(points)} points)")
@@ -0,0 +1,191 @@
+import functools
+import os
+import parser
+import pickle
+import structs
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import loot
+
+# data root, independent of the working directory; RPG_DATA_DIR overrides it
+data_dir = os.environ.get(
+    "RPG_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+)
+
+# compiled tables live next to the CSVs they were parsed from
+CACHE_DIR = ".cache"
+# bump when the row classes change layout so old caches are reparsed
+CACHE_VERSION = 2
+
+# every CSV a Tables instance is built from
+FILES = (
+    "Progression.csv",
+    "Stats.csv",
+    "LootTable.csv",
+    "StoryBeats.csv",
+    "NC_Categories.csv",
+    "NonCombat.csv",
+    "DebugConfig.csv",
+)
+
+
+class Tables:
+    """
+    CSV tables of one data root, shared read-only by every run in the process. Each table is
+    loaded on first use, from a pickled copy when the CSV's mtime and size are unchanged.
+    """
+
+    def __init__(self, root: str | None = None):
+        self.root = root or data_dir
+
+    def warm(self) -> "Tables":
+        """Load every table and derived index now instead of on first use"""
+        for name, attr in vars(Tables).items():
+            if isinstance(attr, functools.cached_property):
+                getattr(self, name)
+        return self
+
+    def _load(self, file_name: str, cls: type) -> list:
+        path = os.path.join(self.root, file_name)
+        cache_path = os.path.join(self.root, CACHE_DIR, f"{file_name}.pickle")
+
+        # a changed CSV or a changed row class both invalidate the cached copy
+        stat = os.stat(path)
+        stamp = (
+            CACHE_VERSION,
+            stat.st_mtime_ns,
+            stat.st_size,
+            cls.__qualname__,
+            tuple(cls.__annotations__),
+        )
+
+        try:
+            with open(cache_path, mode="rb") as file:
+                cached_stamp, rows = pickle.load(file)
+            if cached_stamp == stamp:
+                return rows
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, TypeError, ValueError):
+            pass  # missing or unreadable cache, parse the CSV
+
+        rows = parser.read_csv(path, cls)
+
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, mode="wb") as file:
+                pickle.dump((stamp, rows), file, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass  # read-only data root, keep working without a cache
+
+        return rows
+
+    @functools.cached_property
+    def progression(self) -> list[structs.Progression]:
+        return self._load("Progression.csv", structs.Progression)
+
+    @functools.cached_property
+    def stats(self) -> list[structs.Stats]:
+        return self._load("Stats.csv", structs.Stats)
+
+    @functools.cached_property
+    def loot(self) -> list[structs.Loot]:
+        return self._load("LootTable.csv", structs.Loot)
+
+    @functools.cached_property
+    def story_beats(self) -> list[structs.World]:
+        return self._load("StoryBeats.csv", structs.World)
+
+    @functools.cached_property
+    def nc_categories(self) -> list[structs.NCCategory]:
+        return self._load("NC_Categories.csv", structs.NCCategory)
+
+    @functools.cached_property
+    def non_combat(self) -> list[structs.NonCombat]:
+        return self._load("NonCombat.csv", structs.NonCombat)
+
+    @functools.cached_property
+    def debug_config(self) -> dict[str, str]:
+        return {
+            row.Key: row.Value
+            for row in self._load("DebugConfig.csv", structs.DebugSetting)
+        }
+
+    @functools.cached_property
+    def cumulative_xp(self) -> list[int]:
+        """cumulative_xp[i] is the total XP needed to reach level i + 1"""
+        cumulative = [0]
+        for p in sorted(self.progression, key=lambda p: p.Level):
+            cumulative.append(cumulative[-1] + p.XP_to_Next)
+        return cumulative
+
+    @functools.cached_property
+    def stat_by_key(self) -> dict[str, structs.Stats]:
+        """First row per StatKey"""
+        index: dict[str, structs.Stats] = {}
+        for stat in self.stats:
+            index.setdefault(stat.StatKey, stat)
+        return index
+
+    @functools.cached_property
+    def nc_category_by_key(self) -> dict[str, structs.NCCategory]:
+        """Last row per OutcomeCategory"""
+        return {cat.OutcomeCategory: cat for cat in self.nc_categories}
+
+    @functools.cached_property
+    def nc_default_category(self) -> structs.NCCategory:
+        """Category picked when a roll matches no scenario threshold"""
+        return self.nc_category_by_key.get(
+            self.non_combat[0].Category, self.nc_categories[0]
+        )
+
+    @functools.cached_property
+    def nc_thresholds(self) -> dict[int, tuple[list[float], list[structs.NCCategory]]]:
+        """
+        Per zone tier, the running maximum of the scenario thresholds and each scenario's
+        category. The first scenario whose threshold covers a roll is found with bisect_left.
+        """
+        index = {}
+        for tier in (1, 2, 3, 4):
+            thresholds = []
+            categories = []
+            for s in self.non_combat:
+                thresh = getattr(s, f"T{tier}Threshold")
+                thresholds.append(max(thresh, thresholds[-1]) if thresholds else thresh)
+                categories.append(
+                    self.nc_category_by_key.get(s.Category, self.nc_categories[0])
+                )
+            index[tier] = (thresholds, categories)
+        return index
+
+    @functools.cached_property
+    def beat_schedule(self) -> list[int]:
+        """
+        Index of the active story beat after each turn, until the last beat is reached. Beats
+        advance at most once per turn, when the turn reaches the next beat's BeatStartStep.
+        """
+        schedule = []
+        beat = 0
+        turn = 0
+        while beat < len(self.story_beats) - 1:
+            if turn >= self.story_beats[beat + 1].BeatStartStep:
+                beat += 1
+            schedule.append(beat)
+            turn += 1
+        return schedule
+
+    @functools.cached_property
+    def loot_index(self) -> "loot.LootIndex":
+        import loot
+
+        return loot.LootIndex(self.loot)
+
+
+_default: Tables | None = None
+
+
+def default() -> Tables:
+    """Process-wide tables of `data_dir`, each loaded on first use"""
+    global _default
+    if _default is None or _default.root != data_dir:
+        _default = Tables()
+    return _default
@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+
+import assertions
+import log
+
+STEP_RULE = "Step t+1 exists when t outcome not terminal"
+
+
+def _checker() -> assertions.Checker:
+    rules = [
+        assertions.compile_rule("PowerRatioValid", "0<=PowerRatio<=10"),
+        assertions.compile_rule("StepProgresses", STEP_RULE),
+    ]
+    return assertions.Checker(rules)
+
+
+def _rows(**columns: list) -> list[tuple]:
+    turns = len(next(iter(columns.values())))
+    values = {name: [0] * turns for name in log.TURN_FIELDS}
+    values.update(columns)
+    return list(zip(*(values[name] for name in log.TURN_FIELDS)))
+
+
+def test_compile_rule():
+    assert isinstance(assertions.compile_rule("A", "0<=PowerRatio<=10"), assertions.BoundRule)
+    assert isinstance(assertions.compile_rule("B", "Step t+1 exists"), assertions.StepRule)
+    assert assertions.compile_rule("C", "0<=LootRoll<=1") == "LootRoll is not recorded"
+    assert assertions.compile_rule("D", "IFERROR(1,0)") == "spreadsheet formula"
+
+
+def test_failing_rows_and_notes():
+    checker = _checker()
+    notes = checker.check_rows(_rows(Step=[1, 2, 4, 5], PowerRatio=[1.0, 12.0, 3.0, -1.0]))
+
+    assert notes == {
+        1: "PowerRatioValid: 0<=PowerRatio<=10 (first failed at step 2)",
+        2: f"StepProgresses: {STEP_RULE} (first failed at step 4)",
+        3: "PowerRatioValid: 0<=PowerRatio<=10 (first failed at step 2)",
+    }
+    assert checker.failures == {"PowerRatioValid": 2, "StepProgresses": 1}
+
+    # the step rule carries the last step of the previous block
+    checker.check_rows(_rows(Step=[7], PowerRatio=[1.0]))
+    assert checker.failures["StepProgresses"] == 2
+    assert not checker.passed
+
+
+def test_audit_status(tmp_path):
+    checker = _checker()
+    columns = {
+        "Step": np.array([1, 2, 3]),
+        "PowerRatio": np.array([1.0, 2.0, 3.0]),
+        "Success?": np.array([True, False, True]),
+        "XP_Earned": np.array([10, 5, 0]),
+        "Gold_Earned": np.array([3, 0, 1]),
+        "SuccessChanceCombat": np.array([0.5, 0.0, 0.0]),
+        "DeathChance": np.array([0.1, 0.0, 0.0]),
+        "StatScore": np.array([0.0, 4.0, math.nan]),
+        "SuccessChance_NonCombat": np.array([0.0, 0.9, 0.8]),
+    }
+    checker.check(columns)
+    checker.audit_block(columns)
+    path = tmp_path / "audit.csv"
+    assertions.write_regression(checker, str(path))
+
+    audit = dict(line.split(",") for line in path.read_text().splitlines())
+    assert audit["Audit_Status"] == "FAIL"
+    assert audit["RowCount"] == "3"
+    assert audit["CombatRows"] == "1"
+    assert audit["No_VALUE_Errors"] == "1"
+    assert audit["XP_Changes_NC"] == "5"
+    assert audit["Gold_Changes_NC"] == "1"
+    assert not any(checker.failures.values())
@@ -0,0 +1,20 @@
+from array import array
+
+import batch
+
+
+def test_reduce_bands_per_turn_percentiles():
+    # run r has value r + turn on every metric, so each turn's values are 0..4 shifted
+    traces = [
+        {metric: array("d", [r + turn for turn in range(3)]) for metric in batch.METRICS}
+        for r in (4, 0, 3, 1, 2)
+    ]
+    bands = batch.reduce_bands(traces, 3, (0, 25, 50, 90, 100))
+    for metric in batch.METRICS:
+        assert bands[metric] == {
+            0: [0.0, 1.0, 2.0],
+            25: [1.0, 2.0, 3.0],
+            50: [2.0, 3.0, 4.0],
+            90: [3.6, 4.6, 5.6],
+            100: [4.0, 5.0, 6.0],
+        }
@@ -0,0 +1,29 @@
+import chances
+import config
+import tables
+import utils
+
+
+def test_tables_match_live_formulas():
+    errors = chances.check()
+    assert errors["Combat"] < 1e-3
+    assert errors["NonCombat"] < 1e-3
+
+
+def test_scalar_lookups_match_live_formulas():
+    data = tables.default()
+    cfg = config.default()
+    compiled_tables = chances.compiled(data, cfg)
+    category = data.nc_categories[0]
+    stat = data.stat_by_key.get(category.StatKey, data.stats[0])
+    for world in data.story_beats:
+        zone_gear = utils.recommended_gear(cfg, world.ZoneLevel)
+        for score in range(compiled_tables.max_score + 1):
+            live = utils.logistic(score / zone_gear - world.BeatDC / 20)
+            assert abs(compiled_tables.combat_chance(world, score) - live) < 1e-3
+
+            live = utils.category_chance(
+                cfg, category, world.BeatDC, utils.stat_value(cfg, stat, 3, score)
+            )
+            table = compiled_tables.non_combat_chance(world, category.OutcomeCategory, 3, score)
+            assert abs(table - live) < 1e-3
@@ -0,0 +1,54 @@
+import checkpoint
+import context
+import kpi
+import log
+import records
+import simulate
+
+TURNS = 120
+
+
+def _play(ctx: context.SimContext, kpis: kpi.RunKPIs, writer, start: int, end: int):
+    scratch = records.TurnRecords(records.RING_ROWS, ring=True)
+    for turn in range(start, end):
+        i = simulate.step(ctx, turn, scratch)
+        if writer is not None:
+            writer.record(turn, ctx, scratch, i)
+        kpis.update(turn, ctx, scratch, i)
+
+
+def _snapshot() -> bytes:
+    ctx = context.SimContext(5)
+    kpis = kpi.RunKPIs()
+    writer = log.RunWriter(log.MemorySink())
+    _play(ctx, kpis, writer, 0, TURNS // 2)
+    return checkpoint.snapshot(TURNS // 2, ctx, kpis, writer)
+
+
+def test_resume_is_bit_identical():
+    ctx = context.SimContext(5)
+    kpis = kpi.RunKPIs()
+    writer = log.RunWriter(log.MemorySink())
+    _play(ctx, kpis, writer, 0, TURNS)
+    writer.flush()
+
+    run = checkpoint.restore(_snapshot())
+    resumed = log.RunWriter.resume(run.writer)
+    _play(run.ctx, run.kpis, resumed, run.turn, TURNS)
+    resumed.flush()
+
+    assert run.turn == TURNS // 2
+    assert resumed.sink.rows == writer.sink.rows
+    assert len(resumed.sink.rows) == TURNS
+    assert run.kpis.values(run.ctx) == kpis.values(ctx)
+
+
+def test_fork_branches_diverge():
+    rows = []
+    for run in checkpoint.fork(_snapshot(), 2):
+        writer = log.RunWriter(log.MemorySink())
+        _play(run.ctx, run.kpis, writer, run.turn, TURNS)
+        writer.flush()
+        rows.append(writer.sink.rows)
+    assert len(rows[0]) == len(rows[1]) == TURNS - TURNS // 2
+    assert rows[0] != rows[1]
@@ -0,0 +1,7 @@
+import fastforward
+
+
+def test_modes_agree():
+    results = fastforward.compare_modes(runs=300, turns=60)
+    failed = {metric: result for metric, result in results.items() if not result[2]}
+    assert not failed
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import kpi
+
+
+@pytest.fixture
+def samples() -> np.ndarray:
+    return np.random.default_rng(7).lognormal(3, 0.5, 5000)
+
+
+@pytest.mark.parametrize("p", kpi.QUANTILES)
+def test_p2_quantile_tracks_numpy(samples, p):
+    estimate = kpi.P2Quantile(p)
+    for x in samples.tolist():
+        estimate.update(x)
+    exact = np.percentile(samples, p)
+    assert estimate.value() == pytest.approx(exact, rel=0.02)
+
+
+def test_p2_quantile_is_exact_up_to_five_values():
+    estimate = kpi.P2Quantile(50)
+    for x in (5.0, 1.0, 4.0, 2.0, 3.0):
+        estimate.update(x)
+    assert estimate.value() == 3.0
+
+
+def test_welford_matches_numpy(samples):
+    whole, left, right = kpi.Welford(), kpi.Welford(), kpi.Welford()
+    for x in samples.tolist():
+        whole.update(x)
+    for x in samples[:1000].tolist():
+        left.update(x)
+    for x in samples[1000:].tolist():
+        right.update(x)
+    left.merge(right)
+
+    for stats in (whole, left):
+        assert stats.n == len(samples)
+        assert stats.mean == pytest.approx(np.mean(samples))
+        assert stats.variance == pytest.approx(np.var(samples, ddof=1))
+        assert (stats.min, stats.max) == (samples.min(), samples.max())
+
+
+def test_histogram_bins_by_lower_edge():
+    histogram = kpi.Histogram(10)
+    for x in (0, 9, 10, 25, 29):
+        histogram.update(x)
+    assert histogram.counts == {0: 2, 10: 1, 20: 2}
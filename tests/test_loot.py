@@ -0,0 +1,60 @@
+import math
+
+import numpy as np
+import pytest
+
+import loot
+import streams
+import tables
+
+DRAWS = 100_000
+
+
+def _chi_square(counts: np.ndarray, probabilities: np.ndarray) -> float:
+    expected = DRAWS * probabilities
+    return float(((counts - expected) ** 2 / expected).sum())
+
+
+def _bound(cells: int) -> float:
+    # five standard deviations above the mean of a chi-square with cells - 1 degrees of freedom
+    df = cells - 1
+    return df + 5 * math.sqrt(2 * df)
+
+
+def test_alias_table_matches_weights():
+    weights = [0.5, 0.05, 0.2, 0.001, 0.249]
+    table = loot.AliasTable(list("abcde"), weights)
+    rng = streams.Stream(np.random.SeedSequence(11))
+    counts = np.bincount(
+        [table.sample_index(rng) for _ in range(DRAWS)], minlength=len(weights)
+    )
+    assert _chi_square(counts, np.asarray(weights)) < _bound(len(weights))
+
+
+@pytest.mark.parametrize("tier", [1, 2, 3, 4])
+def test_vectorized_draw_matches_weights(tier):
+    index = tables.default().loot_index
+    keys = index.samplers[tier].keys
+    weights = {
+        (tier, piece, quality): piece_weight * loot.QualityWeights[f"T{tier}"][quality]
+        for piece, piece_weight in loot.PieceWeights.items()
+        for quality in loot.QualityWeights[f"T{tier}"]
+    }
+
+    # every item shares its group's weight evenly, the last cell is the empty groups' -1
+    probabilities = []
+    empty = 0.0
+    for key in keys:
+        items = index.groups[key]
+        if items:
+            probabilities += [weights[key] / len(items)] * len(items)
+        else:
+            empty += weights[key]
+    probabilities = np.asarray(probabilities + [empty]) / sum(weights.values())
+
+    picks = index.draw(tier, DRAWS, np.random.default_rng(tier))
+    cells = len(probabilities)
+    counts = np.bincount(np.where(picks < 0, cells - 1, picks), minlength=cells)
+    if not empty:
+        probabilities, counts = probabilities[:-1], counts[:-1]
+    assert _chi_square(counts, probabilities) < _bound(len(probabilities))
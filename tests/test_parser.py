@@ -0,0 +1,34 @@
+import dataclasses
+
+import parser
+
+
+@dataclasses.dataclass(slots=True)
+class Row(parser.CSVRow):
+    Name: str
+    Level: int
+    Scale: float
+    Enabled: bool
+    Note: str = "none"
+
+
+def _sheet(tmp_path) -> str:
+    path = tmp_path / "sheet.csv"
+    path.write_text("Name,Level,Scale,Enabled\nsword,3,1.5,TRUE\n\nshield,12,0.25,0\n,,,\n\n")
+    return str(path)
+
+
+def test_read_csv_skips_blank_lines(tmp_path):
+    assert parser.read_csv(_sheet(tmp_path), Row) == [
+        Row("sword", 3, 1.5, True),
+        Row("shield", 12, 0.25, False),
+    ]
+
+
+def test_read_columns_types(tmp_path):
+    columns = parser.read_columns(_sheet(tmp_path), Row)
+    assert columns["Name"] == ["sword", "shield"]
+    assert columns["Level"].typecode == "q" and list(columns["Level"]) == [3, 12]
+    assert list(columns["Scale"]) == [1.5, 0.25]
+    assert list(columns["Enabled"]) == [1, 0]
+    assert "Note" not in columns
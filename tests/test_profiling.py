@@ -0,0 +1,26 @@
+import context
+import profiling
+import records
+import simulate
+
+
+def _play(phases: simulate.Phases, turns: int = 200) -> list[int]:
+    ctx = context.SimContext(5)
+    turn_records = records.TurnRecords(turns)
+    for turn in range(turns):
+        simulate.step(ctx, turn, turn_records, phases)
+    return list(turn_records.XP_Earned)
+
+
+def test_phases_time_only_their_own_run():
+    profiler = profiling.Profiler()
+    profiled = _play(profiler.phases())
+    calls = dict(profiler.calls)
+    assert calls["combat"] + calls["non_combat"] == calls["progress_story"] == 200
+    assert calls["get_drop"] >= profiler.counts["drops"] > 0
+
+    # a run without the wrappers plays the same turns and is not counted
+    assert _play(simulate.PHASES) == profiled
+    assert dict(profiler.calls) == calls
+    assert simulate.PHASES.combat is simulate.combat
+
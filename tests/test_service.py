@@ -0,0 +1,87 @@
+import asyncio
+import shutil
+
+import pytest
+
+import batch
+import inputs
+import kpi
+import service
+import tables
+
+
+@pytest.fixture
+def svc():
+    svc = service.Service(workers=1)
+    yield svc
+    svc.close()
+
+
+async def _collect(svc: service.Service, body: dict, path: str = "/summary") -> list[dict]:
+    return [line async for line in svc.stream("POST", path, body)]
+
+
+def test_identical_summaries_share_jobs(svc):
+    jobs = []
+    submit = svc.pool.submit
+
+    def counted(*args, **kwargs):
+        jobs.append(args)
+        return submit(*args, **kwargs)
+
+    svc.pool.submit = counted
+    body = {"runs": 20, "turns": 30}
+
+    async def both():
+        return await asyncio.gather(_collect(svc, body), _collect(svc, body))
+
+    first, second = asyncio.run(both())
+    # 20 campaigns in chunks of BATCH_CHUNK, run once for both requests
+    assert len(jobs) == -(-20 // service.BATCH_CHUNK)
+    assert first[-1] == second[-1]
+    assert first[-1]["summary"]["Final Level"]["Runs"] == 20
+
+
+@pytest.mark.parametrize("overrides", [{"NOPE": 1}, {"ATTEMPT_SLOPE": "abc"}])
+def test_bad_override_is_rejected(svc, overrides):
+    with pytest.raises(service.RequestError) as error:
+        svc.stream("POST", "/summary", {"runs": 1, "set": overrides})
+    assert error.value.status == 400
+
+
+@pytest.mark.parametrize("body", [{"runs": True}, {"turns": False}])
+def test_bool_counts_are_rejected(svc, body):
+    with pytest.raises(service.RequestError) as error:
+        svc.stream("POST", "/summary", body)
+    assert error.value.status == 400
+
+
+def test_custom_data_dir(tmp_path):
+    for name in tables.FILES:
+        shutil.copy(f"{tables.data_dir}/{name}", tmp_path / name)
+    # ten times the XP per level
+    path = tmp_path / "Progression.csv"
+    header, *rows = path.read_text().splitlines()
+    rows = [row.split(",") for row in rows]
+    rows = [",".join([r[0], str(10 * int(r[1]))] + r[2:]) for r in rows]
+    path.write_text("\n".join([header] + rows) + "\n")
+
+    data = tables.Tables(str(tmp_path))
+    svc = service.Service(workers=1, data=data)
+    try:
+        body = {"runs": 3, "turns": 300}
+        summary = asyncio.run(_collect(svc, body))[-1]["summary"]
+        kpis = asyncio.run(_collect(svc, {"turns": 300, "every": 300}, "/run"))[-1]["kpis"]
+    finally:
+        svc.close()
+
+    expected = kpi.Summary()
+    for i in range(3):
+        seed = batch.run_seed(i, inputs.SEED, inputs.RUN_ID)
+        expected.add(*batch.summarize_campaign(seed, 300, data=data))
+    assert summary["Final Level"] == expected.as_dict()["Final Level"]
+
+    values, _ = batch.summarize_campaign(batch.run_seed(0), 300, data=data)
+    default, _ = batch.summarize_campaign(batch.run_seed(0), 300)
+    assert kpis == values
+    assert kpis["Final Level"] < default["Final Level"]
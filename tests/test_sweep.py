@@ -0,0 +1,11 @@
+import sweep
+
+
+def test_cache_hit_matches_cache_miss(tmp_path):
+    points = [{"ATTEMPT_SLOPE": 1.2}]
+    for summary in (False, True):
+        cache = tmp_path / str(summary)
+        miss = sweep.run_sweep(points, 8, turns=20, workers=1, cache=str(cache), summary=summary)
+        assert len(list(cache.iterdir())) == 1
+        hit = sweep.run_sweep(points, 8, turns=20, workers=1, cache=str(cache), summary=summary)
+        assert miss == hit
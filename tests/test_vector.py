@@ -0,0 +1,7 @@
+import vector
+
+
+def test_engines_agree():
+    results = vector.compare_engines(runs=300, turns=60)
+    failed = {metric: result for metric, result in results.items() if not result[2]}
+    assert not failed
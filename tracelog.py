@@ -0,0 +1,204 @@
+import json
+import log
+import mmap
+import os
+import sys
+import tables
+from array import array
+
+trace_dir = os.path.join(tables.data_dir, "output.trace")
+
+# array typecode per turn column; "s" columns are dictionary encoded strings
+COLUMN_TYPES = {
+    "Step": "i",
+    "PlayerLevel": "i",
+    "ActiveBeat#": "i",
+    "ActiveBeatName": "s",
+    "ZoneLevel": "i",
+    "PowerRatio": "d",
+    "OutcomeCategory": "s",
+    "SkillDifficulty": "i",
+    "Success?": "B",
+    "XP_Earned": "i",
+    "Gold_Earned": "i",
+    "DropID": "i",
+    "SuccessChanceCombat": "d",
+    "DeathChance": "d",
+    "Death?": "B",
+    "Gold_Spent": "i",
+    "NetGoldChange": "i",
+    "CumulativeGold": "q",
+    "CumulativeXP": "q",
+    "Eq_Weapon": "i",
+    "Eq_Chest": "i",
+    "Eq_Helm": "i",
+    "Eq_Legs": "i",
+    "Eq_Accessory": "i",
+    "GearScore": "i",
+    "CatStatKey": "s",
+    "CategoryDC": "i",
+    "BeatDC_lookup": "i",
+    "BaseStat": "i",
+    "PerLevel": "d",
+    "StatScore": "d",
+    "SuccessChance_NonCombat": "d",
+}
+
+# string columns are stored as codes into the label list kept in meta.json
+_CODE_TYPE = "H"
+
+
+def _storage_type(typecode: str) -> str:
+    return _CODE_TYPE if typecode == "s" else typecode
+
+
+def _column_file(index: int) -> str:
+    return f"{index:02d}.col"
+
+
+class TraceSink:
+    """
+    Writes turn rows as a columnar trace: one raw native-endian array file per column plus
+    meta.json with the schema and the label lists of the string columns.
+    """
+
+    def __init__(
+        self,
+        path: str = trace_dir,
+        rows: int = 0,
+        labels: dict[str, dict[str, int]] | None = None,
+    ):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.rows = rows
+        self._labels: dict[str, dict[str, int]] = labels or {
+            name: {} for name, typ in COLUMN_TYPES.items() if typ == "s"
+        }
+        self._files = []
+        for i, name in enumerate(log.TURN_FIELDS):
+            file = open(os.path.join(path, _column_file(i)), mode="ab" if rows else "wb")
+            # a resumed trace drops the rows written after its checkpoint
+            file.truncate(rows * array(_storage_type(COLUMN_TYPES[name])).itemsize)
+            self._files.append(file)
+        if rows:
+            self._write_meta()
+
+    def write(self, rows: list[tuple]):
+        for i, (name, values) in enumerate(zip(log.TURN_FIELDS, zip(*rows))):
+            typ = COLUMN_TYPES[name]
+            if typ == "s":
+                codes = self._labels[name]
+                values = [codes.setdefault(v, len(codes)) for v in values]
+            array(_storage_type(typ), values).tofile(self._files[i])
+
+        self.rows += len(rows)
+        self._write_meta()
+
+    def _write_meta(self):
+        meta = {
+            "rows": self.rows,
+            "byteorder": sys.byteorder,
+            "columns": [
+                {
+                    "name": name,
+                    "type": COLUMN_TYPES[name],
+                    "itemsize": array(_storage_type(COLUMN_TYPES[name])).itemsize,
+                    "file": _column_file(i),
+                }
+                for i, name in enumerate(log.TURN_FIELDS)
+            ],
+            "labels": {name: list(codes) for name, codes in self._labels.items()},
+        }
+        with open(os.path.join(self.path, "meta.json"), mode="w") as file:
+            json.dump(meta, file)
+
+    def checkpoint(self) -> tuple:
+        for file in self._files:
+            file.flush()
+        labels = {name: dict(codes) for name, codes in self._labels.items()}
+        return TraceSink, (self.path, self.rows, labels)
+
+    def close(self):
+        for file in self._files:
+            file.close()
+
+
+class Trace:
+    """Memory-mapped, read-only view of a trace written by TraceSink"""
+
+    def __init__(self, path: str = trace_dir):
+        with open(os.path.join(path, "meta.json")) as file:
+            meta = json.load(file)
+
+        if meta["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written on a {meta['byteorder']}-endian machine")
+
+        self.rows: int = meta["rows"]
+        self.labels: dict[str, list[str]] = meta["labels"]
+        self.types: dict[str, str] = {}
+        self._maps: list[mmap.mmap] = []
+        self._columns: dict[str, memoryview] = {}
+
+        for column in meta["columns"]:
+            name, typ = column["name"], column["type"]
+            storage = _storage_type(typ)
+            if array(storage).itemsize != column["itemsize"]:
+                raise ValueError(f"{name}: item size differs from the writing machine")
+
+            self.types[name] = typ
+            size = self.rows * column["itemsize"]
+            if size == 0:
+                self._columns[name] = memoryview(array(storage))
+                continue
+
+            with open(os.path.join(path, column["file"]), mode="rb") as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps.append(mapped)
+            self._columns[name] = memoryview(mapped)[:size].cast(storage)
+
+    def column(self, name: str) -> memoryview:
+        """Typed zero-copy column; string columns hold codes into `labels[name]`"""
+        return self._columns[name]
+
+    def strings(self, name: str) -> list[str]:
+        labels = self.labels[name]
+        return [labels[code] for code in self._columns[name]]
+
+    def close(self):
+        for view in self._columns.values():
+            view.release()
+        for mapped in self._maps:
+            mapped.close()
+
+    def __enter__(self) -> "Trace":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def to_csv(path: str = trace_dir, csv_path: str = log.output_file):
+    """Export a trace to the output.csv layout"""
+    with Trace(path) as trace:
+        columns = []
+        for name in log.TURN_FIELDS:
+            typ = trace.types[name]
+            if typ == "s":
+                columns.append(trace.strings(name))
+            elif typ == "B":
+                columns.append([bool(v) for v in trace.column(name)])
+            else:
+                columns.append(trace.column(name).tolist())
+
+    sink = log.CSVSink(csv_path)
+    rows = list(zip(*columns))
+    for i in range(0, len(rows), 4096):
+        sink.write(rows[i : i + 4096])
+    sink.close()
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else trace_dir
+    target = sys.argv[2] if len(sys.argv) > 2 else log.output_file
+    to_csv(source, target)
+    print(f"Saved: {target}")
@@ -1,17 +1,13 @@
-import parser
+import bisect
+import config
+import context
 import structs
-import random
+import streams
 import math
-import params
-import inputs
 
-_nc_categories = parser.read_csv("data/NC_Categories.csv", structs.NCCategory)
-# _nc_rules ?
-_non_combat = parser.read_csv("data/NonCombat.csv", structs.NonCombat)
 
-
-def chance(percent: float) -> bool:
-    return random.random() <= clamp(percent, floor=0, ceil=1)
+def chance(percent: float, rng: streams.Stream) -> bool:
+    return rng.random() <= clamp(percent, floor=0, ceil=1)
 
 
 def logistic(x: float, *, L: float = 1.0, k: float = 1.0, x0: float = 0.0) -> float:
@@ -21,6 +17,7 @@ def logistic(x: float, *, L: float = 1.0, k: float = 1.0, x0: float = 0.0) -> fl
 def skill_check(
     ratio: float,
     DC: float,
+    rng: streams.Stream,
     steepness: float = 1.0,
 ) -> tuple[bool, float]:
     """
@@ -29,6 +26,7 @@ def skill_check(
     Parameters:
         ratio     : player's effective power ratio or stat score
         DC        : difficulty (d20 roll)
+        rng       : random stream the roll is drawn from
         steepness : how quickly probability ramps up around equality
 
     Returns:
@@ -37,105 +35,123 @@ def skill_check(
 
     x = ratio - DC
     chance = logistic(x, L=1.0, k=steepness, x0=0.0)
-    success = random.random() < chance
+    success = rng.random() < chance
     return success, chance
 
 
+def skill_chance(ctx: context.SimContext) -> float:
+    """
+    Chance to pass the combat skill check of the active beat, see skill_check. Read from the
+    compiled chance tables with USE_CHANCE_TABLES.
+    """
+    if ctx.cfg.USE_CHANCE_TABLES:
+        return ctx.chances().combat_chance(ctx.world, ctx.player.equipment.get_score())
+    return logistic(power_ratio(ctx) - ctx.world.BeatDC / 20)
+
+
 def clamp(x: float, *, floor: float, ceil: float):
     return max(floor, min(ceil, x))
 
 
-def power_ratio(player: structs.Player, world: structs.World) -> float:
-    return player.equipment.get_score() / (
-        inputs.BASE_RECOMMENDED_GEAR
-        * inputs.GEAR_GROWTH_PER_ZONE ** (world.ZoneLevel / inputs.ZONE_SCALE)
+def recommended_gear(cfg: config.Config, zone_level: float) -> float:
+    return cfg.BASE_RECOMMENDED_GEAR * cfg.GEAR_GROWTH_PER_ZONE ** (
+        zone_level / cfg.ZONE_SCALE
     )
 
 
-def stat_score(player: structs.Player, stat_key: str) -> float:
-    stat = player.get_stat(stat_key)
+def power_ratio(ctx: context.SimContext) -> float:
+    return ctx.power_ratio()
 
+
+def stat_value(
+    cfg: config.Config, stat: structs.Stats, level: float, gear_score: float
+) -> float:
     return (
         stat.Base
-        + (player.level * stat.PerLevel)
-        + (player.equipment.get_score() / max(1, inputs.GEAR_STAT_SCALING))
+        + (level * stat.PerLevel)
+        + (gear_score / max(1, cfg.GEAR_STAT_SCALING))
     )
 
 
-def combat_chance(player: structs.Player, world: structs.World) -> float:
-    skill_noise = math.sqrt(-2 * math.log(random.random())) * math.cos(
-        2 * math.pi * random.random()
-    )
-    skill_difficulty = inputs.SKILL_DIFF_TIER_MULT + world.ZoneTier * skill_noise
+def stat_score(ctx: context.SimContext, stat_key: str) -> float:
+    player = ctx.player
+    score = player.stat_scores.get(stat_key)
+    if score is None:
+        score = player.stat_scores[stat_key] = stat_value(
+            ctx.cfg, player.get_stat(stat_key), player.level, player.equipment.get_score()
+        )
+    return score
+
 
+def noise_difficulty(cfg: config.Config, zone_tier: int, noise: float) -> float:
+    """Skill difficulty for a standard normal `noise`"""
+    return cfg.SKILL_DIFF_TIER_MULT + zone_tier * noise
+
+
+def difficulty_chance(cfg: config.Config, difficulty: float, zone_tier: int) -> float:
+    """Chance to survive a fight of rolled skill `difficulty`"""
     success_chance = 1 - (
-        skill_difficulty - (world.ZoneTier * inputs.SKILL_DIFF_TIER_MULT)
-    ) / (10 * inputs.SKILL_DIFF_ST_DEV)
-    success_chance = clamp(
+        difficulty - (zone_tier * cfg.SKILL_DIFF_TIER_MULT)
+    ) / (10 * cfg.SKILL_DIFF_ST_DEV)
+    return clamp(
         success_chance,
-        floor=params.FLOOR_SUCCESS,
-        ceil=params.CEIL_SUCCESS,
+        floor=cfg.FLOOR_SUCCESS,
+        ceil=cfg.CEIL_SUCCESS,
     )
 
-    return success_chance
 
+def combat_chance(ctx: context.SimContext, rng: streams.Stream) -> float:
+    return difficulty_chance(
+        ctx.cfg,
+        noise_difficulty(ctx.cfg, ctx.world.ZoneTier, rng.normal()),
+        ctx.world.ZoneTier,
+    )
 
-def non_combat_chance(
-    player: structs.Player, world: structs.World, category_key: str
-) -> float:
-    category = _nc_categories[0]
-    for cat in _nc_categories:
-        if cat.OutcomeCategory == category_key:
-            category = cat
 
-    tn = category.CategoryDC + world.BeatDC
+def category_chance(
+    cfg: config.Config, category: structs.NCCategory, beat_dc: float, stat: float
+) -> float:
+    """Success chance of a non-combat `category` attempt for a stat score"""
+    tn = category.CategoryDC + beat_dc
     uni = clamp(
-        (21 - (tn - stat_score(player, category.StatKey))) / 20,
+        (21 - (tn - stat)) / 20,
         floor=0,
         ceil=1,
     )
-    success_chance = clamp(
-        1 / (1 + math.exp(-params.ATTEMPT_SLOPE * (tn - uni))),
-        floor=params.FLOOR_SUCCESS,
-        ceil=params.CEIL_SUCCESS,
+    return clamp(
+        1 / (1 + math.exp(-cfg.ATTEMPT_SLOPE * (tn - uni))),
+        floor=cfg.FLOOR_SUCCESS,
+        ceil=cfg.CEIL_SUCCESS,
     )
 
-    return success_chance
 
+def non_combat_chance(ctx: context.SimContext, category_key: str) -> float:
+    if ctx.cfg.USE_CHANCE_TABLES:
+        return ctx.chances().non_combat_chance(
+            ctx.world, category_key, ctx.player.level, ctx.player.equipment.get_score()
+        )
+    category = ctx.tables.nc_category_by_key.get(
+        category_key, ctx.tables.nc_categories[0]
+    )
+    return category_chance(
+        ctx.cfg, category, ctx.world.BeatDC, stat_score(ctx, category.StatKey)
+    )
 
-def death_chance(player: structs.Player, world: structs.World) -> float:
-    return (1 - combat_chance(player, world)) * inputs.DEATH_SEVERITY
 
+def death_chance(ctx: context.SimContext) -> float:
+    return (1 - combat_chance(ctx, ctx.rng.death)) * ctx.cfg.DEATH_SEVERITY
 
-def non_combat_category(world: structs.World) -> structs.NCCategory:
-    rand = random.random()
 
-    scenario = _non_combat[0]
-    for s in _non_combat:
-        thresh = 0
-        if world.ZoneTier == 1:
-            thresh = s.T1Threshold
-        elif world.ZoneTier == 2:
-            thresh = s.T2Threshold
-        elif world.ZoneTier == 3:
-            thresh = s.T3Threshold
-        elif world.ZoneTier == 4:
-            thresh = s.T4Threshold
-        if rand <= thresh:
-            scenario = s
-            break
+def non_combat_category(ctx: context.SimContext) -> structs.NCCategory:
+    rand = ctx.rng.non_combat.random()
 
-    category = _nc_categories[0]
-    for cat in _nc_categories:
-        if cat.OutcomeCategory == scenario.Category:
-            category = cat
+    thresholds, categories = ctx.tables.nc_thresholds.get(ctx.world.ZoneTier, ((), ()))
+    i = bisect.bisect_left(thresholds, rand)
+    if i < len(categories):
+        return categories[i]
 
-    return category
+    return ctx.tables.nc_default_category
 
 
-def skill_difficulty(player: structs.Player, world: structs.World) -> float:
-    skill_noise = math.sqrt(-2 * math.log(random.random())) * math.cos(
-        2 * math.pi * random.random()
-    )
-    skill_difficulty = inputs.SKILL_DIFF_TIER_MULT + world.ZoneTier * skill_noise
-    return skill_difficulty
+def skill_difficulty(ctx: context.SimContext, rng: streams.Stream) -> float:
+    return noise_difficulty(ctx.cfg, ctx.world.ZoneTier, rng.normal())
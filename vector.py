@@ -0,0 +1,308 @@
+import argparse
+import chances
+import inputs
+import config
+import math
+import numpy as np
+import streams
+import structs
+import tables
+
+# Equipment slot order of the gear matrix columns
+GEAR_SLOTS = ("weapon", "helm", "chest", "legs", "accessory")
+
+
+class VectorEngine:
+    """
+    Advances `n` independent players in lockstep with NumPy. Every player shares the story
+    schedule (beats only depend on the turn), everything else is held as arrays and each
+    turn is resolved with vectorized draws and masks using the same rules as simulate.py.
+    """
+
+    def __init__(
+        self,
+        n: int,
+        seed: int | np.random.SeedSequence | None = None,
+        data: tables.Tables | None = None,
+        cfg: config.Config | None = None,
+    ):
+        self.tables = data or tables.default()
+        self.cfg = cfg or config.default()
+        # one generator per subsystem, like the scalar engine's streams
+        self.rng = streams.Streams(seed, stream=np.random.default_rng)
+        self.n = n
+
+        self.level = np.ones(n, dtype=np.int64)
+        self.exp = np.zeros(n, dtype=np.int64)
+        self.gold = np.zeros(n, dtype=np.int64)
+        self.gear = np.full((n, len(GEAR_SLOTS)), 15, dtype=np.int64)
+        self.beat = 0
+
+        self._cumulative_xp = np.asarray(self.tables.cumulative_xp, dtype=np.int64)
+        self._chances = (
+            chances.compiled(self.tables, self.cfg) if self.cfg.USE_CHANCE_TABLES else None
+        )
+        self._compile_loot()
+        self._compile_non_combat()
+
+    def _compile_loot(self):
+        index = self.tables.loot_index
+        slot_columns = {slot: i for i, slot in enumerate(GEAR_SLOTS)}
+
+        # power and gear column of each item LootIndex.draw indexes, per tier
+        self._loot: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+        for tier in index.samplers:
+            items = index.items(tier)
+            self._loot[tier] = (
+                np.asarray([item.BaseItemPower for item in items], dtype=np.int64),
+                np.asarray(
+                    [
+                        slot_columns[structs._SLOT_ATTRS.get(item.Slot, "accessory")]
+                        for item in items
+                    ],
+                    dtype=np.int64,
+                ),
+            )
+
+    def _compile_non_combat(self):
+        scenarios = self.tables.non_combat
+        categories = self.tables.nc_categories
+        stats = self.tables.stats
+
+        # per tier running-max thresholds, searched like utils.non_combat_category
+        self._thresholds = {
+            tier: np.asarray(thresholds)
+            for tier, (thresholds, _) in self.tables.nc_thresholds.items()
+        }
+
+        # scenario -> category keeps the last matching category, like Tables.nc_category_by_key
+        category_index = {cat.OutcomeCategory: i for i, cat in enumerate(categories)}
+        self._scenario_category = np.asarray(
+            [category_index.get(s.Category, 0) for s in scenarios]
+        )
+
+        # category -> DC and stat, with Player.get_stat's first-match lookup
+        self._category_dc = np.asarray([c.CategoryDC for c in categories])
+        stat_rows = [self.tables.stat_by_key.get(c.StatKey, stats[0]) for c in categories]
+        self._category_base = np.asarray([s.Base for s in stat_rows], dtype=float)
+        self._category_per_level = np.asarray([s.PerLevel for s in stat_rows])
+
+    @property
+    def world(self) -> structs.World:
+        return self.tables.story_beats[self.beat]
+
+    def gear_score(self) -> np.ndarray:
+        return self.gear.sum(axis=1)
+
+    def power_ratio(self) -> np.ndarray:
+        return self.gear_score() / (
+            self.cfg.BASE_RECOMMENDED_GEAR
+            * self.cfg.GEAR_GROWTH_PER_ZONE ** (self.world.ZoneLevel / self.cfg.ZONE_SCALE)
+        )
+
+    def cumulative_exp(self) -> np.ndarray:
+        return self._cumulative_xp[self.level - 1] + self.exp
+
+    def _skill_difficulty(self, k: int, rng: np.random.Generator) -> np.ndarray:
+        noise = self.world.ZoneTier * rng.standard_normal(k)
+        return self.cfg.SKILL_DIFF_TIER_MULT + noise
+
+    def _award_exp(self, rows: np.ndarray, amount: np.ndarray):
+        cumulative = self._cumulative_xp
+        level = self.level[rows]
+        exp = self.exp[rows] + amount
+
+        # players at max level only accumulate XP
+        capped = level >= len(cumulative)
+        need = np.where(
+            capped, 0, cumulative[np.minimum(level, len(cumulative) - 1)] - cumulative[level - 1]
+        )
+        up = ~capped & (exp >= need)
+
+        total = cumulative[level - 1] + exp
+        new_level = np.where(up, np.searchsorted(cumulative, total, side="right"), level)
+        self.exp[rows] = np.where(up, total - cumulative[new_level - 1], exp)
+        self.level[rows] = new_level
+
+    def _drop(self, rows: np.ndarray):
+        tier = self.world.ZoneTier
+        powers, slots = self._loot[tier]
+        rng = self.rng.loot
+
+        # utils.chance(.50) means no drop
+        rows = rows[rng.random(len(rows)) > 0.5]
+        pick = self.tables.loot_index.draw(tier, len(rows), rng)
+
+        rows, pick = rows[pick >= 0], pick[pick >= 0]
+        slot = slots[pick]
+        self.gear[rows, slot] = np.maximum(self.gear[rows, slot], powers[pick])
+
+    def _combat(self, rows: np.ndarray):
+        world = self.world
+        rng = self.rng.combat
+
+        cfg = self.cfg
+
+        if self._chances is None:
+            ratio = self.gear[rows].sum(axis=1) / (
+                cfg.BASE_RECOMMENDED_GEAR
+                * cfg.GEAR_GROWTH_PER_ZONE ** (world.ZoneLevel / cfg.ZONE_SCALE)
+            )
+            chance = 1 / (1 + np.exp(-(ratio - world.BeatDC / 20)))
+        else:
+            chance = self._chances.combat_chances(world, self.gear[rows].sum(axis=1))
+        rows = rows[rng.random(len(rows)) < chance]
+
+        # death, see utils.death_chance / utils.combat_chance
+        noise = world.ZoneTier * self.rng.death.standard_normal(len(rows))
+        difficulty = self.cfg.SKILL_DIFF_TIER_MULT + noise
+        combat_chance = np.clip(
+            1
+            - (difficulty - world.ZoneTier * self.cfg.SKILL_DIFF_TIER_MULT)
+            / (10 * self.cfg.SKILL_DIFF_ST_DEV),
+            self.cfg.FLOOR_SUCCESS,
+            self.cfg.CEIL_SUCCESS,
+        )
+        death = np.clip((1 - combat_chance) * self.cfg.DEATH_SEVERITY, 0, 1)
+        rows = rows[~(self.rng.death.random(len(rows)) <= death)]
+
+        exp = np.floor(self._skill_difficulty(len(rows), rng) * self.cfg.BASE_XP_COMBAT)
+        self._award_exp(rows, exp.astype(np.int64))
+        self.gold[rows] += self.cfg.GOLD_PER_COMBAT_STEP
+
+        self._drop(rows)
+
+    def _non_combat(self, rows: np.ndarray):
+        world = self.world
+        rng = self.rng.non_combat
+        k = len(rows)
+
+        # first scenario whose threshold covers the roll, else the first scenario
+        thresholds = self._thresholds.get(world.ZoneTier)
+        if thresholds is None:
+            scenario = np.zeros(k, dtype=np.int64)
+        else:
+            scenario = np.searchsorted(thresholds, rng.random(k), side="left")
+            scenario[scenario == len(thresholds)] = 0
+        category = self._scenario_category[scenario]
+
+        if self._chances is None:
+            stat = (
+                self._category_base[category]
+                + self.level[rows] * self._category_per_level[category]
+                + self.gear[rows].sum(axis=1) / max(1, self.cfg.GEAR_STAT_SCALING)
+            )
+            tn = self._category_dc[category] + world.BeatDC
+            uni = np.clip((21 - (tn - stat)) / 20, 0, 1)
+            chance = np.clip(
+                1 / (1 + np.exp(-self.cfg.ATTEMPT_SLOPE * (tn - uni))),
+                self.cfg.FLOOR_SUCCESS,
+                self.cfg.CEIL_SUCCESS,
+            )
+        else:
+            chance = self._chances.non_combat_chances(
+                world, category, self.level[rows], self.gear[rows].sum(axis=1)
+            )
+        success = rng.random(k) <= chance
+
+        exp = np.floor(self._skill_difficulty(k, rng) * self.cfg.BASE_XP_NON_COMBAT)
+        self._award_exp(rows, exp.astype(np.int64))
+        self.gold[rows[success]] += self.cfg.GOLD_PER_NON_COMBAT_STEP
+
+    def step(self, turn: int):
+        combat = self.rng.encounter.random(self.n) <= self.cfg.COMBAT_CHANCE
+        self._combat(np.flatnonzero(combat))
+        self._non_combat(np.flatnonzero(~combat))
+
+        # change stage, see story.progress_story
+        schedule = self.tables.beat_schedule
+        self.beat = schedule[turn] if turn < len(schedule) else len(self.tables.story_beats) - 1
+
+    def run(
+        self, turns: int, percentiles: tuple[int, ...] = (5, 25, 50, 75, 95)
+    ) -> dict[str, dict[int, list[float]]]:
+        """Advance every player `turns` times, returns per-turn bands[metric][p][turn]"""
+        metrics = {
+            "level": lambda: self.level,
+            "gold": lambda: self.gold,
+            "gear_score": self.gear_score,
+            "power_ratio": self.power_ratio,
+        }
+        bands = {m: {p: [] for p in percentiles} for m in metrics}
+
+        for turn in range(turns):
+            self.step(turn)
+            for metric, values in metrics.items():
+                for p, v in zip(percentiles, np.percentile(values(), percentiles)):
+                    bands[metric][p].append(float(v))
+
+        return bands
+
+
+def ks_statistic(a, b) -> float:
+    """Two-sample Kolmogorov-Smirnov statistic"""
+    a = np.sort(np.asarray(a, dtype=float))
+    b = np.sort(np.asarray(b, dtype=float))
+    grid = np.concatenate([a, b])
+    cdf_a = np.searchsorted(a, grid, side="right") / len(a)
+    cdf_b = np.searchsorted(b, grid, side="right") / len(b)
+    return float(np.abs(cdf_a - cdf_b).max())
+
+
+def compare_engines(
+    runs: int = 2000, turns: int = inputs.TURNS, seed: int = inputs.SEED, alpha: float = 0.001
+) -> dict[str, tuple[float, float, bool]]:
+    """
+    Statistical equivalence check of the scalar and vector engines. Runs `runs` campaigns on
+    each and compares the end-of-campaign distributions with a two-sample KS test.
+
+    Returns:
+        {metric: (statistic, critical value, passed)}
+    """
+    import batch
+    import context
+    import records
+    import simulate
+
+    scalar = {"level": [], "gold": [], "gear_score": [], "cumulative_xp": []}
+    for i in range(runs):
+        ctx = context.SimContext(batch.run_seed(i, seed))
+        scratch = records.TurnRecords(records.RING_ROWS, ring=True)
+        for turn in range(turns):
+            simulate.step(ctx, turn, scratch)
+        scalar["level"].append(ctx.player.level)
+        scalar["gold"].append(ctx.player.gold)
+        scalar["gear_score"].append(ctx.player.equipment.get_score())
+        scalar["cumulative_xp"].append(ctx.player.culumative_exp())
+
+    engine = VectorEngine(runs, seed)
+    for turn in range(turns):
+        engine.step(turn)
+    vector = {
+        "level": engine.level,
+        "gold": engine.gold,
+        "gear_score": engine.gear_score(),
+        "cumulative_xp": engine.cumulative_exp(),
+    }
+
+    critical = math.sqrt(-math.log(alpha / 2) / 2) * math.sqrt(2 / runs)
+    report = {}
+    for metric in scalar:
+        d = ks_statistic(scalar[metric], vector[metric])
+        report[metric] = (d, critical, d <= critical)
+    return report
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Check the vector engine against the scalar engine"
+    )
+    arg_parser.add_argument("--runs", type=int, default=2000)
+    arg_parser.add_argument("--turns", type=int, default=inputs.TURNS)
+    args = arg_parser.parse_args()
+
+    report = compare_engines(args.runs, args.turns)
+    for metric, (d, critical, passed) in report.items():
+        print(f"{metric:>14}: KS={d:.4f} critical={critical:.4f} {'PASS' if passed else 'FAIL'}")
+    if not all(passed for _, _, passed in report.values()):
+        raise SystemExit(1)